@@ -1,19 +1,24 @@
 import os, asyncio
-import httpx
 import io
+import json
 import base64
+import functools
+from concurrent.futures import ThreadPoolExecutor
 import torch
 import google.generativeai as genai
-from diffusers import FluxPipeline
 from fastapi import HTTPException
-from typing import Any, Dict
+from typing import Any, AsyncIterator, Callable, Dict
 from io import BytesIO
 from .config import (
-    GOOGLE_API_KEY, GEMINI_MODEL_TEXT, GEMINI_MODEL_IMAGE, logger,
+    GOOGLE_API_KEY, GEMINI_MODEL_TEXT, GEMINI_MODEL_IMAGE, GEMINI_THREAD_POOL_SIZE, logger,
     USE_LOCAL, LOCAL_LLM_URL, LOCAL_LLM_MODEL, LOCAL_PORTRAIT_URL,
     LOCAL_IMAGE_BASE_MODEL, LOCAL_IMAGE_MODEL, LOCAL_IMAGE_STEPS, LOCAL_IMAGE_GUIDANCE,
-    LOCAL_IMAGE_SEED, LOCAL_IMAGE_WIDTH, LOCAL_IMAGE_HEIGHT
+    LOCAL_IMAGE_SEED, LOCAL_IMAGE_WIDTH, LOCAL_IMAGE_HEIGHT,
+    PORTRAIT_CACHE_DIR, PORTRAIT_CACHE_MAX_MB,
 )
+from .http_clients import get_client
+from .image_pipeline import pipeline_holder, portrait_scheduler, default_seed, ASPECT_RATIOS
+from .portrait_cache import PortraitCache, cache_key
 
 # New SDK for image generation
 try:
@@ -25,123 +30,109 @@ except Exception:  # pragma: no cover
 if GOOGLE_API_KEY:
     genai.configure(api_key=GOOGLE_API_KEY)
 
+portrait_cache = PortraitCache(PORTRAIT_CACHE_DIR, PORTRAIT_CACHE_MAX_MB * 1024 * 1024)
+
+# Bounded pool for Gemini calls that have no native async variant
+_gemini_executor: ThreadPoolExecutor | None = None
+
+def _gemini_pool() -> ThreadPoolExecutor:
+    global _gemini_executor
+    if _gemini_executor is None:
+        _gemini_executor = ThreadPoolExecutor(max_workers=max(1, GEMINI_THREAD_POOL_SIZE), thread_name_prefix="gemini")
+    return _gemini_executor
+
+async def _run_in_gemini_pool(fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_gemini_pool(), functools.partial(fn, *args, **kwargs))
+
+def close_gemini_pool() -> None:
+    global _gemini_executor
+    pool, _gemini_executor = _gemini_executor, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+@functools.lru_cache(maxsize=32)
+def _gemini_text_model(model_name: str, system_instruction: str) -> "genai.GenerativeModel":
+    # One model object per (model, system instruction); the route guides are constants
+    return genai.GenerativeModel(model_name, system_instruction=system_instruction)
+
+@functools.lru_cache(maxsize=1)
+def _gemini_image_client() -> Any:
+    return genai_new.Client(api_key=GOOGLE_API_KEY)
+
 def use_local_inference(engine: str | None) -> bool:
     return (engine == 'local') or (engine is None and USE_LOCAL)
 
 async def local_text_generate(prompt: str) -> str:
-    """Generate text using Ollama.
-    Ensures HTTP client resources are properly released after generation.
-    """
+    """Generate text using Ollama over the shared keep-alive client."""
     try:
-        async with httpx.AsyncClient(timeout=60) as client:
-            r = await client.post(LOCAL_LLM_URL, json={"model": LOCAL_LLM_MODEL, "prompt": prompt, "stream": False})
+        r = await get_client("llm").post(LOCAL_LLM_URL, json={"model": LOCAL_LLM_MODEL, "prompt": prompt, "stream": False})
+        r.raise_for_status()
+        data = r.json()
+        return data.get("response") or data.get("text") or data.get("message") or ""
+    except Exception as e:
+        raise HTTPException(502, f"local llm failed: {e}")
+
+async def local_text_stream(prompt: str) -> AsyncIterator[str]:
+    """Stream text from Ollama as tokens arrive (NDJSON chunks)."""
+    try:
+        async with get_client("llm").stream(
+            "POST", LOCAL_LLM_URL, json={"model": LOCAL_LLM_MODEL, "prompt": prompt, "stream": True}
+        ) as r:
             r.raise_for_status()
-            data = r.json()
-            result = data.get("response") or data.get("text") or data.get("message") or ""
-            # Client is automatically closed by async with context manager
-            return result
+            async for line in r.aiter_lines():
+                if not line.strip():
+                    continue
+                data = json.loads(line)
+                if data.get("error"):
+                    raise RuntimeError(data["error"])
+                yield data.get("response") or ""
+                if data.get("done"):
+                    break
     except Exception as e:
         raise HTTPException(502, f"local llm failed: {e}")
 
 async def google_text_generate(prompt: str, system_instruction: str) -> str:
     if not GOOGLE_API_KEY:
         raise HTTPException(400, "Missing GOOGLE_API_KEY in environment.")
-    model = genai.GenerativeModel(GEMINI_MODEL_TEXT, system_instruction=system_instruction)
-    resp = await asyncio.to_thread(model.generate_content, prompt)
+    model = _gemini_text_model(GEMINI_MODEL_TEXT, system_instruction)
+    if hasattr(model, "generate_content_async"):
+        resp = await model.generate_content_async(prompt)
+    else:
+        resp = await _run_in_gemini_pool(model.generate_content, prompt)
     text = resp.text.strip()
     if text.startswith("```"):
         text = text.strip("`")
         text = text.replace("json\n", "").replace("\njson", "")
     return text
 
-async def local_image_generate(prompt: str) -> bytes:
-    """Generate an image locally.
-    Diffusers pipeline (MPS preferred on macOS)
-    Returns PNG bytes.
-    Ensures pipeline resources are released after generation.
-    """
-    logger.info("Attempting local image generation via Diffusers (preferring MPS)...")
-    pipe = None
-    device = "cpu"
-    cuda_ok = False
-    mps_ok = False
-    try:
-        try:
-            mps_ok = bool(getattr(torch.backends, "mps", None) and torch.backends.mps.is_available())
-        except Exception:
-            mps_ok = False
+async def google_text_stream(prompt: str, system_instruction: str) -> AsyncIterator[str]:
+    if not GOOGLE_API_KEY:
+        raise HTTPException(400, "Missing GOOGLE_API_KEY in environment.")
+    model = _gemini_text_model(GEMINI_MODEL_TEXT, system_instruction)
+    resp = await model.generate_content_async(prompt, stream=True)
+    async for chunk in resp:
         try:
-            cuda_ok = bool(getattr(torch.version, "cuda", None)) and bool(hasattr(torch, "cuda")) and bool(torch.cuda.is_available())
-        except Exception:
-            cuda_ok = False
-        device = "mps" if mps_ok else ("cuda" if cuda_ok else "cpu")
-        dtype = torch.float16 if device == "mps" else (torch.bfloat16 if device == "cuda" else torch.float32)
-        logger.info("Diffusion device=%s dtype=%s model=%s", device, str(dtype).split(".")[-1], LOCAL_IMAGE_MODEL)
-
-        pipe = FluxPipeline.from_pretrained(LOCAL_IMAGE_MODEL, dtype=dtype)
+            yield chunk.text
+        except ValueError:
+            continue  # chunk without text parts (e.g. safety metadata)
 
-        try:
-            logger.info("Moving diffusion pipeline to device %s...", device)
-            pipe.to(device)
-        except Exception:
-            logger.info("Diffusion pipeline .to(%s) failed; continuing on default device", device)
-
-        aspect_ratios = {
-            "1:1": (512, 512),
-            "16:9": (1664, 928),
-            "9:16": (928, 1664),
-            "4:3": (1472, 1140),
-            "3:4": (1140, 1472),
-            "3:2": (1584, 1056),
-            "2:3": (1056, 1584),
-        }
-        width, height = aspect_ratios.get("1:1", (0, 0))
-        seed = LOCAL_IMAGE_SEED if LOCAL_IMAGE_SEED >= 0 else 0
-        gen_device = "cpu" if device == "mps" else device
-        kwargs = {
-            "prompt": prompt,
-            "width": width,
-            "height": height,
-            "num_inference_steps": LOCAL_IMAGE_STEPS,
-            "guidance_scale": LOCAL_IMAGE_GUIDANCE,
-            "max_sequence_length": 512,
-            "generator": torch.Generator(device=gen_device).manual_seed(seed),
-        }
+def text_stream(prompt: str, system_instruction: str, engine: str | None) -> AsyncIterator[str]:
+    if use_local_inference(engine):
+        return local_text_stream(prompt)
+    return google_text_stream(prompt, system_instruction)
 
-        try:
-            img = pipe(**kwargs).images[0]
-        except Exception as inner_e:
-            if device == "mps":
-                logger.warning("MPS generation failed (%s); retrying on CPU float32...", inner_e)
-                pipe.to("cpu")
-                kwargs_retry = dict(kwargs)
-                kwargs_retry["generator"] = torch.Generator(device="cpu").manual_seed(seed)
-                img = pipe(**kwargs_retry).images[0]
-            else:
-                raise
-        buf = io.BytesIO()
-        img.save(buf, format="PNG")
-        return buf.getvalue()
+async def local_image_generate(prompt: str) -> bytes:
+    """Generate an image locally with the resident Diffusers pipeline.
+    The pipeline is loaded once and kept warm; concurrent requests are
+    micro-batched into one pipeline call. Returns PNG bytes.
+    """
+    logger.info("Attempting local image generation via resident Diffusers pipeline...")
+    try:
+        return await portrait_scheduler.submit(prompt, default_seed())
     except Exception as e:
         logger.exception("Diffusers generation failed: %s", e)
         raise HTTPException(500, f"local Diffusers generation failed: {e}. Ensure torch with MPS support and diffusers are installed.")
-    finally:
-        # Release pipeline resources
-        if pipe is not None:
-            try:
-                # Move pipeline off device to free GPU/MPS memory
-                pipe.to("cpu")
-                # Clear CUDA cache if available
-                if cuda_ok and hasattr(torch.cuda, "empty_cache"):
-                    torch.cuda.empty_cache()
-                # Clear MPS cache if available
-                if mps_ok and hasattr(torch.backends.mps, "empty_cache"):
-                    torch.backends.mps.empty_cache()
-                # Delete the pipeline object
-                del pipe
-                logger.info("FluxPipeline resources released")
-            except Exception as cleanup_e:
-                logger.warning("Error during pipeline cleanup: %s", cleanup_e)
 
 async def google_image_generate(prompt: str) -> bytes:
     if not GOOGLE_API_KEY:
@@ -150,15 +141,15 @@ async def google_image_generate(prompt: str) -> bytes:
         raise HTTPException(500, "google-genai not installed. Please install google-genai >= 0.3.0")
     
     logger.info("Using Gemini image generation...")
-    client = genai_new.Client(api_key=GOOGLE_API_KEY)
+    client = _gemini_image_client()
     model_name = GEMINI_MODEL_IMAGE
     if model_name in ("gemini-flash-2.5", "gemini-2.5-flash"):
         model_name = "gemini-2.5-flash-image"
-    resp = await asyncio.to_thread(
-        client.models.generate_content,
-        model=model_name,
-        contents=[prompt],
-    )
+    aio = getattr(client, "aio", None)
+    if aio is not None:
+        resp = await aio.models.generate_content(model=model_name, contents=[prompt])
+    else:
+        resp = await _run_in_gemini_pool(client.models.generate_content, model=model_name, contents=[prompt])
     logger.info("Extracting image data from response...")
     image_bytes: bytes | None = None
     for part in getattr(resp, "parts", []) or []:
@@ -168,10 +159,35 @@ async def google_image_generate(prompt: str) -> bytes:
         raise ValueError("No image returned by model")
     return image_bytes
 
+def portrait_cache_key(prompt: str, engine: str | None) -> str:
+    if use_local_inference(engine):
+        width, height = ASPECT_RATIOS["1:1"]
+        return cache_key(prompt=prompt, engine="local", model=LOCAL_IMAGE_MODEL, steps=LOCAL_IMAGE_STEPS,
+                         guidance=LOCAL_IMAGE_GUIDANCE, seed=default_seed(), size=f"{width}x{height}")
+    return cache_key(prompt=prompt, engine="google", model=GEMINI_MODEL_IMAGE, steps=None,
+                     guidance=None, seed=None, size=None)
+
+async def cached_image_generate(prompt: str, engine: str | None) -> tuple[bytes, str]:
+    """Return (PNG bytes, strong ETag), generating only on a portrait cache miss."""
+    key = portrait_cache_key(prompt, engine)
+    hit = await asyncio.to_thread(portrait_cache.get, key)
+    if hit is not None:
+        logger.info("Portrait cache hit %s", key[:12])
+        return hit
+    if use_local_inference(engine):
+        logger.info("Using local image generation...")
+        image_bytes = await local_image_generate(prompt)
+    else:
+        logger.info("Using Gemini image generation...")
+        image_bytes = await google_image_generate(prompt)
+    etag = await asyncio.to_thread(portrait_cache.put, key, image_bytes)
+    return image_bytes, etag
+
 async def get_model_health() -> Dict[str, Any]:
     """Report local inference model/device info for image and text.
-    Note: This does not load pipelines; it infers device/dtype from torch availability
-    and optionally probes the local text endpoint with a fast OPTIONS request.
+    Note: This does not load pipelines; it infers device/dtype from torch availability,
+    reports the resident pipeline's load state, and optionally probes the local text
+    endpoint with a fast OPTIONS request.
     """
     try:
         try:
@@ -189,9 +205,8 @@ async def get_model_health() -> Dict[str, Any]:
 
     text_reachable = False
     try:
-        async with httpx.AsyncClient(timeout=2.0) as client:
-            resp = await client.options(LOCAL_LLM_URL)
-            text_reachable = resp.status_code < 500
+        resp = await get_client("llm").options(LOCAL_LLM_URL, timeout=2.0)
+        text_reachable = resp.status_code < 500
     except Exception:
         text_reachable = False
 
@@ -202,6 +217,8 @@ async def get_model_health() -> Dict[str, Any]:
             "base_model": LOCAL_IMAGE_BASE_MODEL,
             "device": device,
             "dtype": dtype,
+            "pipeline": pipeline_holder.status(),
+            "portrait_cache": portrait_cache.stats(),
         },
         "text": {
             "url": LOCAL_LLM_URL,
@@ -0,0 +1,245 @@
+"""NDJSON bulk export/import of the library tables.
+
+One JSON object per line, shaped like the save payloads: `name`, `created_at`,
+`prompt` (where the table has one), each stored document under its schema
+name (`draft`, `backstory`, `progression`, `item`, `spell`, `plan`,
+`creature`) and `portrait_base64` for portraits. Exports stream straight off
+a SQLite cursor (documents decompressed on the way); imports are validated against the schemas and written in
+BULK_IMPORT_BATCH_SIZE-row transactions. Imported rows get new ids.
+
+    python -m api.app.bulk export creature_library > creatures.ndjson
+    python -m api.app.bulk import creature_library creatures.ndjson
+"""
+import argparse
+import base64
+import binascii
+import json
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Iterator
+from pydantic import BaseModel, ValidationError
+from .config import logger, BULK_IMPORT_BATCH_SIZE
+from .documents import decode_doc
+from .database import PORTRAIT_TABLES, get_db_connection, insert_rows, run_db
+from .schemas import CharacterDraft, BackstoryResult, ProgressionPlan, MagicItem, Spell, Creature
+from .thumbnails import thumbnail_worker
+
+# table -> {document column: (record key, schema)}; the first document is required
+BULK_DOCUMENTS: dict[str, dict[str, tuple[str, type[BaseModel]]]] = {
+    "library": {
+        "draft_json": ("draft", CharacterDraft),
+        "backstory_json": ("backstory", BackstoryResult),
+        "progression_json": ("progression", ProgressionPlan),
+    },
+    "item_library": {"item_json": ("item", MagicItem)},
+    "spell_library": {"spell_json": ("spell", Spell)},
+    "progression_library": {"plan_json": ("plan", ProgressionPlan)},
+    "creature_library": {"creature_json": ("creature", Creature)},
+}
+BULK_TABLES = tuple(BULK_DOCUMENTS)
+# row name when a record has none (library rows are named after the draft)
+BULK_DEFAULT_NAMES = {
+    "item_library": "Unnamed Relic",
+    "spell_library": "Unnamed Spell",
+    "progression_library": "Progression Plan",
+    "creature_library": "Unnamed Creature",
+}
+
+_EXPORT_CHUNK = 256 * 1024
+_MAX_ERRORS = 100
+
+def _fields(table: str) -> list[str]:
+    return ["name", "created_at"] if table == "library" else ["name", "created_at", "prompt"]
+
+def export_ndjson(table: str, portraits: bool = True) -> Iterator[bytes]:
+    """Yield the table as NDJSON in ~256KB chunks, oldest row first.
+    Rows are stepped one at a time off the cursor of a dedicated connection
+    (a consistent WAL snapshot), and stored documents are spliced in as-is."""
+    docs = BULK_DOCUMENTS[table]
+    cols = ["t.id", *(f"t.{c}" for c in _fields(table)), *(f"t.{c}" for c in docs)]
+    join = ""
+    if portraits and table in PORTRAIT_TABLES:
+        cols.append("b.data AS portrait")
+        join = " LEFT JOIN blobs b ON b.hash = t.portrait_hash"
+    con = get_db_connection()
+    try:
+        buf: list[str] = []
+        size = 0
+        for r in con.execute(f"SELECT {', '.join(cols)} FROM {table} t{join} ORDER BY t.id"):
+            parts = [f'"id":{r["id"]}']
+            parts += [f'"{f}":{json.dumps(r[f])}' for f in _fields(table)]
+            parts += [f'"{key}":{decode_doc(col, r[col]) or "null"}' for col, (key, _) in docs.items()]
+            if join:
+                portrait = r["portrait"]
+                parts.append('"portrait_base64":' + (f'"{base64.b64encode(portrait).decode("ascii")}"' if portrait else "null"))
+            line = "{" + ",".join(parts) + "}\n"
+            buf.append(line)
+            size += len(line)
+            if size >= _EXPORT_CHUNK:
+                yield "".join(buf).encode("utf-8")
+                buf, size = [], 0
+        if buf:
+            yield "".join(buf).encode("utf-8")
+    finally:
+        con.close()
+
+def _describe(key: str, e: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(str(p) for p in (key, *err['loc']))}: {err['msg']}" for err in e.errors())
+
+def _timestamp(value: str) -> str:
+    """Normalize an ISO 8601 timestamp to the stored UTC form (naive means UTC), so
+    imported rows sort correctly against saved ones."""
+    try:
+        dt = datetime.fromisoformat(value[:-1] + "+00:00" if value.endswith(("Z", "z")) else value)
+    except ValueError:
+        raise ValueError("created_at: expected an ISO 8601 timestamp") from None
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+    return dt.isoformat(timespec="seconds") + "Z"
+
+def record_to_row(table: str, record: Any) -> dict[str, Any]:
+    """Validate one NDJSON record and map it to table columns (ValueError if invalid)."""
+    if not isinstance(record, dict):
+        raise ValueError("expected a JSON object")
+    row: dict[str, Any] = {f: record.get(f) for f in _fields(table)}
+    for f, value in row.items():
+        if value is not None and not isinstance(value, str):
+            raise ValueError(f"{f}: expected a string")
+    if row["created_at"] is not None:
+        row["created_at"] = _timestamp(row["created_at"])
+    primary = None
+    for i, (col, (key, model)) in enumerate(BULK_DOCUMENTS[table].items()):
+        value = record.get(key)
+        if value is None:
+            if i == 0:
+                raise ValueError(f"{key}: field required")
+            row[col] = None
+            continue
+        try:
+            doc = model.model_validate(value)
+        except ValidationError as e:
+            raise ValueError(_describe(key, e)) from None
+        primary = primary or doc
+        row[col] = doc.model_dump_json()
+    if not row["name"]:
+        if table == "library":
+            row["name"] = primary.name or f"{primary.race} {primary.cls} L{primary.level}"
+        else:
+            row["name"] = primary.name or BULK_DEFAULT_NAMES[table]
+    if table in PORTRAIT_TABLES:
+        portrait = record.get("portrait_base64")
+        try:
+            row["portrait_png"] = base64.b64decode(portrait, validate=True) if portrait else None
+        except (binascii.Error, TypeError):
+            raise ValueError("portrait_base64: not valid base64") from None
+    return row
+
+def import_batch(table: str, lines: list[tuple[int, bytes]]) -> tuple[int, list[dict[str, Any]], list[str]]:
+    """Blocking: validate and insert one batch of (line number, line).
+    Returns (rows imported, errors, portrait hashes written)."""
+    rows: list[dict[str, Any]] = []
+    errors: list[dict[str, Any]] = []
+    for line_no, line in lines:
+        try:
+            rows.append(record_to_row(table, json.loads(line)))
+        except json.JSONDecodeError as e:
+            errors.append({"line": line_no, "error": f"invalid JSON: {e}"})
+        except ValueError as e:
+            errors.append({"line": line_no, "error": str(e)})
+    insert_rows(table, rows)
+    return len(rows), errors, [r["portrait_hash"] for r in rows if r.get("portrait_hash")]
+
+class ImportReport:
+    def __init__(self, table: str):
+        self.table = table
+        self.imported = 0
+        self.skipped = 0
+        self.errors: list[dict[str, Any]] = []
+        self.started = time.perf_counter()
+
+    def add(self, imported: int, errors: list[dict[str, Any]]) -> None:
+        self.imported += imported
+        self.skipped += len(errors)
+        self.errors.extend(errors[:_MAX_ERRORS - len(self.errors)])
+
+    def summary(self) -> dict[str, Any]:
+        seconds = time.perf_counter() - self.started
+        rate = self.imported / seconds if seconds > 0 else 0.0
+        logger.info("bulk import %s: %d rows (%d skipped) in %.2fs, %.0f rows/s", self.table, self.imported, self.skipped, seconds, rate)
+        return {"table": self.table, "imported": self.imported, "skipped": self.skipped, "errors": self.errors,
+                "seconds": round(seconds, 3), "rows_per_sec": round(rate, 1)}
+
+async def _lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[tuple[int, bytes]]:
+    # only each new chunk is split; a line spanning chunks is joined once, at its newline
+    partial: list[bytes] = []
+    line_no = 0
+    async for chunk in chunks:
+        *complete, tail = chunk.split(b"\n")
+        if complete:
+            partial.append(complete[0])
+            complete[0] = b"".join(partial)
+            partial = []
+        if tail:
+            partial.append(tail)
+        for line in complete:
+            line_no += 1
+            if line.strip():
+                yield line_no, line
+    pending = b"".join(partial)
+    if pending.strip():
+        yield line_no + 1, pending
+
+async def import_ndjson(table: str, chunks: AsyncIterator[bytes]) -> dict[str, Any]:
+    """Import a streamed NDJSON body; validation and writes run on the DB pool."""
+    report = ImportReport(table)
+    batch: list[tuple[int, bytes]] = []
+
+    async def flush() -> None:
+        imported, errors, digests = await run_db(import_batch, table, batch)
+        report.add(imported, errors)
+        for digest in digests:
+            thumbnail_worker.enqueue(digest)
+        batch.clear()
+
+    async for item in _lines(chunks):
+        batch.append(item)
+        if len(batch) >= BULK_IMPORT_BATCH_SIZE:
+            await flush()
+    if batch:
+        await flush()
+    return report.summary()
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Bulk NDJSON export/import of a library table")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    p_export = sub.add_parser("export", help="write the table to stdout")
+    p_export.add_argument("table", choices=BULK_TABLES)
+    p_export.add_argument("--no-portraits", action="store_true")
+    p_import = sub.add_parser("import", help="append the rows of an NDJSON file to the table")
+    p_import.add_argument("table", choices=BULK_TABLES)
+    p_import.add_argument("file")
+    args = ap.parse_args()
+    if args.cmd == "export":
+        for chunk in export_ndjson(args.table, portraits=not args.no_portraits):
+            sys.stdout.buffer.write(chunk)
+        return
+    report = ImportReport(args.table)
+    with open(args.file, "rb") as fh:
+        batch: list[tuple[int, bytes]] = []
+        for line_no, line in enumerate(fh, 1):
+            if line.strip():
+                batch.append((line_no, line))
+            if len(batch) >= BULK_IMPORT_BATCH_SIZE:
+                report.add(*import_batch(args.table, batch)[:2])
+                batch = []
+        if batch:
+            report.add(*import_batch(args.table, batch)[:2])
+    result = report.summary()
+    print(f"imported {result['imported']} rows into {args.table} ({result['skipped']} skipped) "
+          f"in {result['seconds']:.2f}s, {result['rows_per_sec']:.0f} rows/s; run `python -m api.app.thumbnails backfill` for portraits")
+    for err in result["errors"]:
+        print(f"  line {err['line']}: {err['error']}")
+
+if __name__ == "__main__":
+    main()
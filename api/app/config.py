@@ -15,6 +15,16 @@ logger = logging.getLogger("5e-forge")
 
 # Database configuration
 DB_PATH = os.getenv("DB_PATH", "app.db")
+# Queries run on a dedicated thread pool; each worker keeps one WAL-mode connection
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "4"))
+DB_SYNCHRONOUS = os.getenv("DB_SYNCHRONOUS", "NORMAL").upper()
+DB_CACHE_SIZE_MB = int(os.getenv("DB_CACHE_SIZE_MB", "32"))
+DB_MMAP_SIZE_MB = int(os.getenv("DB_MMAP_SIZE_MB", "256"))
+DB_BUSY_TIMEOUT = float(os.getenv("DB_BUSY_TIMEOUT", "5"))
+# Store library JSON documents DEFLATE-compressed (plain JSON rows are always readable)
+DB_COMPRESS_DOCUMENTS = os.getenv("DB_COMPRESS_DOCUMENTS", "true").lower() == "true"
+# Rows per transaction for /api/bulk/{table}/import
+BULK_IMPORT_BATCH_SIZE = int(os.getenv("BULK_IMPORT_BATCH_SIZE", "1000"))
 
 # Server configuration
 PORT = int(os.getenv("PORT_API", "8000"))
@@ -22,11 +32,27 @@ PORT = int(os.getenv("PORT_API", "8000"))
 # D&D 5e API configuration
 RULES_BASE = os.getenv("RULES_BASE_URL", "https://www.dnd5eapi.co")
 RULES_API_PREFIX = os.getenv("RULES_API_PREFIX", "api/2014")
+# Most characters accepted by one /api/generate/batch request
+BATCH_GENERATE_MAX = int(os.getenv("BATCH_GENERATE_MAX", "100"))
+
+# Encounter simulation: worker processes (0 = one per core), trials per chunk,
+# and the per-request caps on trials and seconds
+SIM_WORKERS = int(os.getenv("SIM_WORKERS", "0"))
+SIM_CHUNK_TRIALS = int(os.getenv("SIM_CHUNK_TRIALS", "2000"))
+SIM_MAX_TRIALS = int(os.getenv("SIM_MAX_TRIALS", "1000000"))
+SIM_TIME_BUDGET = float(os.getenv("SIM_TIME_BUDGET", "10"))
+
+# PDF exports render in worker processes (0 = inline on the event loop);
+# renders running or waiting beyond PDF_QUEUE_MAX are refused with 503
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", "2"))
+PDF_QUEUE_MAX = int(os.getenv("PDF_QUEUE_MAX", "16"))
 
 # AI/LLM configuration (Google Gemini)
 GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY", "")
 GEMINI_MODEL_TEXT = os.getenv("GEMINI_MODEL_TEXT", "gemini-2.5-pro")
 GEMINI_MODEL_IMAGE = os.getenv("GEMINI_MODEL_IMAGE", "gemini-2.5-flash-image")
+# Worker threads for Gemini calls that have no native async variant
+GEMINI_THREAD_POOL_SIZE = int(os.getenv("GEMINI_THREAD_POOL_SIZE", "4"))
 
 # Local inference toggles
 USE_LOCAL = os.getenv("USE_LOCAL_INFERENCE", "false").lower() == "true"
@@ -40,6 +66,34 @@ LOCAL_IMAGE_GUIDANCE = float(os.getenv("LOCAL_IMAGE_GUIDANCE", "0.0"))
 LOCAL_IMAGE_SEED = int(os.getenv("LOCAL_IMAGE_SEED", "0"))
 LOCAL_IMAGE_WIDTH = int(os.getenv("LOCAL_IMAGE_WIDTH", "0"))
 LOCAL_IMAGE_HEIGHT = int(os.getenv("LOCAL_IMAGE_HEIGHT", "0"))
+# Resident diffusion pipeline: load at startup instead of on first portrait,
+# and unload after this many idle seconds (0 = keep loaded)
+LOCAL_IMAGE_PRELOAD = os.getenv("LOCAL_IMAGE_PRELOAD", "false").lower() == "true"
+LOCAL_IMAGE_IDLE_TIMEOUT = float(os.getenv("LOCAL_IMAGE_IDLE_TIMEOUT", "900"))
+# Portrait micro-batching: max prompts per pipeline call and how long to wait for more
+PORTRAIT_BATCH_MAX = int(os.getenv("PORTRAIT_BATCH_MAX", "4"))
+PORTRAIT_BATCH_WINDOW_MS = float(os.getenv("PORTRAIT_BATCH_WINDOW_MS", "75"))
+
+# Generated portrait cache (content-addressed, LRU-capped) and response caching policy
+PORTRAIT_CACHE_DIR = Path(os.getenv("PORTRAIT_CACHE_DIR", ".cache/portraits"))
+PORTRAIT_CACHE_MAX_MB = int(os.getenv("PORTRAIT_CACHE_MAX_MB", "512"))
+PORTRAIT_CACHE_CONTROL = os.getenv("PORTRAIT_CACHE_CONTROL", "private, no-cache")
+# WebP thumbnails of saved portraits (edge lengths in px), rendered in the background
+THUMBNAIL_SIZES = tuple(sorted({int(x) for x in os.getenv("THUMBNAIL_SIZES", "64,128,256").split(",") if x.strip()}))
+if not THUMBNAIL_SIZES or THUMBNAIL_SIZES[0] <= 0:
+    raise ValueError(f"THUMBNAIL_SIZES must list one or more positive sizes, got {os.getenv('THUMBNAIL_SIZES')!r}")
+THUMBNAIL_QUALITY = int(os.getenv("THUMBNAIL_QUALITY", "80"))
+
+# Outbound HTTP connection pools (one keep-alive client per upstream)
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "20"))
+HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", "10"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30"))
+HTTP2_ENABLED = os.getenv("HTTP2_ENABLED", "false").lower() == "true"
 
 # External rules API caching
 cache_dir = Path(".cache"); cache_dir.mkdir(exist_ok=True)
+RULES_CACHE_TTL = int(os.getenv("RULES_CACHE_TTL", str(60*60*24)))
+RULES_CACHE_MEMORY_ENTRIES = int(os.getenv("RULES_CACHE_MEMORY_ENTRIES", "1024"))
+RULES_CACHE_MAX_ENTRIES = int(os.getenv("RULES_CACHE_MAX_ENTRIES", "10000"))
+# Offline mode: path to a prefetched SRD bundle (python -m api.app.srd_bundle prefetch)
+RULES_BUNDLE = os.getenv("RULES_BUNDLE", "")
@@ -0,0 +1,236 @@
+"""Challenge rating estimates and a balance audit of the creature library.
+
+Follows the DMG "Creating a Monster" procedure on the fields we store:
+
+  defensive CR  effective HP (resistances/immunities multiplier) picks a row,
+                then +/-1 CR per 2 points of effective AC (3+ saving throw
+                proficiencies count as +2/+4 AC) above/below that row's AC
+  offensive CR  damage per round (parsed from `actions`, with Multiattack)
+                picks a row, then +/-1 CR per 2 points of attack bonus (or
+                save DC for save-only attackers) above/below that row's
+  estimate      the average of the two
+
+Text is parsed once per creature (dice via dice.compile_dice); the CR math
+runs over all creatures at once in NumPy.
+
+    python -m api.app.cr_audit [--threshold 2] [--limit 20]
+"""
+import argparse
+import json
+import re
+import time
+from typing import Any
+import numpy as np
+from .dice import DiceError, DiceExpr, Term, compile_dice
+
+# DMG "Monster Statistics by Challenge Rating":
+# CR, proficiency, AC, max HP, attack bonus, max damage/round, save DC
+CR_TABLE = [
+    ("0", 2, 13, 6, 3, 1, 13), ("1/8", 2, 13, 35, 3, 3, 13), ("1/4", 2, 13, 49, 3, 5, 13), ("1/2", 2, 13, 70, 3, 8, 13),
+    ("1", 2, 13, 85, 3, 14, 13), ("2", 2, 13, 100, 3, 20, 13), ("3", 2, 13, 115, 4, 26, 13), ("4", 2, 14, 130, 5, 32, 14),
+    ("5", 3, 15, 145, 6, 38, 15), ("6", 3, 15, 160, 6, 44, 15), ("7", 3, 15, 175, 6, 50, 15), ("8", 3, 16, 190, 7, 56, 16),
+    ("9", 4, 16, 205, 7, 62, 16), ("10", 4, 17, 220, 7, 68, 16), ("11", 4, 17, 235, 8, 74, 17), ("12", 4, 17, 250, 8, 80, 17),
+    ("13", 5, 18, 265, 8, 86, 18), ("14", 5, 18, 280, 8, 92, 18), ("15", 5, 18, 295, 8, 98, 18), ("16", 5, 18, 310, 9, 104, 18),
+    ("17", 6, 19, 325, 10, 110, 19), ("18", 6, 19, 340, 10, 116, 19), ("19", 6, 19, 355, 10, 122, 19), ("20", 6, 19, 400, 10, 140, 19),
+    ("21", 7, 19, 445, 11, 158, 20), ("22", 7, 19, 490, 11, 176, 20), ("23", 7, 19, 535, 11, 194, 20), ("24", 7, 19, 580, 12, 212, 21),
+    ("25", 8, 19, 625, 12, 230, 21), ("26", 8, 19, 670, 12, 248, 21), ("27", 8, 19, 715, 13, 266, 22), ("28", 8, 19, 760, 13, 284, 22),
+    ("29", 9, 19, 805, 13, 302, 22), ("30", 9, 19, 850, 14, 320, 23),
+]
+CRS = [row[0] for row in CR_TABLE]
+_CR_INDEX = {cr: i for i, cr in enumerate(CRS)}
+ROW_AC, ROW_HP, ROW_ATK, ROW_DMG, ROW_DC = (np.array([row[k] for row in CR_TABLE]) for k in (2, 3, 4, 5, 6))
+_TOP = len(CR_TABLE) - 1
+# effective-HP multipliers by expected CR index: up to CR 4, 10, 16, then 17+
+_TIER_BOUNDS = np.array([_CR_INDEX["4"], _CR_INDEX["10"], _CR_INDEX["16"]])
+_RESIST_MULT = np.array([2.0, 1.5, 1.25, 1.0])
+_IMMUNE_MULT = np.array([2.0, 2.0, 1.5, 1.25])
+
+_NUMBERS = {"two": 2, "three": 3, "four": 4, "five": 5, "six": 6}
+_MULTI = re.compile(r"multiattack\b.*?\b(two|three|four|five|six|\d+)\b", re.I | re.S)
+_TO_HIT = re.compile(r"([+-]\s*\d+)\s*to hit", re.I)
+_SAVE_DC = re.compile(r"\bDC\s*(\d+)", re.I)
+_AVG_DICE = re.compile(r"(\d+)\s*\(\s*(\d*d\d+[^)]*)\)", re.I)
+_BARE_DICE = re.compile(r"\d*d\d+(?:\s*[+-]\s*\d+)?", re.I)
+_HIT_FLAT = re.compile(r"hit:\s*(\d+)\b", re.I)
+
+def cr_index(cr: Any) -> float:
+    """Row index of a stated CR ("1/4", "5", "5 (1,800 XP)"); NaN if unreadable."""
+    token = str(cr or "").strip().split(" ")[0]
+    return float(_CR_INDEX.get(token, np.nan))
+
+def action_dice(text: str) -> DiceExpr | None:
+    """Damage of one action as a dice expression: the dice behind stated averages,
+    else bare dice, else a flat "Hit: N"; None if no damage is given."""
+    terms: list[Term] = []
+    for avg, expr in _AVG_DICE.findall(text):
+        try:
+            terms += compile_dice(expr).terms
+        except DiceError:
+            terms.append(Term(int(avg), 0, 1))
+    if not terms:
+        for expr in _BARE_DICE.findall(text):
+            try:
+                terms += compile_dice(expr).terms
+            except DiceError:
+                pass
+    if not terms:
+        flat = _HIT_FLAT.search(text)
+        if flat:
+            terms.append(Term(int(flat.group(1)), 0, 1))
+    return DiceExpr(tuple(terms)) if terms else None
+
+def _parse_actions(data: dict[str, Any]) -> tuple[int, list[tuple[int | None, list[int], DiceExpr | None, str]]]:
+    """(attacks per Multiattack, [(attack bonus or None, save DCs, damage or None, action text)])."""
+    multi = 1
+    parsed: list[tuple[int | None, list[int], DiceExpr | None, str]] = []
+    for action in data.get("actions") or []:
+        text = str(action)
+        m = _MULTI.search(text)
+        if m:
+            word = m.group(1).lower()
+            multi = max(multi, _NUMBERS.get(word) or (int(word) if word.isdigit() else 1))
+            continue
+        hit = _TO_HIT.search(text)
+        parsed.append((int(hit.group(1).replace(" ", "")) if hit else None,
+                       [int(x) for x in _SAVE_DC.findall(text)], action_dice(text), text))
+    return multi, parsed
+
+def creature_actions(data: dict[str, Any]) -> tuple[int, list[tuple[int, DiceExpr]], list[tuple[int, DiceExpr, str]]]:
+    """(attacks per Multiattack, [(attack bonus, damage)], [(save DC or 0, damage, action text)]).
+    For simulation: attacks need parsable damage; other actions need damage or a DC."""
+    multi, parsed = _parse_actions(data)
+    attacks: list[tuple[int, DiceExpr]] = []
+    others: list[tuple[int, DiceExpr, str]] = []
+    for hit, dcs, damage, text in parsed:
+        if hit is not None and damage is not None:
+            attacks.append((hit, damage))
+        elif damage is not None or dcs:
+            others.append((max(dcs) if dcs else 0, damage or DiceExpr((Term(0, 0, 1),)), text))
+    return multi, attacks, others
+
+def creature_features(data: dict[str, Any]) -> tuple[float, ...]:
+    """(hp, ac, saves, resistances, immunities, dpr, attack bonus, save dc, stated CR index).
+    Every to-hit action counts toward the attack bonus (unparsed damage as 0) and every
+    action's DC toward the save DC. Missing attack bonus / DC are NaN."""
+    multi, parsed = _parse_actions(data)
+    attacks: list[tuple[int, float]] = []
+    other_damage = 0.0
+    dcs: list[int] = []
+    for hit, action_dcs, damage, _ in parsed:
+        dcs += action_dcs
+        mean = damage.mean if damage is not None else 0.0
+        if hit is not None:
+            attacks.append((hit, mean))
+        else:
+            other_damage = max(other_damage, mean)
+    if attacks:
+        means = [d for _, d in attacks]
+        dpr = max(multi * sum(means) / len(means), max(means), other_damage)
+        attack = float(max(a for a, _ in attacks))
+    else:
+        dpr, attack = other_damage, np.nan
+    resist = data.get("damage_resistances") or []
+    nonmagical = any("nonmagical" in str(r).lower() for r in resist)
+    return (
+        float(data.get("hit_points") or 0), float(data.get("armor_class") or 10),
+        float(len(data.get("saving_throws") or [])), float(len(resist) + (2 if nonmagical else 0)),
+        float(len(data.get("damage_immunities") or [])),
+        dpr, attack, float(max(dcs)) if dcs else np.nan, cr_index(data.get("challenge_rating")),
+    )
+
+def estimate(features: np.ndarray) -> dict[str, np.ndarray]:
+    """Vectorized DMG estimate for an (n, 9) array of creature_features rows.
+    Returns defensive/offensive/estimated CR indexes (into CRS)."""
+    hp, ac, saves, resist, immune, dpr, attack, dc = features[:, :8].T
+    raw_idx = np.minimum(np.searchsorted(ROW_HP, hp), _TOP)
+    tier = np.searchsorted(_TIER_BOUNDS, raw_idx)
+    mult = np.where(immune > 0, _IMMUNE_MULT[tier], np.where(resist >= 2, _RESIST_MULT[tier], 1.0))
+    hp_idx = np.minimum(np.searchsorted(ROW_HP, hp * mult), _TOP)
+    eff_ac = ac + np.select([saves >= 5, saves >= 3], [4, 2], 0)
+    defensive = np.clip(hp_idx + np.fix((eff_ac - ROW_AC[hp_idx]) / 2), 0, _TOP)
+
+    dmg_idx = np.minimum(np.searchsorted(ROW_DMG, dpr), _TOP)
+    to_hit_adj = np.where(~np.isnan(attack), np.fix((attack - ROW_ATK[dmg_idx]) / 2),
+                          np.where(~np.isnan(dc), np.fix((dc - ROW_DC[dmg_idx]) / 2), 0))
+    offensive = np.clip(dmg_idx + np.nan_to_num(to_hit_adj), 0, _TOP)
+    offensive = np.where(dpr > 0, offensive, defensive)  # nothing parsed: go by defense alone
+    estimated = np.floor((defensive + offensive) / 2 + 0.5)
+    return {"defensive": defensive.astype(int), "offensive": offensive.astype(int), "estimated": estimated.astype(int)}
+
+def estimate_one(data: dict[str, Any]) -> dict[str, Any]:
+    f = creature_features(data)
+    est = estimate(np.array([f]))
+    return {
+        "stated_cr": data.get("challenge_rating"),
+        "estimated_cr": CRS[est["estimated"][0]],
+        "defensive_cr": CRS[est["defensive"][0]],
+        "offensive_cr": CRS[est["offensive"][0]],
+        "damage_per_round": round(f[5], 1),
+        "attack_bonus": None if np.isnan(f[6]) else int(f[6]),
+        "save_dc": None if np.isnan(f[7]) else int(f[7]),
+    }
+
+def audit(rows, threshold: int = 2, limit: int = 100) -> dict[str, Any]:
+    """Audit (id, name, creature_json text) rows: creatures whose stated CR is
+    `threshold` or more table rows away from the estimate, worst first."""
+    t0 = time.perf_counter()
+    ids: list[int] = []
+    names: list[str] = []
+    feats: list[tuple[float, ...]] = []
+    unreadable = 0
+    for item_id, name, doc in rows:
+        try:
+            feats.append(creature_features(json.loads(doc)))
+        except (ValueError, TypeError, AttributeError):
+            unreadable += 1
+            continue
+        ids.append(item_id)
+        names.append(name)
+    parsed = time.perf_counter()
+    if not feats:
+        return {"audited": 0, "unreadable": unreadable, "flagged": 0, "outliers": []}
+    f = np.array(feats)
+    est = estimate(f)
+    stated = f[:, 8]
+    delta = est["estimated"] - stated
+    flagged = np.flatnonzero(np.abs(np.nan_to_num(delta)) >= threshold)
+    worst = flagged[np.argsort(-np.abs(delta[flagged]), kind="stable")][:limit]
+    outliers = [{
+        "id": ids[i], "name": names[i], "stated_cr": CRS[int(stated[i])], "estimated_cr": CRS[est["estimated"][i]],
+        "defensive_cr": CRS[est["defensive"][i]], "offensive_cr": CRS[est["offensive"][i]], "delta": int(delta[i]),
+        "hit_points": int(f[i, 0]), "armor_class": int(f[i, 1]), "damage_per_round": round(float(f[i, 5]), 1),
+    } for i in worst]
+    done = time.perf_counter()
+    return {
+        "audited": len(ids), "unreadable": unreadable, "unknown_stated_cr": int(np.isnan(stated).sum()),
+        "no_damage_parsed": int((f[:, 5] <= 0).sum()), "flagged": int(flagged.size),
+        "overrated": int((delta[flagged] < 0).sum()), "underrated": int((delta[flagged] > 0).sum()),
+        "threshold": threshold, "outliers": outliers,
+        "seconds": {"parse": round(parsed - t0, 3), "estimate": round(done - parsed, 3)},
+    }
+
+def library_rows():
+    """(id, name, creature_json) for every saved creature, documents decoded."""
+    from .database import connection
+    from .documents import decode_doc
+    for r in connection().execute("SELECT id, name, creature_json FROM creature_library"):
+        yield r["id"], r["name"], decode_doc("creature_json", r["creature_json"])
+
+def audit_library(threshold: int = 2, limit: int = 100) -> dict[str, Any]:
+    return audit(library_rows(), threshold, limit)
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Audit stated CRs in the creature library")
+    ap.add_argument("--threshold", type=int, default=2, help="flag when stated and estimated CR are this many rows apart")
+    ap.add_argument("--limit", type=int, default=20)
+    args = ap.parse_args()
+    t0 = time.perf_counter()
+    result = audit_library(args.threshold, args.limit)
+    print(f"audited {result['audited']} creatures in {time.perf_counter() - t0:.2f}s: {result['flagged']} flagged "
+          f"({result.get('overrated', 0)} overrated, {result.get('underrated', 0)} underrated)")
+    for o in result["outliers"]:
+        print(f"  #{o['id']:<6} {o['name'][:30]:<30} stated {o['stated_cr']:>4}  estimated {o['estimated_cr']:>4} "
+              f"(def {o['defensive_cr']}, off {o['offensive_cr']})  HP {o['hit_points']} AC {o['armor_class']} DPR {o['damage_per_round']}")
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,310 @@
+import asyncio
+import base64
+import functools
+import hashlib
+import json
 import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from .config import DB_PATH, logger
-from typing import Any
+from .config import (
+    DB_PATH, DB_POOL_SIZE, DB_SYNCHRONOUS, DB_CACHE_SIZE_MB, DB_MMAP_SIZE_MB, DB_BUSY_TIMEOUT, logger,
+)
+from .documents import decode_doc, decode_row, encode_row
+from typing import Any, Callable, TypeVar
 
-def get_db_connection():
-    con = sqlite3.connect(DB_PATH)
+T = TypeVar("T")
+
+def get_db_connection() -> sqlite3.Connection:
+    """Open a new tuned connection owned by the caller (startup, CLI tools)."""
+    con = sqlite3.connect(DB_PATH, timeout=DB_BUSY_TIMEOUT, cached_statements=256, check_same_thread=False)
     con.row_factory = sqlite3.Row
+    con.execute("PRAGMA journal_mode = WAL")
+    con.execute(f"PRAGMA synchronous = {DB_SYNCHRONOUS}")
+    con.execute(f"PRAGMA cache_size = -{DB_CACHE_SIZE_MB * 1024}")
+    con.execute(f"PRAGMA mmap_size = {DB_MMAP_SIZE_MB * 1024 * 1024}")
+    con.execute("PRAGMA temp_store = MEMORY")
     return con
 
+# One long-lived connection per thread; the API's DB work runs on _db_executor
+# threads, so connections (and their statement caches) are reused across requests.
+_local = threading.local()
+_connections: list[sqlite3.Connection] = []
+_connections_lock = threading.Lock()
+_db_executor: ThreadPoolExecutor | None = None
+
+def connection() -> sqlite3.Connection:
+    con = getattr(_local, "con", None)
+    if con is None:
+        con = _local.con = get_db_connection()
+        with _connections_lock:
+            _connections.append(con)
+    return con
+
+async def run_db(fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Run a blocking database function on the DB thread pool, off the event loop."""
+    global _db_executor
+    if _db_executor is None:
+        _db_executor = ThreadPoolExecutor(max_workers=max(1, DB_POOL_SIZE), thread_name_prefix="db")
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_db_executor, functools.partial(fn, *args, **kwargs))
+
+def close_db() -> None:
+    global _db_executor
+    pool, _db_executor = _db_executor, None
+    if pool is not None:
+        pool.shutdown(wait=True)
+    with _connections_lock:
+        while _connections:
+            try:
+                _connections.pop().close()
+            except sqlite3.Error:
+                pass
+    _local.__dict__.clear()
+
+# Summary fields copied out of each table's JSON document into indexed columns
+# so list endpoints can return them without loading the documents:
+# table -> (document column, {column: (SQL type, default)})
+SUMMARY_COLUMNS: dict[str, tuple[str, dict[str, tuple[str, Any]]]] = {
+    "library": ("draft_json", {"cls": ("TEXT", ""), "race": ("TEXT", "")}),
+    "item_library": ("item_json", {"item_type": ("TEXT", ""), "rarity": ("TEXT", "")}),
+    "spell_library": ("spell_json", {"level": ("INTEGER", 0), "school": ("TEXT", "")}),
+    "creature_library": ("creature_json", {"size": ("TEXT", ""), "creature_type": ("TEXT", ""), "challenge_rating": ("TEXT", "")}),
+}
+
+def summary_fields(table_name: str, document: str | None) -> dict[str, Any]:
+    """Extract a table's summary column values from its JSON document."""
+    doc_col, columns = SUMMARY_COLUMNS[table_name]
+    document = decode_doc(doc_col, document)
+    try:
+        data = json.loads(document) if document else {}
+        if not isinstance(data, dict):
+            data = {}
+    except ValueError:
+        data = {}
+    out: dict[str, Any] = {}
+    for col, (sql_type, default) in columns.items():
+        value = data.get(col)
+        if value is None:
+            out[col] = default
+        elif sql_type == "INTEGER":
+            try:
+                out[col] = int(value)
+            except (TypeError, ValueError):
+                out[col] = default
+        else:
+            out[col] = str(value)
+    return out
+
+# Full-text search: one FTS5 index over every library. Each entry's rowid is
+# id * 8 + kind code, so save/delete touch the index by rowid.
+# table -> (search type, kind code, {document column: [JSON keys indexed as body text]})
+SEARCH_SOURCES: dict[str, tuple[str, int, dict[str, list[str]]]] = {
+    "library": ("character", 1, {
+        "draft_json": ["cls", "race", "background"],
+        "backstory_json": ["summary", "prose_markdown", "traits", "ideals", "bonds", "flaws", "hooks"],
+    }),
+    "item_library": ("item", 2, {"item_json": ["item_type", "rarity", "description", "properties"]}),
+    "spell_library": ("spell", 3, {"spell_json": ["school", "classes", "description", "damage"]}),
+    "creature_library": ("creature", 4, {"creature_json": ["creature_type", "description", "traits", "actions", "spells"]}),
+    "progression_library": ("progression", 5, {"plan_json": ["class_index", "notes_markdown"]}),
+}
+SEARCH_TYPES = {kind: table for table, (kind, _, _) in SEARCH_SOURCES.items()}
+
+def search_rowid(table_name: str, item_id: int) -> int:
+    return item_id * 8 + SEARCH_SOURCES[table_name][1]
+
+def search_body(table_name: str, row: dict[str, Any]) -> str:
+    """Concatenate the indexed text fields of a row's JSON documents."""
+    parts: list[str] = []
+    for doc_col, keys in SEARCH_SOURCES[table_name][2].items():
+        try:
+            data = json.loads(decode_doc(doc_col, row.get(doc_col)) or "null")
+        except ValueError:
+            continue
+        if not isinstance(data, dict):
+            continue
+        for key in keys:
+            value = data.get(key)
+            if isinstance(value, list):
+                parts.extend(str(v) for v in value if v)
+            elif value not in (None, ""):
+                parts.append(str(value))
+    return "\n".join(parts)
+
+_SEARCH_INSERT = "INSERT OR REPLACE INTO search_index (rowid, kind, ref_id, name, body) VALUES (?, ?, ?, ?, ?)"
+
+def _search_entry(table_name: str, item_id: int, row: dict[str, Any]) -> tuple:
+    return (search_rowid(table_name, item_id), SEARCH_SOURCES[table_name][0], item_id, row.get("name") or "", search_body(table_name, row))
+
+def _index_search(con: sqlite3.Connection, table_name: str, item_id: int, row: dict[str, Any]) -> None:
+    if table_name not in SEARCH_SOURCES:
+        return
+    con.execute(_SEARCH_INSERT, _search_entry(table_name, item_id, row))
+
+def rebuild_search_index(con: sqlite3.Connection | None = None) -> dict[str, int]:
+    """Re-index every library row; returns rows indexed per search type."""
+    own = con is None
+    con = con or get_db_connection()
+    counts: dict[str, int] = {}
+    try:
+        con.execute("DELETE FROM search_index")
+        for table, (kind, _, docs) in SEARCH_SOURCES.items():
+            cols = ", ".join(["id", "name", *docs])
+            n = 0
+            for r in con.execute(f"SELECT {cols} FROM {table}"):
+                _index_search(con, table, r["id"], dict(r))
+                n += 1
+            counts[kind] = n
+        con.execute("INSERT INTO search_index(search_index) VALUES ('optimize')")
+        con.commit()
+    finally:
+        if own:
+            con.close()
+    return counts
+
+def _ensure_search_index(con: sqlite3.Connection) -> None:
+    exists = con.execute("SELECT 1 FROM sqlite_master WHERE name = 'search_index'").fetchone()
+    if exists:
+        return
+    con.execute(
+        "CREATE VIRTUAL TABLE search_index USING fts5("
+        "kind UNINDEXED, ref_id UNINDEXED, name, body, tokenize = 'porter unicode61')"
+    )
+    counts = rebuild_search_index(con)
+    logger.info("Created search_index (indexed %d rows).", sum(counts.values()))
+
+# Portraits live in a content-addressed blob table (deduplicated by sha256);
+# library rows only carry the hash. Blobs are dropped with their last reference.
+PORTRAIT_TABLES = ("library", "creature_library")
+
+def blob_digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+def put_blob(con: sqlite3.Connection, data: bytes, mime: str = "image/png") -> str:
+    digest = blob_digest(data)
+    con.execute(
+        "INSERT OR IGNORE INTO blobs (hash, size, mime, data, created_at) VALUES (?, ?, ?, ?, ?)",
+        (digest, len(data), mime, data, datetime.utcnow().isoformat(timespec="seconds") + "Z"),
+    )
+    return digest
+
+def _release_blob(con: sqlite3.Connection, digest: str | None) -> None:
+    if not digest:
+        return
+    for table in PORTRAIT_TABLES:
+        if con.execute(f"SELECT 1 FROM {table} WHERE portrait_hash = ? LIMIT 1", (digest,)).fetchone():
+            return
+    con.execute("DELETE FROM blobs WHERE hash = ?", (digest,))
+    con.execute("DELETE FROM thumbnails WHERE source_hash = ?", (digest,))
+
+def blob_info(digest: str) -> sqlite3.Row | None:
+    return connection().execute("SELECT rowid, hash, size, mime FROM blobs WHERE hash = ?", (digest,)).fetchone()
+
+def read_blob(rowid: int, offset: int, length: int) -> bytes:
+    """Incremental read of part of a blob, without loading the rest."""
+    with connection().blobopen("blobs", "data", rowid, readonly=True) as blob:
+        blob.seek(offset)
+        return blob.read(length)
+
+def blob_bytes(digest: str) -> bytes | None:
+    row = connection().execute("SELECT data FROM blobs WHERE hash = ?", (digest,)).fetchone()
+    return row["data"] if row else None
+
+# Thumbnails are keyed by the source portrait's hash, so they are shared by
+# every row using that portrait and go away with it.
+def put_thumbnails(digest: str, thumbs: dict[int, bytes], mime: str = "image/webp") -> None:
+    con = connection()
+    with con:
+        if not con.execute("SELECT 1 FROM blobs WHERE hash = ?", (digest,)).fetchone():
+            return  # portrait deleted while the thumbnails were rendering
+        con.executemany(
+            "INSERT OR REPLACE INTO thumbnails (source_hash, size, mime, data) VALUES (?, ?, ?, ?)",
+            [(digest, size, mime, data) for size, data in thumbs.items()],
+        )
+
+def get_thumbnail(digest: str, size: int) -> sqlite3.Row | None:
+    return connection().execute(
+        "SELECT source_hash, size, mime, data FROM thumbnails WHERE source_hash = ? AND size = ?", (digest, size)
+    ).fetchone()
+
+def portraits_missing_thumbnails(sizes: tuple[int, ...]) -> list[str]:
+    """Hashes of referenced portraits lacking at least one of `sizes`."""
+    refs = " UNION ".join(f"SELECT portrait_hash AS h FROM {t} WHERE portrait_hash IS NOT NULL" for t in PORTRAIT_TABLES)
+    marks = ", ".join("?" * len(sizes))
+    rows = connection().execute(
+        f"SELECT h FROM ({refs}) WHERE (SELECT COUNT(*) FROM thumbnails WHERE source_hash = h AND size IN ({marks})) < ?",
+        (*sizes, len(sizes)),
+    ).fetchall()
+    return [r["h"] for r in rows]
+
+def portrait_hash(table_name: str, item_id: int) -> str | None:
+    row = connection().execute(f"SELECT portrait_hash FROM {table_name} WHERE id = ?", (item_id,)).fetchone()
+    return row["portrait_hash"] if row else None
+
+def _ensure_blob_store(con: sqlite3.Connection) -> None:
+    """Create the blob table and move inline portrait_png BLOBs into it."""
+    con.execute("""
+    CREATE TABLE IF NOT EXISTS blobs (
+      hash TEXT PRIMARY KEY,
+      size INTEGER NOT NULL,
+      mime TEXT NOT NULL,
+      data BLOB NOT NULL,
+      created_at TEXT NOT NULL
+    )
+    """)
+    con.execute("""
+    CREATE TABLE IF NOT EXISTS thumbnails (
+      source_hash TEXT NOT NULL,
+      size INTEGER NOT NULL,
+      mime TEXT NOT NULL,
+      data BLOB NOT NULL,
+      PRIMARY KEY (source_hash, size)
+    )
+    """)
+    for table in PORTRAIT_TABLES:
+        existing = {r["name"] for r in con.execute(f"PRAGMA table_info({table})")}
+        if "portrait_hash" not in existing:
+            con.execute(f"ALTER TABLE {table} ADD COLUMN portrait_hash TEXT")
+        con.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_portrait_hash ON {table}(portrait_hash)")
+        ids = [r["id"] for r in con.execute(f"SELECT id FROM {table} WHERE portrait_png IS NOT NULL")]
+        for item_id in ids:
+            with con:
+                png = con.execute(f"SELECT portrait_png FROM {table} WHERE id = ?", (item_id,)).fetchone()[0]
+                digest = put_blob(con, png)
+                con.execute(f"UPDATE {table} SET portrait_hash = ?, portrait_png = NULL WHERE id = ?", (digest, item_id))
+        if ids:
+            logger.info("Moved %d portraits from %s into the blob store (run VACUUM to reclaim space).", len(ids), table)
+
+LIBRARY_TABLES = ("library", "item_library", "spell_library", "progression_library", "creature_library")
+
+def _ensure_list_indexes(con: sqlite3.Connection) -> None:
+    """Composite indexes that back keyset pagination in list_items."""
+    for table in LIBRARY_TABLES:
+        con.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_created_id ON {table}(created_at, id)")
+        con.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_name_id ON {table}(name, id)")
+
+def _ensure_summary_columns(con: sqlite3.Connection) -> None:
+    """Add, index and backfill summary columns on older DBs."""
+    for table, (doc_col, columns) in SUMMARY_COLUMNS.items():
+        existing = {r["name"] for r in con.execute(f"PRAGMA table_info({table})")}
+        added = [c for c in columns if c not in existing]
+        for col in added:
+            con.execute(f"ALTER TABLE {table} ADD COLUMN {col} {columns[col][0]}")
+        for col in columns:
+            con.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_{col} ON {table}({col})")
+        if not added:
+            continue
+        rows = con.execute(f"SELECT id, {doc_col} FROM {table}").fetchall()
+        assignments = ", ".join(f"{c} = ?" for c in columns)
+        con.executemany(
+            f"UPDATE {table} SET {assignments} WHERE id = ?",
+            [(*summary_fields(table, r[doc_col]).values(), r["id"]) for r in rows],
+        )
+        con.commit()
+        logger.info("Added summary columns %s to %s (backfilled %d rows).", ", ".join(added), table, len(rows))
+
 def init_db():
     con = get_db_connection()
     cur = con.cursor()
@@ -86,6 +383,10 @@ def init_db():
         logger.info("Added portrait_png column to creature_library table.")
     except sqlite3.OperationalError:
         pass # column already exists
+    _ensure_summary_columns(con)
+    _ensure_list_indexes(con)
+    _ensure_search_index(con)
+    _ensure_blob_store(con)
     con.commit()
     con.close()
     logger.info("Database initialized.")
@@ -95,54 +396,188 @@ init_db()
 
 # Generic CRUD operations
 def create_item(table_name: str, item_data: dict) -> dict:
-    con = get_db_connection()
-    cur = con.cursor()
     created_at = datetime.utcnow().isoformat(timespec="seconds") + "Z"
     item_data["created_at"] = created_at
+    if table_name in SUMMARY_COLUMNS:
+        doc_col, _ = SUMMARY_COLUMNS[table_name]
+        for col, value in summary_fields(table_name, item_data.get(doc_col)).items():
+            item_data.setdefault(col, value)
+    portrait = item_data.pop("portrait_png", None) if table_name in PORTRAIT_TABLES else None
 
-    columns = ", ".join(item_data.keys())
-    placeholders = ", ".join(["?"] * len(item_data))
-    query = f"INSERT INTO {table_name} ({columns}) VALUES ({placeholders})"
-    cur.execute(query, tuple(item_data.values()))
-    con.commit()
-    new_id = cur.lastrowid
-    con.close()
+    con = connection()
+    with con:
+        if portrait:
+            item_data["portrait_hash"] = put_blob(con, portrait)
+        columns = ", ".join(item_data.keys())
+        placeholders = ", ".join(["?"] * len(item_data))
+        cur = con.execute(f"INSERT INTO {table_name} ({columns}) VALUES ({placeholders})", tuple(encode_row(table_name, item_data).values()))
+        new_id = cur.lastrowid
+        _index_search(con, table_name, new_id, item_data)
+    _invalidate_totals(table_name)
     return {"id": new_id, "name": item_data.get("name"), "created_at": created_at}
 
-def get_item(table_name: str, item_id: int) -> sqlite3.Row | None:
-    con = get_db_connection()
-    row = con.execute(f"SELECT * FROM {table_name} WHERE id = ?", (item_id,)).fetchone()
-    con.close()
-    return row
+def insert_rows(table_name: str, rows: list[dict[str, Any]]) -> list[int]:
+    """Bulk create_item for rows with the same keys: one write transaction,
+    ids assigned up front, and one executemany each for the blobs, the table
+    and the search index. `created_at` is kept when the row carries one."""
+    if not rows:
+        return []
+    now = datetime.utcnow().isoformat(timespec="seconds") + "Z"
+    doc_col = SUMMARY_COLUMNS[table_name][0] if table_name in SUMMARY_COLUMNS else None
+    blobs: list[tuple] = []
+    for row in rows:
+        if not row.get("created_at"):
+            row["created_at"] = now
+        if doc_col:
+            row.update(summary_fields(table_name, row.get(doc_col)))
+        if table_name in PORTRAIT_TABLES:
+            png = row.pop("portrait_png", None)
+            row["portrait_hash"] = blob_digest(png) if png else None
+            if png:
+                blobs.append((row["portrait_hash"], len(png), "image/png", png, now))
+    columns = ["id", *rows[0]]
+    insert = f"INSERT INTO {table_name} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
 
-def list_items(table_name: str, limit: int = 10, page: int = 1, search: str | None = None, sort: str = "created_desc") -> dict[str, Any]:
-    con = get_db_connection()
-    q_base = f"FROM {table_name}"
+    con = connection()
+    with con:
+        con.execute("BEGIN IMMEDIATE")  # hold the write lock while picking ids
+        start = con.execute(
+            f"SELECT MAX(COALESCE((SELECT seq FROM sqlite_sequence WHERE name = ?), 0), "
+            f"COALESCE((SELECT MAX(id) FROM {table_name}), 0))", (table_name,)
+        ).fetchone()[0]
+        ids = list(range(start + 1, start + 1 + len(rows)))
+        if blobs:
+            con.executemany("INSERT OR IGNORE INTO blobs (hash, size, mime, data, created_at) VALUES (?, ?, ?, ?, ?)", blobs)
+        stored = (encode_row(table_name, row) for row in rows)
+        con.executemany(insert, [(item_id, *(row[c] for c in columns[1:])) for item_id, row in zip(ids, stored)])
+        if table_name in SEARCH_SOURCES:
+            con.executemany(_SEARCH_INSERT, [_search_entry(table_name, item_id, row) for item_id, row in zip(ids, rows)])
+    _invalidate_totals(table_name)
+    return ids
+
+def get_item(table_name: str, item_id: int) -> dict[str, Any] | None:
+    row = connection().execute(f"SELECT * FROM {table_name} WHERE id = ?", (item_id,)).fetchone()
+    return decode_row(table_name, row) if row else None
+
+class InvalidCursor(ValueError):
+    pass
+
+# sort name -> (column, descending)
+SORTS = {
+    "name_asc": ("name", False),
+    "name_desc": ("name", True),
+    "created_asc": ("created_at", False),
+    "created_desc": ("created_at", True),
+}
+
+def encode_cursor(sort: str, value: Any, row_id: int) -> str:
+    raw = json.dumps([sort, value, row_id], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str, sort: str) -> tuple[Any, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        c_sort, value, row_id = json.loads(raw)
+        row_id = int(row_id)
+    except Exception:
+        raise InvalidCursor("malformed cursor")
+    if c_sort != sort:
+        raise InvalidCursor(f"cursor was issued for sort={c_sort}, not sort={sort}")
+    return value, row_id
+
+# sort columns that may hold NULL (created_at is NOT NULL)
+NULLABLE_SORT_COLUMNS = {"name"}
+
+def _keyset_phases(column: str, desc: bool, value: Any, last_id: int) -> list[tuple[str, list[Any]]]:
+    """(condition, params) for the rows strictly after (value, id) in ORDER BY column, id
+    (both ASC or both DESC), as consecutive queries that are each a plain index range so
+    SQLite seeks instead of scanning. NULL names sort first ascending / last descending,
+    as SQLite orders them, so they are paged in their own phase."""
+    op = "<" if desc else ">"
+    if value is None:
+        phases = [(f"{column} IS NULL AND id {op} ?", [last_id])]
+        return phases if desc else phases + [(f"{column} IS NOT NULL", [])]
+    phases = [(f"({column}, id) {op} (?, ?)", [value, last_id])]
+    if desc and column in NULLABLE_SORT_COLUMNS:
+        phases.append((f"{column} IS NULL", []))
+    return phases
+
+# COUNT(*) results per (table, search); dropped on every write to the table
+_TOTALS_TTL = 60.0
+_totals: dict[tuple[str, str | None], tuple[float, int]] = {}
+_totals_lock = threading.Lock()
+
+def _invalidate_totals(table_name: str) -> None:
+    with _totals_lock:
+        for key in [k for k in _totals if k[0] == table_name]:
+            del _totals[key]
+
+def _count(con: sqlite3.Connection, table_name: str, where: str, params: list[object], search: str | None) -> int:
+    key = (table_name, search)
+    now = time.monotonic()
+    with _totals_lock:
+        hit = _totals.get(key)
+    if hit is not None and now - hit[0] < _TOTALS_TTL:
+        return hit[1]
+    total = con.execute(f"SELECT COUNT(*) FROM {table_name}{where}", params).fetchone()[0]
+    with _totals_lock:
+        _totals[key] = (now, total)
+    return total
+
+def list_items(table_name: str, limit: int = 10, page: int = 1, search: str | None = None, sort: str = "created_desc",
+               cursor: str | None = None, include_total: bool = True) -> dict[str, Any]:
+    """One page of a library table, newest first by default.
+    With `cursor` (the `next_cursor` of the previous page) the page is found by
+    keyset on the (created_at, id) / (name, id) indexes and `page` is ignored;
+    otherwise `page` selects an OFFSET page as before. `total` is cached per
+    search and omitted (None) when `include_total` is false.
+    """
+    if sort not in SORTS:
+        sort = "created_desc"
+    column, desc = SORTS[sort]
+    direction = "DESC" if desc else "ASC"
+    con = connection()
+    conditions: list[str] = []
     params: list[object] = []
     if search:
-        q_base += " WHERE name LIKE ?"
+        conditions.append("name LIKE ?")
         params.append(f"%{search}%")
-    total = con.execute(f"SELECT COUNT(*) {q_base}", params).fetchone()[0]
-    sort_map = {
-        "name_asc": "name ASC",
-        "name_desc": "name DESC",
-        "created_asc": "created_at ASC",
-        "created_desc": "created_at DESC",
-    }
-    order_sql = sort_map.get(sort, "created_at DESC")
-    offset = max(0, (page-1) * limit)
-    rows = con.execute(
-        f"SELECT id, name, created_at {q_base} ORDER BY {order_sql} LIMIT ? OFFSET ?",
-        (*params, limit, offset)
-    ).fetchall()
-    con.close()
-    return {"items": [dict(r) for r in rows], "total": total}
+    where = (" WHERE " + " AND ".join(conditions)) if conditions else ""
+    total = _count(con, table_name, where, params, search) if include_total else None
+    summary = "".join(f", {c}" for c in SUMMARY_COLUMNS.get(table_name, ("", {}))[1])
+    if table_name in PORTRAIT_TABLES:
+        summary += ", portrait_hash"
+    select = f"SELECT id, name, created_at{summary} FROM {table_name}"
+    order = f" ORDER BY {column} {direction}, id {direction} LIMIT ?"
+    # one extra row tells us whether another page follows
+    if cursor:
+        value, last_id = decode_cursor(cursor, sort)
+        rows = []
+        for condition, extra in _keyset_phases(column, desc, value, last_id):
+            phase_where = " WHERE " + " AND ".join(conditions + [condition])
+            rows += con.execute(select + phase_where + order, (*params, *extra, limit + 1 - len(rows))).fetchall()
+            if len(rows) > limit:
+                break
+    else:
+        rows = con.execute(select + where + order + " OFFSET ?", (*params, limit + 1, max(0, (page-1) * limit))).fetchall()
+    items = [dict(r) for r in rows[:limit]]
+    next_cursor = None
+    if len(rows) > limit and items:
+        last = items[-1]
+        next_cursor = encode_cursor(sort, last[column], last["id"])
+    return {"items": items, "total": total, "next_cursor": next_cursor}
 
 def delete_item(table_name: str, item_id: int) -> int:
-    con = get_db_connection()
-    cur = con.cursor()
-    cur.execute(f"DELETE FROM {table_name} WHERE id = ?", (item_id,))
-    con.commit()
-    deleted = cur.rowcount
-    con.close()
+    con = connection()
+    with con:
+        digest = None
+        if table_name in PORTRAIT_TABLES:
+            digest = portrait_hash(table_name, item_id)
+        deleted = con.execute(f"DELETE FROM {table_name} WHERE id = ?", (item_id,)).rowcount
+        if deleted and table_name in SEARCH_SOURCES:
+            con.execute("DELETE FROM search_index WHERE rowid = ?", (search_rowid(table_name, item_id),))
+        if deleted:
+            _release_blob(con, digest)
+    if deleted:
+        _invalidate_totals(table_name)
     return deleted
@@ -0,0 +1,236 @@
+"""Dice expressions: parse once, then exact distributions and batch sampling.
+
+Accepts the strings used across the data model -- `Creature.hit_dice`
+("5d8 + 10"), `Spell.damage` ("3d10 lightning (half on save)"),
+`MagicItem.damage` ("1d8 slashing"), or a bare hit die ("d10"). An expression
+is a sum of dice terms (`NdM`, `dM`, `d%`) and integer constants joined by
+`+`, `-` or "plus". A damage type after a term applies to it and to the
+untyped terms just before it, so "2d6 + 1d4 fire" is all fire while
+"2d6 slashing + 1d4 fire" is split. Stat-block averages are read for their
+dice ("10 (3d6) piercing" is 3d6 piercing); other parenthesised notes and the
+word "damage" are ignored.
+
+    compile_dice("2d6 slashing + 1d4 fire").stats()
+"""
+import re
+from dataclasses import dataclass
+from functools import cached_property, lru_cache
+from typing import Any, Iterable
+import numpy as np
+
+MAX_DICE = 1000          # dice per expression
+MAX_SIDES = 1000
+MAX_SPAN = 1_000_000     # max - min of an expression
+
+class DiceError(ValueError):
+    pass
+
+@dataclass(frozen=True)
+class Term:
+    count: int              # number of dice, or the value of a constant
+    sides: int              # 0 for a constant
+    sign: int               # +1 or -1
+    damage_type: str | None = None
+
+    @property
+    def mean(self) -> float:
+        return self.sign * (self.count if not self.sides else self.count * (self.sides + 1) / 2)
+
+    @property
+    def variance(self) -> float:
+        return 0.0 if not self.sides else self.count * (self.sides ** 2 - 1) / 12
+
+    @property
+    def bounds(self) -> tuple[int, int]:
+        low, high = (self.count, self.count * self.sides) if self.sides else (self.count, self.count)
+        return (low, high) if self.sign > 0 else (-high, -low)
+
+    def __str__(self) -> str:
+        return str(self.count) if not self.sides else f"{self.count}d{self.sides}"
+
+def _fft_convolve(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    if min(a.size, b.size) < 64:
+        return np.convolve(a, b)
+    n = a.size + b.size - 1
+    size = 1 << (n - 1).bit_length()  # power-of-two FFT length
+    out = np.fft.irfft(np.fft.rfft(a, size) * np.fft.rfft(b, size), size)[:n]
+    np.clip(out, 0.0, None, out=out)
+    return out / out.sum()
+
+@lru_cache(maxsize=256)
+def _dice_pmf(count: int, sides: int) -> np.ndarray:
+    """P(total = count + i) for the sum of `count` d`sides`, by convolution (binary powers)."""
+    result = np.ones(1)
+    base = np.full(sides, 1.0 / sides)
+    while count:
+        if count & 1:
+            result = _fft_convolve(result, base)
+        count >>= 1
+        if count:
+            base = _fft_convolve(base, base)
+    result.setflags(write=False)
+    return result
+
+@dataclass(frozen=True)
+class DiceExpr:
+    terms: tuple[Term, ...]
+
+    def __str__(self) -> str:
+        """Canonical form, e.g. "2d6 + 3 slashing - 1d4 fire"."""
+        out = ""
+        for i, t in enumerate(self.terms):
+            if i:
+                out += " - " if t.sign < 0 else " + "
+            elif t.sign < 0:
+                out += "-"
+            out += str(t)
+            nxt = self.terms[i + 1] if i + 1 < len(self.terms) else None
+            if t.damage_type and (nxt is None or nxt.damage_type != t.damage_type):
+                out += f" {t.damage_type}"
+        return out
+
+    @property
+    def min(self) -> int:
+        return sum(t.bounds[0] for t in self.terms)
+
+    @property
+    def max(self) -> int:
+        return sum(t.bounds[1] for t in self.terms)
+
+    @property
+    def mean(self) -> float:
+        return sum(t.mean for t in self.terms)
+
+    @property
+    def variance(self) -> float:
+        return sum(t.variance for t in self.terms)
+
+    @cached_property
+    def pmf(self) -> np.ndarray:
+        """P(total = self.min + i), exact up to float rounding."""
+        out = np.ones(1)
+        for t in self.terms:
+            if t.sides:
+                p = _dice_pmf(t.count, t.sides)
+                out = _fft_convolve(out, p if t.sign > 0 else p[::-1])
+        out.setflags(write=False)
+        return out
+
+    @cached_property
+    def cdf(self) -> np.ndarray:
+        out = np.cumsum(self.pmf)
+        out.setflags(write=False)
+        return out
+
+    def percentile(self, q: float) -> int:
+        """Smallest total t with P(X <= t) >= q/100."""
+        i = int(np.searchsorted(self.cdf, q / 100 - 1e-12))
+        return self.min + min(i, self.pmf.size - 1)
+
+    def by_type(self) -> dict[str, dict[str, float]]:
+        out: dict[str, dict[str, float]] = {}
+        for t in self.terms:
+            entry = out.setdefault(t.damage_type or "untyped", {"mean": 0.0, "variance": 0.0})
+            entry["mean"] += t.mean
+            entry["variance"] += t.variance
+        return out
+
+    def sample(self, n: int, rng: np.random.Generator | None = None, chunk: int = 1 << 22) -> np.ndarray:
+        """`n` independent totals (int64), rolled in vectorized blocks."""
+        rng = rng or np.random.default_rng()
+        out = np.full(n, sum(t.sign * t.count for t in self.terms if not t.sides), dtype=np.int64)
+        for t in self.terms:
+            if not t.sides:
+                continue
+            rows = max(1, chunk // t.count)
+            for start in range(0, n, rows):
+                m = min(rows, n - start)
+                rolls = rng.integers(1, t.sides + 1, size=(m, t.count), dtype=np.int32).sum(axis=1, dtype=np.int64)
+                out[start:start + m] += t.sign * rolls
+        return out
+
+    def stats(self, percentiles: Iterable[float] = (5, 25, 50, 75, 95)) -> dict[str, Any]:
+        return {
+            "expression": str(self),
+            "min": self.min,
+            "max": self.max,
+            "mean": round(self.mean, 6),
+            "variance": round(self.variance, 6),
+            "sd": round(self.variance ** 0.5, 6),
+            "percentiles": {f"{q:g}": self.percentile(q) for q in percentiles},
+            "by_type": self.by_type(),
+        }
+
+_TOKEN = re.compile(r"\s*(?:(?P<dice>(?P<n>\d*)d(?P<m>\d+|%))(?!\w)|(?P<num>\d+)(?!\w)|(?P<op>[+\-−])|(?P<word>[a-z]+))")
+
+@lru_cache(maxsize=1024)
+def _compile(text: str) -> DiceExpr:
+    pos, sign, expect_operand = 0, 1, True
+    terms: list[Term] = []
+    pending = 0  # untyped terms waiting for a damage type
+    while pos < len(text):
+        m = _TOKEN.match(text, pos)
+        if not m or m.end() == pos:
+            if text[pos:].strip():
+                raise DiceError(f"unexpected {text[pos:].strip()[:20]!r}")
+            break
+        pos = m.end()
+        if m["op"] or m["word"] == "plus":
+            if not expect_operand:
+                sign, expect_operand = 1, True
+            if m["op"] in ("-", "−"):
+                sign = -sign
+            continue
+        if m["dice"] or m["num"]:
+            if not expect_operand:
+                raise DiceError("missing operator between terms")
+            if m["dice"]:
+                count = int(m["n"] or 1)
+                sides = 100 if m["m"] == "%" else int(m["m"])
+                if count < 1 or sides < 1:
+                    raise DiceError("dice need at least one die of at least one side")
+                terms.append(Term(count, sides, sign))
+            else:
+                terms.append(Term(int(m["num"]), 0, sign))
+            pending += 1
+            sign, expect_operand = 1, False
+            continue
+        if m["word"] == "damage":
+            continue
+        if expect_operand or not pending:
+            raise DiceError(f"unexpected {m['word']!r}")
+        label = m["word"]
+        for i in range(len(terms) - pending, len(terms)):
+            terms[i] = Term(terms[i].count, terms[i].sides, terms[i].sign, label)
+        pending = 0
+    if not terms:
+        raise DiceError("no dice expression")
+    if expect_operand:
+        raise DiceError("expression ends with an operator")
+    expr = DiceExpr(tuple(terms))
+    if sum(t.count for t in terms if t.sides) > MAX_DICE or any(t.sides > MAX_SIDES for t in terms):
+        raise DiceError(f"at most {MAX_DICE} dice of at most {MAX_SIDES} sides")
+    if expr.max - expr.min > MAX_SPAN:
+        raise DiceError("expression range too large")
+    return expr
+
+# a parenthesised group, with the stated average before it if there is one
+_PAREN = re.compile(r"(?<![\w)])(\d+\s*)?\(([^)]*)\)")
+_HAS_DICE = re.compile(r"\d*d(?:\d+|%)(?!\w)", re.I)
+
+def _expand_parens(text: str) -> str:
+    """"N (dice)" becomes the dice; notes without dice are dropped. Dice in parentheses
+    next to anything but a stated average are ambiguous (DiceError)."""
+    def repl(m: re.Match) -> str:
+        average, inner = m.group(1), m.group(2)
+        if not _HAS_DICE.search(inner):
+            return f" {average or ''} "
+        if average is None and text[:m.start()].strip():
+            raise DiceError(f"ambiguous dice in parentheses: {m.group(0).strip()[:20]!r}")
+        return f" {inner} "
+    return _PAREN.sub(repl, text)
+
+def compile_dice(text: str) -> DiceExpr:
+    """Parse (or fetch the cached parse of) a dice expression; DiceError if invalid."""
+    normalized = " ".join(_expand_parens(text or "").lower().split())
+    return _compile(normalized)
@@ -0,0 +1,167 @@
+"""Compressed storage for the library JSON document columns.
+
+Documents are stored either as plain JSON TEXT (the original format, still
+read everywhere) or as a BLOB whose first byte is a format tag:
+
+  0x01  raw DEFLATE (zlib) with the column's v1 preset dictionary
+
+Library documents are small (1-10KB) and share most of their keys and
+vocabulary, so the preset dictionary is what makes per-row compression pay
+off. Dictionaries are part of the on-disk format: never edit one, add a new
+tag instead. Existing databases are converted (either way) with:
+
+    python -m api.app.documents migrate [--decompress] [--vacuum]
+    python -m api.app.documents stats
+"""
+import argparse
+import time
+import zlib
+from typing import Any
+from .config import DB_COMPRESS_DOCUMENTS
+
+# table -> JSON document columns that are stored compressed
+DOC_COLUMNS: dict[str, tuple[str, ...]] = {
+    "library": ("draft_json", "backstory_json", "progression_json"),
+    "item_library": ("item_json",),
+    "spell_library": ("spell_json",),
+    "progression_library": ("plan_json",),
+    "creature_library": ("creature_json",),
+}
+
+TAG_ZLIB_V1 = 0x01
+
+# Common English and 5e vocabulary first, each schema's JSON skeleton last
+# (DEFLATE reaches the end of the dictionary with the shortest distances).
+_PROSE = (
+    " the  and  of  to  a  in  that  with  his  her  their  they  was  for  as  from  is  on  by  had  an "
+    " who  when  which  it  but  not  this  into  were  one  has  have  been  would  could  after  before"
+    " adventurer  village  temple  guild  family  father  mother  brother  sister  mentor  friend  enemy"
+    " magic  arcane  divine  ancient  secret  shadow  blood  dragon  sword  shield  city  kingdom  war"
+    " damage  attack  hit  target  creature  saving throw  spell  level  slot  range  feet  round  turn"
+    " Strength  Dexterity  Constitution  Intelligence  Wisdom  Charisma  advantage  disadvantage"
+)
+_SKELETONS = {
+    "draft": (
+        '{"name":null,"level":1,"cls":"Wizard","race":"Elf","background":"Acolyte","hit_die":6,"proficiency_bonus":2,'
+        '"abilities":{"STR":10,"DEX":14,"CON":12,"INT":16,"WIS":13,"CHA":8,"STR_mod":0,"DEX_mod":2,"CON_mod":1,'
+        '"INT_mod":3,"WIS_mod":1,"CHA_mod":-1},"speed":30,"saving_throws":["INT","WIS"],"languages":["Common","Elvish"],'
+        '"proficiencies":[{"type":"skill","name":"Skill: Arcana","source":"class"},{"type":"armor","name":"Light Armor",'
+        '"source":"race"},{"type":"weapon","name":"Longsword","source":"background"}],"equipment":["Spellbook",'
+        '"Component pouch","Dagger"],"armor_class_basic":12,"features":["Spellcasting","Arcane Recovery","Darkvision"],'
+        '"spell_slots":{"1":2,"2":0,"3":0,"4":0,"5":0,"6":0,"7":0,"8":0,"9":0}}'
+    ),
+    "backstory": (
+        '{"summary":"","traits":["I "],"ideals":["Freedom. "],"bonds":["My "],"flaws":["I "],'
+        '"hooks":["A "],"prose_markdown":"## \\n\\n"}'
+    ),
+    "plan": (
+        '{"name":"","class_index":"wizard","target_level":5,"picks":[{"level":1,"hp_gain":null,"features":[],'
+        '"subclass":null,"asi":null,"spells_known":[],"prepared":[],"notes":null},{"level":2,"hp_gain":4,'
+        '"features":["Arcane Tradition"],"subclass":"School of Evocation","asi":"+2 INT","spells_known":["Magic Missile"],'
+        '"prepared":["Shield"],"notes":""}],"notes_markdown":""}'
+    ),
+    "item": (
+        '{"name":"","item_type":"Weapon","rarity":"uncommon","requires_attunement":true,"description":"",'
+        '"properties":["+1 bonus to attack and damage rolls"],"charges":null,"bonus":1,"damage":"1d8 slashing"}'
+    ),
+    "spell": (
+        '{"name":"","level":1,"school":"Evocation","classes":["Wizard","Sorcerer"],"casting_time":"1 action",'
+        '"range":"60 feet","duration":"Instantaneous","components":"V, S, M","concentration":false,"ritual":false,'
+        '"description":"","damage":"3d6 fire","save":"DEX save half"}'
+    ),
+    "creature": (
+        '{"name":"","size":"Medium","creature_type":"Humanoid","challenge_rating":"1/4","armor_class":12,"hit_points":11,'
+        '"hit_dice":"2d8 + 2","speed":"30 ft.","ability_scores":{"STR":10,"DEX":14,"CON":12,"INT":10,"WIS":11,"CHA":10,'
+        '"STR_mod":0,"DEX_mod":2,"CON_mod":1,"INT_mod":0,"WIS_mod":0,"CHA_mod":0},"saving_throws":[],"skills":'
+        '["Perception +2","Stealth +4"],"damage_resistances":[],"damage_immunities":[],"condition_immunities":[],'
+        '"senses":"darkvision 60 ft., passive Perception 12","languages":["Common"],"traits":[],"actions":'
+        '["Multiattack. ","Claw. Melee Weapon Attack: +4 to hit, reach 5 ft., one target. Hit: 5 (1d6 + 2) slashing damage."],'
+        '"spells":[],"description":""}'
+    ),
+}
+_DICTIONARIES: dict[str, bytes] = {
+    column: (_PROSE + _SKELETONS[skeleton]).encode("utf-8")
+    for column, skeleton in {
+        "draft_json": "draft", "backstory_json": "backstory", "progression_json": "plan", "plan_json": "plan",
+        "item_json": "item", "spell_json": "spell", "creature_json": "creature",
+    }.items()
+}
+
+def encode_doc(column: str, text: str | None) -> str | bytes | None:
+    """Stored form of a JSON document: tagged DEFLATE when that is smaller."""
+    if not text or not DB_COMPRESS_DOCUMENTS or column not in _DICTIONARIES:
+        return text
+    raw = text.encode("utf-8")
+    co = zlib.compressobj(6, zlib.DEFLATED, -15, 9, zlib.Z_DEFAULT_STRATEGY, _DICTIONARIES[column])
+    packed = bytes([TAG_ZLIB_V1]) + co.compress(raw) + co.flush()
+    return packed if len(packed) < len(raw) else text
+
+def decode_doc(column: str, value: str | bytes | None) -> str | None:
+    """JSON text of a stored document, whichever format it is in."""
+    if value is None or isinstance(value, str):
+        return value
+    if value[0] != TAG_ZLIB_V1:
+        raise ValueError(f"unknown document format tag {value[0]:#04x} in {column}")
+    do = zlib.decompressobj(-15, _DICTIONARIES[column])
+    return (do.decompress(value[1:]) + do.flush()).decode("utf-8")
+
+def encode_row(table_name: str, row: dict[str, Any]) -> dict[str, Any]:
+    cols = DOC_COLUMNS.get(table_name, ())
+    return {k: encode_doc(k, v) if k in cols else v for k, v in row.items()}
+
+def decode_row(table_name: str, row) -> dict[str, Any]:
+    cols = DOC_COLUMNS.get(table_name, ())
+    return {k: decode_doc(k, row[k]) if k in cols else row[k] for k in row.keys()}
+
+def main() -> None:
+    from .database import get_db_connection
+    ap = argparse.ArgumentParser(description="Library document storage")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    p_migrate = sub.add_parser("migrate", help="rewrite every stored document in the current format")
+    p_migrate.add_argument("--decompress", action="store_true", help="store plain JSON text again")
+    p_migrate.add_argument("--vacuum", action="store_true", help="VACUUM afterwards to return freed pages to the OS")
+    p_migrate.add_argument("--batch", type=int, default=1000)
+    sub.add_parser("stats", help="stored bytes per document column")
+    args = ap.parse_args()
+    con = get_db_connection()
+    if args.cmd == "stats":
+        for table, cols in DOC_COLUMNS.items():
+            for col in cols:
+                n, packed, size = con.execute(
+                    f"SELECT COUNT({col}), SUM(typeof({col}) = 'blob'), COALESCE(SUM(length(CAST({col} AS BLOB))), 0) FROM {table}"
+                ).fetchone()
+                print(f"{table}.{col}: {n} documents ({packed or 0} compressed), {size / 1024:.1f} KB stored")
+        con.close()
+        return
+    global DB_COMPRESS_DOCUMENTS
+    DB_COMPRESS_DOCUMENTS = not args.decompress
+    t0 = time.perf_counter()
+    before = after = rows = 0
+    for table, cols in DOC_COLUMNS.items():
+        last_id = 0
+        while True:
+            batch = con.execute(
+                f"SELECT id, {', '.join(cols)} FROM {table} WHERE id > ? ORDER BY id LIMIT ?", (last_id, args.batch)
+            ).fetchall()
+            if not batch:
+                break
+            updates = []
+            for r in batch:
+                stored = [r[c] for c in cols]
+                fresh = [encode_doc(c, decode_doc(c, r[c])) for c in cols]
+                before += sum(len(v) if isinstance(v, bytes) else len(v.encode("utf-8")) for v in stored if v)
+                after += sum(len(v) if isinstance(v, bytes) else len(v.encode("utf-8")) for v in fresh if v)
+                if fresh != stored:
+                    updates.append((*fresh, r["id"]))
+            with con:
+                con.executemany(f"UPDATE {table} SET {', '.join(f'{c} = ?' for c in cols)} WHERE id = ?", updates)
+            rows += len(updates)
+            last_id = batch[-1]["id"]
+    print(f"rewrote {rows} rows in {time.perf_counter() - t0:.1f}s: documents {before / 1024:.1f} KB -> {after / 1024:.1f} KB")
+    if args.vacuum:
+        con.execute("VACUUM")
+        print("vacuumed")
+    con.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,376 @@
+"""Monte Carlo encounter simulation: a party of saved characters against creatures.
+
+Each combatant is reduced to a picklable `Combatant` (HP, AC, initiative and
+save bonus, an attack routine, optionally a recharging save-for-half burst).
+A chunk of trials is simulated as NumPy arrays -- every attack roll, save and
+damage roll is drawn for all trials of the chunk at once -- and chunks are
+spread over a process pool, merged, and reported with 95% confidence
+intervals. A time budget stops submitting chunks and reports what finished.
+
+Model: side initiative (the side with the best d20 + DEX goes first), the
+party focuses the first standing creature, creatures pick a random standing
+character, natural 20s crit (dice doubled) and natural 1s miss, 0 HP is out.
+Characters use their weapon routine or an at-will attack cantrip; spell
+slots, healing, conditions, resistances and death saves are not modelled.
+"""
+import math
+import multiprocessing
+import os
+import re
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from typing import Any
+import numpy as np
+from .config import SIM_CHUNK_TRIALS, SIM_WORKERS
+from .cr_audit import creature_actions
+from .dice import DiceExpr, compile_dice
+
+Z95 = 1.959964
+
+@dataclass(frozen=True)
+class Combatant:
+    name: str
+    hp: int
+    ac: int
+    initiative: int         # d20 modifier
+    save_bonus: int         # against burst effects (DEX save)
+    attacks: int            # attacks per round
+    to_hit: int
+    damage: str             # dice expression per hit
+    burst_dc: int = 0       # save-for-half action, 0 = none
+    burst_damage: str = ""
+    burst_recharge: float = 0.0  # chance per turn to get the burst back
+    burst_targets: int = 1
+
+# ---------- Characters ----------
+# (base AC, max DEX bonus or None) for armor found in starting equipment
+_ARMOR = {
+    "padded armor": (11, None), "leather armor": (11, None), "studded leather armor": (12, None),
+    "hide armor": (12, 2), "chain shirt": (13, 2), "scale mail": (14, 2), "breastplate": (14, 2),
+    "half plate armor": (15, 2), "ring mail": (14, 0), "chain mail": (16, 0), "splint armor": (17, 0), "plate armor": (18, 0),
+}
+# class -> (weapon dice, attack ability, extra-attack levels); casters use cantrip dice instead
+_MARTIAL = {
+    "barbarian": ("1d12", "STR", (5,)), "fighter": ("2d6", "STR", (5, 11, 20)), "paladin": ("2d6", "STR", (5,)),
+    "ranger": ("1d8", "DEX", (5,)), "rogue": ("1d6", "DEX", ()), "monk": ("1d6", "DEX", (5,)),
+}
+_CASTERS = {
+    "bard": ("d8", "CHA"), "cleric": ("d8", "WIS"), "druid": ("d8", "WIS"),
+    "sorcerer": ("d10", "CHA"), "warlock": ("d10", "CHA"), "wizard": ("d10", "INT"),
+}
+
+def _plus(mod: int) -> str:
+    return f" + {mod}" if mod >= 0 else f" - {-mod}"
+
+def _tier(level: int) -> int:
+    """Cantrip (and monk die) step: 1 at levels 1-4, 2 at 5-10, 3 at 11-16, 4 at 17+."""
+    return 1 + (level >= 5) + (level >= 11) + (level >= 17)
+
+def character_combatant(draft: dict[str, Any]) -> Combatant:
+    """Combatant for a CharacterDraft dict (as stored in library.draft_json)."""
+    level = max(1, int(draft.get("level") or 1))
+    ab = draft.get("abilities") or {}
+    mod = {k: int(ab.get(f"{k}_mod", (int(ab.get(k, 10)) - 10) // 2)) for k in ("STR", "DEX", "CON", "INT", "WIS", "CHA")}
+    cls = str(draft.get("cls") or "").lower()
+    die = int(draft.get("hit_die") or 8)
+    pb = int(draft.get("proficiency_bonus") or 2)
+    hp = max(1, die + mod["CON"]) + (level - 1) * max(1, die // 2 + 1 + mod["CON"])
+
+    equipment = " ".join(str(e).lower() for e in draft.get("equipment") or [])
+    ac = int(draft.get("armor_class_basic") or 10 + mod["DEX"])
+    if cls == "barbarian":
+        ac = max(ac, 10 + mod["DEX"] + mod["CON"])
+    elif cls == "monk":
+        ac = max(ac, 10 + mod["DEX"] + mod["WIS"])
+    for armor, (base, cap) in _ARMOR.items():
+        if armor in equipment:
+            ac = max(ac, base + (mod["DEX"] if cap is None else min(mod["DEX"], cap)))
+    if "shield" in equipment and cls != "monk":
+        ac += 2
+
+    if cls in _MARTIAL:
+        dice, ability, extra = _MARTIAL[cls]
+        attack_mod = max(mod[ability], mod["STR"])
+        attacks = 1 + sum(level >= x for x in extra)
+        if cls == "monk":
+            dice = f"1d{2 + 2 * _tier(level)}"
+            attacks += 1  # bonus-action unarmed strike
+        if cls == "rogue":
+            dice += f" + {(level + 1) // 2}d6"  # Sneak Attack, assumed every turn
+        damage = dice + _plus(attack_mod)
+    else:
+        die_size, ability = _CASTERS.get(cls, ("d8", "STR"))
+        attack_mod = mod[ability]
+        if cls == "warlock":  # Eldritch Blast: one beam per tier
+            attacks, damage = _tier(level), "1" + die_size
+        else:
+            attacks, damage = 1, f"{_tier(level)}{die_size}"
+    saves = draft.get("saving_throws") or []
+    dex_save = mod["DEX"] + (pb if any(str(s).upper().startswith("DEX") for s in saves) else 0)
+    return Combatant(
+        name=str(draft.get("name") or f"{draft.get('race', '')} {draft.get('cls', 'Character')} {level}".strip()),
+        hp=hp, ac=ac, initiative=mod["DEX"], save_bonus=dex_save,
+        attacks=attacks, to_hit=pb + attack_mod, damage=str(compile_dice(damage)),
+    )
+
+# ---------- Creatures ----------
+_RECHARGE = re.compile(r"recharge\s*(\d)", re.I)
+_PER_DAY = re.compile(r"\d+\s*/\s*day", re.I)
+_AREA = re.compile(r"\b(cone|line|cube|sphere|radius|each creature)\b", re.I)
+_SAVE_BONUS = re.compile(r"\bdex\w*\s*\+?\s*(-?\d+)", re.I)
+
+def creature_combatant(data: dict[str, Any]) -> Combatant:
+    """Combatant for a Creature dict (as stored in creature_library.creature_json)."""
+    ab = data.get("ability_scores") or {}
+    dex = int(ab.get("DEX_mod", (int(ab.get("DEX", 10)) - 10) // 2))
+    save = next((int(m.group(1)) for s in data.get("saving_throws") or [] if (m := _SAVE_BONUS.search(str(s)))), dex)
+    multi, attacks, others = creature_actions(data)
+    if attacks:
+        to_hit, damage = max(attacks, key=lambda a: a[1].mean)
+        routine = multi
+    else:
+        to_hit, damage, routine = 0, DiceExpr(()), 0
+    burst = max(((dc, d, text) for dc, d, text in others if dc), key=lambda o: o[1].mean, default=None)
+    kwargs: dict[str, Any] = {}
+    if burst:
+        dc, burst_damage, text = burst
+        recharge = _RECHARGE.search(text)
+        if recharge:
+            chance = (7 - int(recharge.group(1))) / 6
+        elif _PER_DAY.search(text):
+            chance = 0.0
+        else:
+            chance = 1.0
+        if chance < 1.0 or burst_damage.mean > routine * damage.mean:
+            kwargs = {"burst_dc": dc, "burst_damage": str(burst_damage), "burst_recharge": chance,
+                      "burst_targets": 2 if _AREA.search(text) else 1}
+    return Combatant(
+        name=str(data.get("name") or "Creature"), hp=max(1, int(data.get("hit_points") or 1)),
+        ac=int(data.get("armor_class") or 10), initiative=dex, save_bonus=save,
+        attacks=routine, to_hit=to_hit, damage=str(damage) if damage.terms else "0", **kwargs,
+    )
+
+# ---------- Simulation ----------
+def _crit_dice(expr: DiceExpr) -> DiceExpr | None:
+    dice = tuple(t for t in expr.terms if t.sides)
+    return DiceExpr(dice) if dice else None
+
+def _roll_damage(expr: DiceExpr, crit_expr: DiceExpr | None, crit: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+    dmg = expr.sample(crit.size, rng)
+    if crit_expr is not None and crit.any():
+        dmg[crit] += crit_expr.sample(int(crit.sum()), rng)
+    return np.maximum(dmg, 0)
+
+def simulate_chunk(party: list[Combatant], creatures: list[Combatant], trials: int, seed: Any, max_rounds: int) -> dict[str, Any]:
+    """Simulate `trials` fights (vectorized over trials); returns mergeable counts."""
+    rng = np.random.default_rng(seed)
+    fighters = party + creatures
+    n_party = len(party)
+    sides = (slice(0, n_party), slice(n_party, len(fighters)))
+    hp = np.tile(np.array([c.hp for c in fighters], dtype=np.int64), (trials, 1))
+    ac = np.array([c.ac for c in fighters])
+    save_bonus = np.array([c.save_bonus for c in fighters])
+    exprs = [(compile_dice(c.damage), _crit_dice(compile_dice(c.damage))) for c in fighters]
+    bursts = [compile_dice(c.burst_damage) if c.burst_dc else None for c in fighters]
+    ready = np.ones((trials, len(fighters)), dtype=bool)
+    rows = np.arange(trials)
+    down_round = np.full((trials, len(fighters)), -1, dtype=np.int64)
+
+    def best_init(side: slice) -> np.ndarray:
+        mods = np.array([c.initiative for c in fighters[side]])
+        return (rng.integers(1, 21, size=(trials, mods.size)) + mods).max(axis=1)
+
+    party_first = best_init(sides[0]) >= best_init(sides[1])
+    ended = np.full(trials, max_rounds, dtype=np.int64)
+    winner = np.zeros(trials, dtype=np.int8)  # 1 party, -1 creatures, 0 draw (max_rounds)
+    active = np.ones(trials, dtype=bool)
+
+    def pick_target(foe: slice, focus: bool) -> tuple[np.ndarray, np.ndarray]:
+        standing = hp[:, foe] > 0
+        if focus:
+            local = standing.argmax(axis=1)
+        else:
+            local = (rng.random(standing.shape) * standing).argmax(axis=1)
+        return foe.start + local, standing.any(axis=1)
+
+    def act(i: int, mask: np.ndarray, rnd: int) -> None:
+        c = fighters[i]
+        foe = sides[1] if i < n_party else sides[0]
+        acting = mask & (hp[:, i] > 0)
+        if not acting.any():
+            return
+        if bursts[i] is not None:
+            if c.burst_recharge:
+                ready[:, i] |= rng.random(trials) < c.burst_recharge
+            use = acting & ready[:, i]
+            if use.any():
+                for _ in range(c.burst_targets):
+                    target, has = pick_target(foe, focus=False)
+                    saved = rng.integers(1, 21, trials) + save_bonus[target] >= c.burst_dc
+                    dmg = bursts[i].sample(trials, rng)
+                    dmg = np.where(saved, dmg // 2, dmg)
+                    hp[rows, target] -= np.where(use & has, np.maximum(dmg, 0), 0)
+                ready[use, i] = False
+                acting &= ~use
+        expr, crit_expr = exprs[i]
+        for _ in range(c.attacks):
+            target, has = pick_target(foe, focus=i < n_party)
+            d20 = rng.integers(1, 21, trials)
+            hit = acting & has & ((d20 == 20) | ((d20 != 1) & (d20 + c.to_hit >= ac[target])))
+            dmg = _roll_damage(expr, crit_expr, d20 == 20, rng)
+            hp[rows, target] -= np.where(hit, dmg, 0)
+        fresh = (hp <= 0) & (down_round < 0)
+        down_round[fresh] = rnd
+
+    for rnd in range(1, max_rounds + 1):
+        for side_first in (True, False):
+            order = range(n_party) if side_first else range(n_party, len(fighters))
+            other = range(n_party, len(fighters)) if side_first else range(n_party)
+            mask = active & (party_first == side_first)
+            for i in order:
+                act(i, mask, rnd)
+            for i in other:
+                act(i, mask, rnd)
+        party_up = (hp[:, sides[0]] > 0).any(axis=1)
+        creatures_up = (hp[:, sides[1]] > 0).any(axis=1)
+        done = active & ~(party_up & creatures_up)
+        ended[done] = rnd
+        winner[done & party_up] = 1
+        winner[done & ~party_up] = -1
+        active &= ~done
+        if not active.any():
+            break
+
+    party_win = winner == 1
+    downed = down_round >= 0
+    return {
+        "trials": trials,
+        "wins": int(party_win.sum()), "losses": int((winner == -1).sum()), "draws": int((winner == 0).sum()),
+        "rounds": np.bincount(ended, minlength=max_rounds + 1),
+        "win_rounds": np.bincount(ended[party_win], minlength=max_rounds + 1),
+        "downed": downed.sum(axis=0),
+        "down_round_sum": np.where(downed, down_round, 0).sum(axis=0),
+        "party_down": np.bincount(downed[:, sides[0]].sum(axis=1), minlength=n_party + 1),
+    }
+
+def _merge(total: dict[str, Any] | None, part: dict[str, Any]) -> dict[str, Any]:
+    if total is None:
+        return dict(part)
+    return {k: total[k] + part[k] for k in total}
+
+def wilson(successes: int, n: int) -> tuple[float, float]:
+    """95% Wilson score interval for a proportion."""
+    if not n:
+        return (0.0, 1.0)
+    p = successes / n
+    denom = 1 + Z95 ** 2 / n
+    centre = (p + Z95 ** 2 / (2 * n)) / denom
+    half = Z95 * math.sqrt(p * (1 - p) / n + Z95 ** 2 / (4 * n * n)) / denom
+    return (max(0.0, centre - half), min(1.0, centre + half))
+
+def _hist_stats(hist: np.ndarray) -> dict[str, Any] | None:
+    n = int(hist.sum())
+    if not n:
+        return None
+    values = np.arange(hist.size)
+    mean = float((values * hist).sum() / n)
+    sd = math.sqrt(max(0.0, float((values ** 2 * hist).sum() / n) - mean ** 2))
+    cdf = np.cumsum(hist) / n
+    half = Z95 * sd / math.sqrt(n)
+    return {
+        "mean": round(mean, 3), "ci95": [round(mean - half, 3), round(mean + half, 3)], "sd": round(sd, 3),
+        "median": int(np.searchsorted(cdf, 0.5)), "p90": int(np.searchsorted(cdf, 0.9)),
+    }
+
+def summarize(total: dict[str, Any], party: list[Combatant], creatures: list[Combatant]) -> dict[str, Any]:
+    n = total["trials"]
+    low, high = wilson(total["wins"], n)
+    fighters = party + creatures
+    per = []
+    for i, c in enumerate(fighters):
+        k = int(total["downed"][i])
+        d_low, d_high = wilson(k, n)
+        per.append({
+            "name": c.name, "side": "party" if i < len(party) else "creatures", "hp": c.hp, "ac": c.ac,
+            "down_rate": round(k / n, 4), "down_rate_ci95": [round(d_low, 4), round(d_high, 4)],
+            "mean_round_down": round(float(total["down_round_sum"][i]) / k, 2) if k else None,
+        })
+    party_down = total["party_down"]
+    return {
+        "trials": n,
+        "party_win_rate": round(total["wins"] / n, 4), "party_win_rate_ci95": [round(low, 4), round(high, 4)],
+        "losses": total["losses"], "draws": total["draws"],
+        "rounds": _hist_stats(total["rounds"]),
+        "rounds_to_win": _hist_stats(total["win_rounds"]),
+        "party_members_down_mean": round(float((np.arange(party_down.size) * party_down).sum() / n), 3),
+        "combatants": per,
+    }
+
+_pool: ProcessPoolExecutor | None = None
+_pool_lock = threading.Lock()
+
+def worker_count() -> int:
+    return SIM_WORKERS or os.cpu_count() or 1
+
+def _process_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn: the API process is multi-threaded, so forking it is unsafe
+            _pool = ProcessPoolExecutor(max_workers=worker_count(), mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+def close_sim_pool() -> None:
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+def simulate(party: list[Combatant], creatures: list[Combatant], trials: int = 10_000, time_budget: float | None = None,
+             seed: int | None = None, max_rounds: int = 50, chunk: int = SIM_CHUNK_TRIALS) -> dict[str, Any]:
+    """Run up to `trials` fights in chunks across the process pool (in-process for a
+    single chunk). With `time_budget` seconds, stops submitting chunks once it is
+    spent and summarizes the trials that finished."""
+    if not party or not creatures:
+        raise ValueError("need at least one character and one creature")
+    t0 = time.perf_counter()
+    deadline = t0 + time_budget if time_budget else math.inf
+    sizes = [min(chunk, trials - start) for start in range(0, trials, chunk)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    total: dict[str, Any] | None = None
+    if len(sizes) == 1:
+        total = simulate_chunk(party, creatures, sizes[0], seeds[0], max_rounds)
+    else:
+        pool = _process_pool()
+        in_flight: set[Future] = set()
+        limit = 2 * worker_count()  # keep every worker busy without queueing past the budget
+        queue = list(zip(sizes, seeds))
+        while queue or in_flight:
+            while queue and len(in_flight) < limit and time.perf_counter() < deadline:
+                size, s = queue.pop(0)
+                in_flight.add(pool.submit(simulate_chunk, party, creatures, size, s, max_rounds))
+            if time.perf_counter() >= deadline:
+                queue.clear()
+            if not in_flight:
+                break
+            timeout = max(0.0, deadline - time.perf_counter()) if queue and time_budget else None
+            done, in_flight = wait(in_flight, timeout=timeout, return_when=FIRST_COMPLETED)
+            for f in done:
+                try:
+                    total = _merge(total, f.result())
+                except BrokenProcessPool:
+                    close_sim_pool()  # a worker died: start fresh on the next call
+                    raise
+    if total is None:
+        raise TimeoutError("time budget spent before any trials finished")
+    result = summarize(total, party, creatures)
+    elapsed = time.perf_counter() - t0
+    result.update({
+        "requested_trials": trials, "budget_exhausted": total["trials"] < trials, "seed": seed,
+        "seconds": round(elapsed, 3), "trials_per_sec": round(total["trials"] / elapsed, 1) if elapsed else None,
+    })
+    return result
@@ -1,11 +1,29 @@
-import httpx
-from requests_cache import CachedSession
+import re
+from fastapi import HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
 from .schemas import CharacterDraft, BackstoryResult, ProgressionPlan, Proficiency
-from .config import RULES_BASE, RULES_API_PREFIX, cache_dir
+from .config import (
+    RULES_BASE, RULES_API_PREFIX, cache_dir,
+    RULES_CACHE_TTL, RULES_CACHE_MEMORY_ENTRIES, RULES_CACHE_MAX_ENTRIES, RULES_BUNDLE,
+    PORTRAIT_CACHE_CONTROL,
+)
+from .http_clients import get_client
+from .rules_cache import RulesCache
+from .srd_bundle import load_bundle
+from .portrait_cache import etag_matches
+from .database import InvalidCursor, list_items, run_db, blob_info, read_blob
 from typing import List
 
-# Rules cache
-rules_cache = CachedSession(cache_name=str(cache_dir / "rules_cache"), backend="sqlite", expire_after=60*60*24)
+# Rules cache (in-memory LRU in front of a bounded on-disk store)
+rules_cache = RulesCache(
+    cache_dir / "rules_store.sqlite",
+    ttl=RULES_CACHE_TTL,
+    memory_entries=RULES_CACHE_MEMORY_ENTRIES,
+    max_entries=RULES_CACHE_MAX_ENTRIES,
+)
+
+# Offline mode: when set, every rules lookup is served from the SRD bundle
+rules_bundle = load_bundle(RULES_BUNDLE) if RULES_BUNDLE else None
 
 def mod(score: int) -> int:
     return (score - 10) // 2
@@ -18,11 +36,85 @@ def pb(level: int) -> int:
     if level <= 16: return 5
     return 6
 
+async def _fetch_json_live(url: str):
+    r = await get_client("rules").get(url)
+    r.raise_for_status()
+    return r.json()
+
 async def fetch_json(url: str):
-    async with httpx.AsyncClient(timeout=20.0, follow_redirects=True) as client:
-        r = await client.get(url)
-        r.raise_for_status()
-        return r.json()
+    """Fetch rules JSON from the offline bundle, or through the shared rules cache."""
+    if rules_bundle is not None:
+        return await rules_bundle.get_json(url)
+    return await rules_cache.get_json(url, _fetch_json_live)
+
+def portrait_response(request: Request, image_bytes: bytes, etag: str, filename: str, media_type: str = "image/png") -> Response:
+    """Image response with a strong ETag; answers a matching If-None-Match with 304."""
+    headers = {"ETag": etag, "Cache-Control": PORTRAIT_CACHE_CONTROL}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    headers["Content-Disposition"] = f'inline; filename="{filename}"'
+    headers["Content-Length"] = str(len(image_bytes))
+    return Response(content=image_bytes, media_type=media_type, headers=headers)
+
+BLOB_CHUNK = 256 * 1024
+_RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+def parse_range(header: str | None, size: int) -> tuple[int, int] | None:
+    """Resolve a single `bytes=` range to inclusive (start, end); None means send
+    the whole body (no header, or a multi-range we don't split). Raises 416."""
+    if not header:
+        return None
+    m = _RANGE.match(header.strip())
+    if not m or (not m.group(1) and not m.group(2)):
+        return None
+    if m.group(1):
+        start = int(m.group(1))
+        end = min(int(m.group(2)), size - 1) if m.group(2) else size - 1
+    else:
+        start, end = max(0, size - int(m.group(2))), size - 1
+    if start >= size or start > end:
+        raise HTTPException(416, "requested range not satisfiable", headers={"Content-Range": f"bytes */{size}"})
+    return start, end
+
+async def blob_response(request: Request, digest: str | None, filename: str) -> Response:
+    """Stream a stored blob with its hash as strong ETag; honours If-None-Match,
+    Range and If-Range (single ranges)."""
+    info = await run_db(blob_info, digest) if digest else None
+    if info is None:
+        raise HTTPException(404, "No portrait")
+    etag = f'"{info["hash"]}"'
+    headers = {"ETag": etag, "Cache-Control": PORTRAIT_CACHE_CONTROL, "Accept-Ranges": "bytes"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    size = info["size"]
+    if_range = request.headers.get("if-range")
+    span = parse_range(request.headers.get("range"), size) if not if_range or if_range == etag else None
+    start, end = span or (0, size - 1)
+    headers["Content-Disposition"] = f'inline; filename="{filename}"'
+    headers["Content-Length"] = str(end - start + 1)
+    if span:
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+
+    async def body():
+        pos = start
+        while pos <= end:
+            chunk = await run_db(read_blob, info["rowid"], pos, min(BLOB_CHUNK, end - pos + 1))
+            if not chunk:
+                break
+            pos += len(chunk)
+            yield chunk
+
+    return StreamingResponse(body(), status_code=206 if span else 200, media_type=info["mime"], headers=headers)
+
+async def list_page(table_name: str, limit: int, page: int, search: str | None, sort: str,
+                    cursor: str | None, include_total: bool) -> dict:
+    """list_items for the /list routes; a bad cursor is the client's error."""
+    if limit < 1:
+        raise HTTPException(400, "limit must be at least 1")
+    try:
+        return await run_db(list_items, table_name, limit, page, search, sort, cursor, include_total)
+    except InvalidCursor as e:
+        raise HTTPException(400, str(e))
 
 def markdown_from_draft(d: CharacterDraft, bs: BackstoryResult | None = None) -> str:
     lines = []
@@ -0,0 +1,58 @@
+import httpx
+from .config import (
+    logger, HTTP_MAX_CONNECTIONS, HTTP_MAX_KEEPALIVE, HTTP_KEEPALIVE_EXPIRY, HTTP2_ENABLED,
+)
+
+# HTTP/2 needs the optional `h2` package (pip install "httpx[http2]")
+try:
+    import h2  # noqa: F401
+    _http2_available = True
+except Exception:  # pragma: no cover
+    _http2_available = False
+
+# One pooled keep-alive client per upstream, opened/closed by the app lifespan.
+# Default timeouts match what each call site used before pooling.
+UPSTREAMS: dict[str, float] = {
+    "rules": 20.0,     # dnd5eapi
+    "llm": 60.0,       # Ollama
+}
+
+_clients: dict[str, httpx.AsyncClient] = {}
+
+USE_HTTP2 = HTTP2_ENABLED and _http2_available
+
+def _build_client(name: str) -> httpx.AsyncClient:
+    limits = httpx.Limits(
+        max_connections=HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+        keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+    )
+    return httpx.AsyncClient(timeout=UPSTREAMS[name], limits=limits, http2=USE_HTTP2, follow_redirects=True)
+
+def get_client(name: str) -> httpx.AsyncClient:
+    """Return the shared client for an upstream.
+    Created lazily when used outside the app lifespan (e.g. CLI tools).
+    """
+    client = _clients.get(name)
+    if client is None or client.is_closed:
+        client = _build_client(name)
+        _clients[name] = client
+    return client
+
+async def open_http_clients() -> None:
+    if HTTP2_ENABLED and not _http2_available:
+        logger.warning("HTTP2_ENABLED=true but the 'h2' package is missing; using HTTP/1.1")
+    for name in UPSTREAMS:
+        get_client(name)
+    logger.info("HTTP client pools opened: %s (max_connections=%s keepalive=%s http2=%s)",
+                ", ".join(UPSTREAMS), HTTP_MAX_CONNECTIONS, HTTP_MAX_KEEPALIVE, USE_HTTP2)
+
+async def close_http_clients() -> None:
+    clients = list(_clients.values())
+    _clients.clear()
+    for client in clients:
+        try:
+            await client.aclose()
+        except Exception as e:
+            logger.warning("Error closing HTTP client: %s", e)
+    logger.info("HTTP client pools closed")
@@ -0,0 +1,210 @@
+import asyncio
+import io
+import time
+from typing import Any
+import torch
+from diffusers import FluxPipeline
+from .config import (
+    logger, LOCAL_IMAGE_MODEL, LOCAL_IMAGE_STEPS, LOCAL_IMAGE_GUIDANCE, LOCAL_IMAGE_SEED,
+    LOCAL_IMAGE_IDLE_TIMEOUT, PORTRAIT_BATCH_MAX, PORTRAIT_BATCH_WINDOW_MS,
+)
+from .portrait_scheduler import PortraitScheduler
+
+# Output sizes supported by the local pipeline; portraits use 1:1
+ASPECT_RATIOS = {
+    "1:1": (512, 512),
+    "16:9": (1664, 928),
+    "9:16": (928, 1664),
+    "4:3": (1472, 1140),
+    "3:4": (1140, 1472),
+    "3:2": (1584, 1056),
+    "2:3": (1056, 1584),
+}
+
+def select_device() -> tuple[str, Any]:
+    """Pick the diffusion device (MPS preferred, then CUDA, then CPU) and its dtype."""
+    try:
+        mps_ok = bool(getattr(torch.backends, "mps", None) and torch.backends.mps.is_available())
+    except Exception:
+        mps_ok = False
+    try:
+        cuda_ok = bool(getattr(torch.version, "cuda", None)) and bool(hasattr(torch, "cuda")) and bool(torch.cuda.is_available())
+    except Exception:
+        cuda_ok = False
+    device = "mps" if mps_ok else ("cuda" if cuda_ok else "cpu")
+    dtype = torch.float16 if device == "mps" else (torch.bfloat16 if device == "cuda" else torch.float32)
+    return device, dtype
+
+def default_seed() -> int:
+    return LOCAL_IMAGE_SEED if LOCAL_IMAGE_SEED >= 0 else 0
+
+def _encode_pngs(images: list[Any]) -> list[bytes]:
+    out = []
+    for img in images:
+        buf = io.BytesIO()
+        img.save(buf, format="PNG")
+        out.append(buf.getvalue())
+    return out
+
+class DiffusionPipelineHolder:
+    """Keeps one diffusion pipeline resident between requests.
+    The pipeline loads on first use (or at startup), generation (single prompts
+    or batches) is serialized through an asyncio lock, and an idle reaper unloads it after
+    `idle_timeout` seconds without use (0 keeps it loaded forever).
+    """
+
+    def __init__(self, model: str, idle_timeout: float):
+        self.model = model
+        self.idle_timeout = idle_timeout
+        self._pipe = None
+        self._device = "cpu"
+        self._dtype = None
+        self._lock: asyncio.Lock | None = None
+        self._waiting = 0
+        self._last_used = 0.0
+        self._state = "unloaded"
+        self._loads = 0
+        self._generations = 0
+        self._last_error: str | None = None
+        self._load_seconds: float | None = None
+
+    def _get_lock(self) -> asyncio.Lock:
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        return self._lock
+
+    # --- sync work (runs in a worker thread while the lock is held) ---
+
+    def _load(self) -> None:
+        if self._pipe is not None:
+            return
+        self._state = "loading"
+        t0 = time.perf_counter()
+        try:
+            device, dtype = select_device()
+            logger.info("Loading diffusion pipeline device=%s dtype=%s model=%s", device, str(dtype).split(".")[-1], self.model)
+            pipe = FluxPipeline.from_pretrained(self.model, dtype=dtype)
+            try:
+                logger.info("Moving diffusion pipeline to device %s...", device)
+                pipe.to(device)
+            except Exception:
+                logger.info("Diffusion pipeline .to(%s) failed; continuing on default device", device)
+            self._pipe, self._device, self._dtype = pipe, device, dtype
+            self._loads += 1
+            self._load_seconds = round(time.perf_counter() - t0, 2)
+            self._state = "ready"
+            logger.info("Diffusion pipeline resident after %.1fs", self._load_seconds)
+        except Exception as e:
+            self._state = "error"
+            self._last_error = str(e)
+            raise
+
+    def _unload(self) -> None:
+        pipe, self._pipe = self._pipe, None
+        if pipe is None:
+            return
+        try:
+            pipe.to("cpu")
+            del pipe
+            if self._device == "cuda" and hasattr(torch.cuda, "empty_cache"):
+                torch.cuda.empty_cache()
+            if self._device == "mps" and hasattr(torch.backends.mps, "empty_cache"):
+                torch.backends.mps.empty_cache()
+            logger.info("Diffusion pipeline unloaded")
+        except Exception as e:
+            logger.warning("Error during pipeline cleanup: %s", e)
+        finally:
+            self._state = "unloaded"
+
+    @staticmethod
+    def _generators(device: str, seeds: list[int]):
+        gens = [torch.Generator(device=device).manual_seed(s) for s in seeds]
+        return gens[0] if len(gens) == 1 else gens
+
+    def _run(self, kwargs: dict[str, Any], seeds: list[int]) -> list[Any]:
+        """Run the resident pipeline; retries on CPU if MPS fails."""
+        self._load()
+        gen_device = "cpu" if self._device == "mps" else self._device
+        kwargs = dict(kwargs)
+        kwargs["generator"] = self._generators(gen_device, seeds)
+        try:
+            return self._pipe(**kwargs).images
+        except Exception as inner_e:
+            if self._device != "mps":
+                raise
+            logger.warning("MPS generation failed (%s); moving pipeline to CPU and retrying...", inner_e)
+            self._pipe.to("cpu")
+            self._device = "cpu"
+            kwargs["generator"] = self._generators("cpu", seeds)
+            return self._pipe(**kwargs).images
+
+    # --- async API ---
+
+    async def generate_png_batch(self, prompts: list[str], seeds: list[int]) -> list[bytes]:
+        """Run one pipeline call for several prompts (one seed each); returns PNGs in order."""
+        width, height = ASPECT_RATIOS["1:1"]
+        kwargs = {
+            "prompt": prompts[0] if len(prompts) == 1 else list(prompts),
+            "width": width,
+            "height": height,
+            "num_inference_steps": LOCAL_IMAGE_STEPS,
+            "guidance_scale": LOCAL_IMAGE_GUIDANCE,
+            "max_sequence_length": 512,
+        }
+        lock = self._get_lock()
+        self._waiting += len(prompts)
+        try:
+            await lock.acquire()
+        finally:
+            self._waiting -= len(prompts)
+        try:
+            images = await asyncio.to_thread(self._run, kwargs, list(seeds))
+            self._generations += len(images)
+        finally:
+            self._last_used = time.monotonic()
+            lock.release()
+        return await asyncio.to_thread(_encode_pngs, images)
+
+    async def generate_png(self, prompt: str, seed: int | None = None) -> bytes:
+        return (await self.generate_png_batch([prompt], [default_seed() if seed is None else seed]))[0]
+
+    async def preload(self) -> None:
+        async with self._get_lock():
+            await asyncio.to_thread(self._load)
+            self._last_used = time.monotonic()
+
+    async def unload(self) -> None:
+        async with self._get_lock():
+            await asyncio.to_thread(self._unload)
+
+    async def run_idle_reaper(self, interval: float = 30.0) -> None:
+        """Background task: unload the pipeline once it has sat idle too long."""
+        if self.idle_timeout <= 0:
+            return
+        while True:
+            await asyncio.sleep(min(interval, self.idle_timeout))
+            if self._pipe is None or self._get_lock().locked():
+                continue
+            if time.monotonic() - self._last_used >= self.idle_timeout:
+                logger.info("Diffusion pipeline idle for %ss; evicting", int(time.monotonic() - self._last_used))
+                await self.unload()
+
+    def status(self) -> dict[str, Any]:
+        idle = round(time.monotonic() - self._last_used, 1) if self._pipe is not None else None
+        return {
+            "state": self._state,
+            "device": self._device if self._pipe is not None else None,
+            "busy": self._get_lock().locked(),
+            "queued": self._waiting,
+            "loads": self._loads,
+            "generations": self._generations,
+            "load_seconds": self._load_seconds,
+            "idle_seconds": idle,
+            "idle_timeout": self.idle_timeout,
+            "last_error": self._last_error,
+            "batching": portrait_scheduler.stats(),
+        }
+
+pipeline_holder = DiffusionPipelineHolder(LOCAL_IMAGE_MODEL, LOCAL_IMAGE_IDLE_TIMEOUT)
+# Concurrent portrait requests are micro-batched into single pipeline calls
+portrait_scheduler = PortraitScheduler(pipeline_holder.generate_png_batch, PORTRAIT_BATCH_MAX, PORTRAIT_BATCH_WINDOW_MS)
@@ -2,17 +2,47 @@ import os, asyncio
 import time
 import uuid
 import uvicorn
+from contextlib import asynccontextmanager
 
 from fastapi import FastAPI, Request, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 
-from .config import PORT, logger
+from .config import PORT, logger, USE_LOCAL, LOCAL_IMAGE_PRELOAD
 from . import database # Import the database module to ensure init_db() is called
+from .http_clients import open_http_clients, close_http_clients
+from .image_pipeline import pipeline_holder
+from .ai_inference import close_gemini_pool
+from .database import close_db
+from .thumbnails import thumbnail_worker
+from .encounter import close_sim_pool
+from .pdf_export import pdf_pool
 
 # Import routers
-from .routes import health, character, backstory, items, spells, progression, library, export, creature
+from .routes import health, character, backstory, items, spells, progression, library, export, creature, search, bulk, dice, encounter
 
-app = FastAPI(title="5e-ai-character-forge API", version="0.1.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await open_http_clients()
+    background = [
+        asyncio.create_task(pipeline_holder.run_idle_reaper()),
+        asyncio.create_task(thumbnail_worker.run()),
+    ]
+    if USE_LOCAL and LOCAL_IMAGE_PRELOAD:
+        background.append(asyncio.create_task(pipeline_holder.preload()))
+    try:
+        yield
+    finally:
+        for task in background:
+            task.cancel()
+        await asyncio.gather(*background, return_exceptions=True)
+        await pipeline_holder.unload()
+        await close_http_clients()
+        close_gemini_pool()
+        close_db()
+        close_sim_pool()
+        pdf_pool.close()
+
+app = FastAPI(title="5e-ai-character-forge API", version="0.1.0", lifespan=lifespan)
 
 # Request/response logging middleware
 @app.middleware("http")
@@ -59,6 +89,10 @@ app.include_router(progression.router)
 app.include_router(library.router)
 app.include_router(export.router)
 app.include_router(creature.router)
+app.include_router(search.router)
+app.include_router(bulk.router)
+app.include_router(dice.router)
+app.include_router(encounter.router)
 
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=PORT)
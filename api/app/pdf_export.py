@@ -1,13 +1,24 @@
 import io
+import asyncio
 import base64
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
 from io import BytesIO
+from typing import Any
 from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
 from reportlab.lib.pagesizes import letter
 from reportlab.lib.units import inch
 from reportlab.pdfgen import canvas
 from reportlab.lib.utils import ImageReader
+from reportlab.pdfbase import pdfmetrics
 from textwrap import wrap
 from .schemas import CharacterDraft, MagicItem, ProgressionPlan, BackstoryResult
+from .config import logger, PDF_WORKERS, PDF_QUEUE_MAX
+
+PDF_CHUNK = 64 * 1024
 
 # --- PDF Helpers ---
 
@@ -17,32 +28,59 @@ def _get_now_formatted() -> str:
     except Exception:
         return ''
 
-def _wrap_text_reportlab(canvas_obj: canvas.Canvas, text: str, max_width: float, font: str = "Helvetica", size: int = 10) -> list[str]:
-    canvas_obj.setFont(font, size)
-    words = text.split()
+class _GlyphWidths(dict):
+    """char -> advance width in 1/1000 em for one font, filled on first use."""
+    def __init__(self, font: str):
+        super().__init__()
+        self.font = font
+
+    def __missing__(self, ch: str) -> float:
+        w = self[ch] = pdfmetrics.stringWidth(ch, self.font, 1000)
+        return w
+
+@lru_cache(maxsize=None)
+def _glyph_widths(font: str) -> _GlyphWidths:
+    return _GlyphWidths(font)
+
+@lru_cache(maxsize=4096)
+def wrap_text(text: str, max_width: float, font: str = "Helvetica", size: float = 10) -> tuple[str, ...]:
+    """Greedy word wrap to `max_width` points; words wider than a line are split by character.
+    Widths are summed from the font's glyph table (what canvas.stringWidth computes) and
+    each line's width is carried forward instead of re-measured."""
+    widths = _glyph_widths(font)
+    scale = 0.001 * size
+    space = widths[" "]
     lines: list[str] = []
-    line = ""
-    for w in words:
-        test = (line + (" " if line else "") + w)
-        if canvas_obj.stringWidth(test, font, size) <= max_width:
-            line = test
-        else:
-            if line:
-                lines.append(line)
-            if canvas_obj.stringWidth(w, font, size) > max_width:
-                accum = ""
-                for ch in w:
-                    if canvas_obj.stringWidth(accum + ch, font, size) <= max_width:
-                        accum += ch
-                    else:
-                        lines.append(accum)
-                        accum = ch
-                line = accum
+    line, line_w = "", 0.0
+    for w in text.split():
+        word_w = sum(map(widths.__getitem__, w))
+        test_w = line_w + space + word_w if line else word_w
+        if test_w * scale <= max_width:
+            line = f"{line} {w}" if line else w
+            line_w = test_w
+            continue
+        if line:
+            lines.append(line)
+        if word_w * scale <= max_width:
+            line, line_w = w, word_w
+            continue
+        accum, accum_w = "", 0.0
+        for ch in w:
+            ch_w = widths[ch]
+            if (accum_w + ch_w) * scale <= max_width:
+                accum += ch
+                accum_w += ch_w
             else:
-                line = w
+                lines.append(accum)
+                accum, accum_w = ch, ch_w
+        line, line_w = accum, accum_w
     if line:
         lines.append(line)
-    return lines
+    return tuple(lines)
+
+def _wrap_text_reportlab(canvas_obj: canvas.Canvas, text: str, max_width: float, font: str = "Helvetica", size: int = 10) -> list[str]:
+    canvas_obj.setFont(font, size)
+    return list(wrap_text(text, max_width, font, size))
 
 def _draw_footer(canvas_obj: canvas.Canvas, width: float, margin: float):
     canvas_obj.setFont("Helvetica", 9)
@@ -82,13 +120,7 @@ def _draw_section(canvas_obj: canvas.Canvas, x: float, y_top: float, title_text:
 
 # --- Exporters ---
 
-async def export_magic_item_pdf_content(item: MagicItem) -> BytesIO:
-    try:
-        # Ensure reportlab is installed
-        pass
-    except Exception as e:
-        raise HTTPException(500, f"PDF generation libs missing: {e}")
-
+def _magic_item_pdf(item: MagicItem) -> BytesIO:
     buffer = BytesIO()
     c = canvas.Canvas(buffer, pagesize=letter)
     width, height = letter
@@ -115,13 +147,7 @@ async def export_magic_item_pdf_content(item: MagicItem) -> BytesIO:
     _draw_footer(c, width, margin); c.showPage(); c.save(); buffer.seek(0)
     return buffer
 
-async def export_progression_pdf_content(plan: ProgressionPlan) -> BytesIO:
-    try:
-        # Ensure reportlab is installed
-        pass
-    except Exception as e:
-        raise HTTPException(500, f"PDF generation libs missing: {e}")
-
+def _progression_pdf(plan: ProgressionPlan) -> BytesIO:
     buffer = BytesIO()
     c = canvas.Canvas(buffer, pagesize=letter)
     width, height = letter
@@ -171,13 +197,7 @@ async def export_progression_pdf_content(plan: ProgressionPlan) -> BytesIO:
     _draw_footer(c, width, margin); c.showPage(); c.save(); buffer.seek(0)
     return buffer
 
-async def export_character_pdf_content(draft: CharacterDraft, backstory: BackstoryResult | None, progression: ProgressionPlan | None, portrait_base64: str | None) -> BytesIO:
-    try:
-        # Ensure reportlab is installed
-        pass
-    except Exception as e:
-        raise HTTPException(500, f"PDF generation libs missing: {e}")
-
+def _character_pdf(draft: CharacterDraft, backstory: BackstoryResult | None, progression: ProgressionPlan | None, portrait_base64: str | None) -> BytesIO:
     buffer = BytesIO()
     c = canvas.Canvas(buffer, pagesize=letter)
     width, height = letter
@@ -303,3 +323,105 @@ async def export_character_pdf_content(draft: CharacterDraft, backstory: Backsto
     _draw_footer(c, width, margin); c.showPage(); c.save()
     buffer.seek(0)
     return buffer
+
+# --- Rendering off the event loop ---
+
+def render_pdf(kind: str, data: dict[str, Any]) -> bytes:
+    """Render one PDF from its picklable form (model_dump() dicts); runs in a PDF worker process."""
+    if kind == "item":
+        buffer = _magic_item_pdf(MagicItem.model_validate(data["item"]))
+    elif kind == "progression":
+        buffer = _progression_pdf(ProgressionPlan.model_validate(data["plan"]))
+    elif kind == "character":
+        backstory, progression = data.get("backstory"), data.get("progression")
+        buffer = _character_pdf(
+            CharacterDraft.model_validate(data["draft"]),
+            BackstoryResult.model_validate(backstory) if backstory else None,
+            ProgressionPlan.model_validate(progression) if progression else None,
+            data.get("portrait_base64"),
+        )
+    else:
+        raise ValueError(f"unknown PDF kind {kind!r}")
+    return buffer.getvalue()
+
+class PdfRenderPool:
+    """Bounded process pool for reportlab rendering. Jobs beyond `queue_max` (running
+    plus waiting) are refused with 503 instead of piling up; workers=0 renders inline."""
+
+    def __init__(self, workers: int = PDF_WORKERS, queue_max: int = PDF_QUEUE_MAX):
+        self.workers = workers
+        self.queue_max = queue_max
+        self.pending = 0
+        self._pool: ProcessPoolExecutor | None = None
+
+    def _executor(self) -> ProcessPoolExecutor:
+        if self._pool is not None and self._pool._broken:
+            # a worker died with nobody left waiting on its job to notice
+            self.close()
+        if self._pool is None:
+            # spawn: forking the multi-threaded API process is unsafe
+            self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+        return self._pool
+
+    def _release(self, _future: Future | None = None) -> None:
+        self.pending -= 1
+
+    async def render(self, kind: str, data: dict[str, Any]) -> bytes:
+        if self.pending >= self.queue_max:
+            raise HTTPException(503, "PDF renderer busy, retry shortly", headers={"Retry-After": "1"})
+        self.pending += 1
+        if self.workers <= 0:
+            try:
+                return render_pdf(kind, data)
+            finally:
+                self._release()
+        loop = asyncio.get_running_loop()
+        try:
+            future = self._executor().submit(render_pdf, kind, data)
+        except (BrokenProcessPool, RuntimeError):
+            # never queued, so no done callback will free the slot
+            self._release()
+            raise self._restart()
+        # count the job until the worker is done with it, even if the client goes away
+        future.add_done_callback(lambda f: loop.call_soon_threadsafe(self._release, f))
+        try:
+            return await asyncio.wrap_future(future)
+        except BrokenProcessPool:
+            raise self._restart()
+
+    def _restart(self) -> HTTPException:
+        logger.exception("PDF worker died; restarting the pool")
+        self.close()
+        return HTTPException(503, "PDF renderer restarting, retry shortly", headers={"Retry-After": "1"})
+
+    def close(self) -> None:
+        pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+pdf_pool = PdfRenderPool()
+
+def pdf_response(buffer: BytesIO, filename: str) -> StreamingResponse:
+    """Stream a rendered PDF in PDF_CHUNK pieces with its length known up front."""
+    data = buffer.getbuffer()
+
+    def body():
+        for pos in range(0, len(data), PDF_CHUNK):
+            yield bytes(data[pos:pos + PDF_CHUNK])
+
+    return StreamingResponse(body(), media_type="application/pdf", headers={
+        "Content-Disposition": f'attachment; filename="{filename}"', "Content-Length": str(len(data))})
+
+async def export_magic_item_pdf_content(item: MagicItem) -> BytesIO:
+    return BytesIO(await pdf_pool.render("item", {"item": item.model_dump()}))
+
+async def export_progression_pdf_content(plan: ProgressionPlan) -> BytesIO:
+    return BytesIO(await pdf_pool.render("progression", {"plan": plan.model_dump()}))
+
+async def export_character_pdf_content(draft: CharacterDraft, backstory: BackstoryResult | None, progression: ProgressionPlan | None, portrait_base64: str | None) -> BytesIO:
+    return BytesIO(await pdf_pool.render("character", {
+        "draft": draft.model_dump(),
+        "backstory": backstory.model_dump() if backstory else None,
+        "progression": progression.model_dump() if progression else None,
+        "portrait_base64": portrait_base64,
+    }))
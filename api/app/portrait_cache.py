@@ -0,0 +1,123 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any
+from .config import logger
+
+def cache_key(**params: Any) -> str:
+    """Content address for a generation request (prompt, engine, model, steps, ...)."""
+    blob = json.dumps(params, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+class PortraitCache:
+    """Disk-backed LRU cache of generated portraits.
+    Files are named `<request key>-<content hash>.png`, so the strong ETag
+    (the content hash) is known without reading the image. Total size is
+    capped at `max_bytes`; hits refresh recency via the file mtime so LRU
+    order survives restarts.
+    """
+
+    def __init__(self, directory: Path, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        # key -> (path, size, etag), least recently used first
+        self._index: OrderedDict[str, tuple[Path, int, str]] = OrderedDict()
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+        files = sorted(self.directory.glob("*.png"), key=lambda p: p.stat().st_mtime)
+        for path in files:
+            key, _, digest = path.stem.partition("-")
+            if not digest:
+                continue
+            size = path.stat().st_size
+            self._index[key] = (path, size, f'"{digest}"')
+            self._bytes += size
+        self._evict()
+
+    def get(self, key: str) -> tuple[bytes, str] | None:
+        with self._lock:
+            entry = self._index.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+            self._index.move_to_end(key)
+        path, _, etag = entry
+        try:
+            data = path.read_bytes()
+            os.utime(path)
+        except OSError:
+            with self._lock:
+                self._drop(key)
+            return None
+        with self._lock:
+            self._hits += 1
+        return data, etag
+
+    def put(self, key: str, data: bytes) -> str:
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.directory / f"{key}-{digest}.png"
+        # unique temp name: identical prompts finishing together each write their own file
+        fd, tmp = tempfile.mkstemp(dir=self.directory, prefix=f"{key}-", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as fh:
+                fh.write(data)
+            os.replace(tmp, path)
+        except BaseException:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+            raise
+        with self._lock:
+            old = self._index.get(key)
+            if old is not None and old[0] != path:
+                self._drop(key)
+            elif old is not None:
+                self._bytes -= old[1]
+            self._index[key] = (path, len(data), f'"{digest}"')
+            self._index.move_to_end(key)
+            self._bytes += len(data)
+            self._evict()
+        return f'"{digest}"'
+
+    def _drop(self, key: str) -> None:
+        entry = self._index.pop(key, None)
+        if entry is None:
+            return
+        self._bytes -= entry[1]
+        try:
+            entry[0].unlink()
+        except OSError:
+            pass
+
+    def _evict(self) -> None:
+        while self._bytes > self.max_bytes and len(self._index) > 1:
+            key = next(iter(self._index))
+            logger.debug("portrait cache: evicting %s", key)
+            self._drop(key)
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._index),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+            }
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against an ETag (RFC 9110)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    tags = [t.strip() for t in if_none_match.split(",")]
+    return any((t[2:] if t.startswith("W/") else t) == etag for t in tags)
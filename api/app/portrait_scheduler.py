@@ -0,0 +1,90 @@
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable
+
+# run_batch(prompts, seeds) -> one PNG per prompt, in order
+BatchRunner = Callable[[list[str], list[int]], Awaitable[list[bytes]]]
+
+@dataclass
+class _Pending:
+    prompt: str
+    seed: int
+    future: asyncio.Future
+    enqueued: float = field(default_factory=time.monotonic)
+
+class PortraitScheduler:
+    """Micro-batches concurrent portrait requests.
+    Requests arriving within `window_ms` of the oldest waiting one (or until
+    `max_batch` are queued) run as a single batched pipeline call; each caller
+    gets back its own PNG. A failed batch fails every request in it.
+    """
+
+    def __init__(self, run_batch: BatchRunner, max_batch: int, window_ms: float):
+        self.run_batch = run_batch
+        self.max_batch = max(1, max_batch)
+        self.window = max(0.0, window_ms) / 1000.0
+        self._pending: list[_Pending] = []
+        self._wakeup: asyncio.Event | None = None
+        self._worker: asyncio.Task | None = None
+        self._batches = 0
+        self._items = 0
+        self._largest = 0
+
+    async def submit(self, prompt: str, seed: int) -> bytes:
+        fut = asyncio.get_running_loop().create_future()
+        self._pending.append(_Pending(prompt, seed, fut))
+        if self._wakeup is None:
+            self._wakeup = asyncio.Event()
+        self._wakeup.set()
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._drain())
+        return await fut
+
+    async def _collect(self) -> list[_Pending]:
+        deadline = self._pending[0].enqueued + self.window
+        while len(self._pending) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), remaining)
+            except asyncio.TimeoutError:
+                break
+        batch = self._pending[:self.max_batch]
+        del self._pending[:len(batch)]
+        # callers that gave up while queued don't need a slot in the batch
+        return [p for p in batch if not p.future.done()]
+
+    async def _drain(self) -> None:
+        while self._pending:
+            batch = await self._collect()
+            if not batch:
+                continue
+            try:
+                images = await self.run_batch([p.prompt for p in batch], [p.seed for p in batch])
+                if len(images) != len(batch):
+                    raise RuntimeError(f"batch returned {len(images)} images for {len(batch)} prompts")
+            except Exception as e:
+                for p in batch:
+                    if not p.future.done():
+                        p.future.set_exception(e)
+                continue
+            self._batches += 1
+            self._items += len(batch)
+            self._largest = max(self._largest, len(batch))
+            for p, png in zip(batch, images):
+                if not p.future.done():
+                    p.future.set_result(png)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "max_batch": self.max_batch,
+            "window_ms": round(self.window * 1000, 1),
+            "queued": len(self._pending),
+            "batches": self._batches,
+            "images": self._items,
+            "avg_batch": round(self._items / self._batches, 2) if self._batches else None,
+            "largest_batch": self._largest,
+        }
@@ -1,5 +1,11 @@
+import itertools
+import math
 import random
+from fractions import Fraction
+from functools import lru_cache
+from math import comb
 from typing import List, Tuple
+import numpy as np
 
 def roll_4d6_drop_lowest(rng: random.Random) -> Tuple[List[int], int, int]:
     """Returns (dice_sorted, dropped_index, total_of_top3). dice_sorted is ascending."""
@@ -18,3 +24,118 @@ def roll_ability_set(seed: int | None = None):
         rolls.append({"dice": dice_sorted, "dropped_index": dropped_idx, "total": total})
         scores.append(total)
     return {"method": "4d6-drop-lowest", "seed": seed, "rolls": rolls, "scores": sorted(scores, reverse=True)}
+
+# ---------- Batch rolling (NumPy) ----------
+class _D6Stream:
+    """The d6 results random.Random(seed).randint(1, 6) would produce, in order.
+
+    randint(1, 6) draws getrandbits(3) -- the top 3 bits of one MT19937 output --
+    and redraws values >= 6. NumPy's MT19937 is the same generator, so it is
+    started from random.Random(seed)'s state and the rejection is applied to
+    whole blocks of raw outputs at once.
+    """
+
+    def __init__(self, seed: int | None):
+        state = random.Random(seed).getstate()[1]
+        self._bits = np.random.MT19937()
+        self._bits.state = {"bit_generator": "MT19937", "state": {"key": np.array(state[:624], dtype=np.uint32), "pos": state[624]}}
+        self._carry = np.empty(0, dtype=np.uint8)
+
+    def take(self, n: int) -> np.ndarray:
+        parts = [self._carry[:n]]
+        have = parts[0].size
+        self._carry = self._carry[have:]
+        while have < n:
+            top = self._bits.random_raw((n - have) * 4 // 3 + 64).astype(np.uint32)
+            top >>= 29
+            top = top.astype(np.uint8)
+            dice = top[top < 6] + 1
+            parts.append(dice[:n - have])
+            self._carry = dice[n - have:]
+            have += parts[-1].size
+        return np.concatenate(parts)
+
+def roll_ability_sets(count: int, seed: int | None = None, sort: bool = True, chunk: int = 1 << 18) -> np.ndarray:
+    """`count` 4d6-drop-lowest sets as a (count, 6) uint8 array.
+
+    Row 0 equals roll_ability_set(seed)["scores"]; later rows continue the same
+    random.Random(seed) stream, exactly as further rolls with that rng would.
+    Rows are sorted high to low like roll_ability_set unless `sort` is false.
+    """
+    stream = _D6Stream(seed)
+    out = np.empty((count, 6), dtype=np.uint8)
+    for start in range(0, count, chunk):
+        m = min(chunk, count - start)
+        d = stream.take(m * 24).reshape(m * 6, 4)
+        a, b, c, e = d[:, 0], d[:, 1], d[:, 2], d[:, 3]
+        out[start:start + m] = (a + b + c + e - np.minimum(np.minimum(a, b), np.minimum(c, e))).reshape(m, 6)
+    if sort:
+        out.sort(axis=1)
+        out = out[:, ::-1]
+    return out
+
+# ---------- Exact distribution ----------
+SCORE_VALUES = range(3, 19)
+
+@lru_cache(maxsize=1)
+def score_counts() -> dict[int, int]:
+    """Ways (out of 6**4) to roll each 4d6-drop-lowest score, by enumeration."""
+    counts = dict.fromkeys(SCORE_VALUES, 0)
+    for dice in itertools.product(range(1, 7), repeat=4):
+        counts[sum(dice) - min(dice)] += 1
+    return counts
+
+@lru_cache(maxsize=1)
+def total_counts() -> dict[int, int]:
+    """Ways (out of 6**24) for the sum of six scores: the score counts convolved six times."""
+    dist = {0: 1}
+    for _ in range(6):
+        nxt: dict[int, int] = {}
+        for total, ways in dist.items():
+            for score, n in score_counts().items():
+                nxt[total + score] = nxt.get(total + score, 0) + ways * n
+        dist = nxt
+    return dict(sorted(dist.items()))
+
+def _percentile(counts: dict[int, int], value: int) -> float:
+    """Mid-rank percentile: 100 * (P(X < value) + P(X = value) / 2)."""
+    below = sum(n for v, n in counts.items() if v < value)
+    return 100 * float(Fraction(2 * below + counts.get(value, 0), 2 * sum(counts.values())))
+
+def _rank_cdf(rank: int, value: int) -> Fraction:
+    """P(rank-th highest of six scores <= value)."""
+    counts = score_counts()
+    p_le = Fraction(sum(n for v, n in counts.items() if v <= value), 6 ** 4)
+    return sum((comb(6, j) * (1 - p_le) ** j * p_le ** (6 - j) for j in range(rank)), Fraction(0))
+
+def _moments(counts: dict[int, int]) -> tuple[float, float]:
+    n = sum(counts.values())
+    mean = Fraction(sum(v * c for v, c in counts.items()), n)
+    var = Fraction(sum(v * v * c for v, c in counts.items()), n) - mean * mean
+    return float(mean), math.sqrt(var)
+
+def distribution() -> dict:
+    out = {"method": "4d6-drop-lowest"}
+    for key, counts in (("score", score_counts()), ("total", total_counts())):
+        n = sum(counts.values())
+        mean, sd = _moments(counts)
+        out[key] = {"pmf": {str(v): c / n for v, c in counts.items()}, "mean": round(mean, 6), "sd": round(sd, 6)}
+    return out
+
+def array_percentiles(scores: List[int]) -> dict:
+    """How a six-score array compares with 4d6-drop-lowest rolls: each score
+    against a single roll, each score against the roll at the same rank of a
+    rolled set, and the total against the total of six rolls."""
+    if len(scores) != 6 or any(s not in SCORE_VALUES for s in scores):
+        raise ValueError("scores must be six integers between 3 and 18")
+    ranked = sorted(scores, reverse=True)
+    by_rank = []
+    for rank, score in enumerate(ranked, 1):
+        below, at_most = _rank_cdf(rank, score - 1), _rank_cdf(rank, score)
+        by_rank.append({"rank": rank, "score": score, "percentile": round(100 * float((below + at_most) / 2), 3)})
+    return {
+        "scores": ranked,
+        "per_score": [{"score": s, "percentile": round(_percentile(score_counts(), s), 3)} for s in ranked],
+        "by_rank": by_rank,
+        "total": {"value": sum(scores), "percentile": round(_percentile(total_counts(), sum(scores)), 3)},
+    }
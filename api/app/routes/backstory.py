@@ -1,6 +1,7 @@
 from fastapi import APIRouter, HTTPException, Query
 from ..schemas import BackstoryInput, BackstoryResult
-from ..ai_inference import use_local_inference, local_text_generate, google_text_generate
+from ..ai_inference import use_local_inference, local_text_generate, google_text_generate, text_stream
+from ..streaming import sse_generation, sse_response
 from ..config import logger
 import json
 
@@ -11,10 +12,7 @@ BACKSTORY_SYS = (
  "avoiding copyrighted setting names. Use clear, evocative prose suitable for a character handout."
 )
 
-@router.post("/api/backstory", response_model=BackstoryResult)
-async def backstory_route(payload: BackstoryInput, engine: str | None = Query(default=None)):
-    logger.debug("backstory: request received for %s/%s level %s", payload.draft.race, payload.draft.cls, payload.draft.level)
-
+def _backstory_prompt(payload: BackstoryInput) -> str:
     d = payload.draft
     abil = d.abilities
     summary = (
@@ -38,6 +36,18 @@ async def backstory_route(payload: BackstoryInput, engine: str | None = Query(de
     )
     if not payload.include_hooks:
         prompt += " The 'hooks' array should be empty."
+    return prompt
+
+def _backstory_result(obj: dict) -> BackstoryResult:
+    try:
+        return BackstoryResult(**obj)
+    except Exception as e:
+        raise HTTPException(502, f"Backstory schema validation failed: {e}")
+
+@router.post("/api/backstory", response_model=BackstoryResult)
+async def backstory_route(payload: BackstoryInput, engine: str | None = Query(default=None)):
+    logger.debug("backstory: request received for %s/%s level %s", payload.draft.race, payload.draft.cls, payload.draft.level)
+    prompt = _backstory_prompt(payload)
 
     if use_local_inference(engine):
         text = await local_text_generate(prompt)
@@ -49,9 +59,11 @@ async def backstory_route(payload: BackstoryInput, engine: str | None = Query(de
     except Exception as e:
         raise HTTPException(502, f"LLM returned non-JSON: {e}")
 
-    try:
-        result = BackstoryResult(**obj)
-    except Exception as e:
-        raise HTTPException(502, f"Backstory schema validation failed: {e}")
+    return _backstory_result(obj)
 
-    return result
+@router.post("/api/backstory/stream")
+async def backstory_stream(payload: BackstoryInput, engine: str | None = Query(default=None)):
+    """SSE variant of /api/backstory: token, field, then result (or error) events."""
+    logger.debug("backstory: stream request for %s/%s level %s", payload.draft.race, payload.draft.cls, payload.draft.level)
+    tokens = text_stream(_backstory_prompt(payload), BACKSTORY_SYS, engine)
+    return sse_response(sse_generation(tokens, _backstory_result))
@@ -0,0 +1,25 @@
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from ..bulk import BULK_TABLES, export_ndjson, import_ndjson
+from ..config import logger
+
+router = APIRouter()
+
+def _check_table(table: str) -> None:
+    if table not in BULK_TABLES:
+        raise HTTPException(404, f"unknown library table: {table} (expected one of {', '.join(BULK_TABLES)})")
+
+@router.get("/api/bulk/{table}/export")
+async def bulk_export(table: str, portraits: bool = True):
+    logger.debug("bulk: export table=%s portraits=%s", table, portraits)
+    _check_table(table)
+    return StreamingResponse(export_ndjson(table, portraits), media_type="application/x-ndjson",
+                             headers={"Content-Disposition": f'attachment; filename="{table}.ndjson"'})
+
+@router.post("/api/bulk/{table}/import")
+async def bulk_import(table: str, request: Request):
+    """Append NDJSON rows (the export format) to a table. Invalid lines are
+    skipped and reported; every valid line is imported under a new id."""
+    logger.debug("bulk: import table=%s", table)
+    _check_table(table)
+    return await import_ndjson(table, request.stream())
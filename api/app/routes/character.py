@@ -1,9 +1,14 @@
+import asyncio
+import json
+import random
+import numpy as np
 from fastapi import APIRouter, HTTPException, Query
-from typing import Dict, List
-from ..schemas import AbilitySet, GenerateInput, CharacterDraft, AbilityBlock, Proficiency
-from ..rollers import roll_ability_set
+from fastapi.responses import StreamingResponse
+from typing import Any, Awaitable, Dict, List
+from ..schemas import AbilitySet, AbilityArrayInput, GenerateInput, CharacterDraft, AbilityBlock, Proficiency, BatchGenerateInput, RandomBatchSpec
+from ..rollers import roll_ability_set, roll_ability_sets, distribution, array_percentiles
 from ..helpers import fetch_json, pb
-from ..config import RULES_BASE, RULES_API_PREFIX, logger
+from ..config import RULES_BASE, RULES_API_PREFIX, BATCH_GENERATE_MAX, logger
 
 router = APIRouter()
 
@@ -12,14 +17,35 @@ async def roll_abilities(seed: int | None = Query(default=None, description="opt
     logger.debug("roll_abilities: seed=%s", seed)
     return roll_ability_set(seed)
 
-@router.post("/api/generate", response_model=CharacterDraft)
-async def generate_character(payload: GenerateInput):
-    logger.debug("generate_character: class=%s race=%s background=%s level=%s", payload.class_index, payload.race_index, payload.background_index, payload.level)
-    # fetch class / race / background
-    cls = await fetch_json(f"{RULES_BASE}/{RULES_API_PREFIX}/classes/{payload.class_index}")
-    race = await fetch_json(f"{RULES_BASE}/{RULES_API_PREFIX}/races/{payload.race_index}")
-    bg   = await fetch_json(f"{RULES_BASE}/{RULES_API_PREFIX}/backgrounds/{payload.background_index}")
+def _sampled(samples: int, seed: int | None) -> dict:
+    sets = roll_ability_sets(samples, seed, sort=False)
+    score = np.bincount(sets.ravel(), minlength=19)[3:] / sets.size
+    total = np.bincount(sets.sum(axis=1, dtype=np.int64), minlength=109)[18:] / samples
+    return {
+        "samples": samples, "seed": seed,
+        "score": {str(v): float(p) for v, p in zip(range(3, 19), score)},
+        "total": {str(v): float(p) for v, p in zip(range(18, 109), total) if p},
+        "total_mean": float(sets.sum(axis=1, dtype=np.int64).mean()),
+    }
+
+@router.get("/api/roll/abilities/distribution")
+async def roll_abilities_distribution(samples: int = Query(default=0, ge=0, le=10_000_000, description="also roll this many sets and report the sampled frequencies"),
+                                      seed: int | None = None):
+    """Exact 4d6-drop-lowest distribution of one score and of the six-score total."""
+    result = distribution()
+    if samples:
+        result["sampled"] = await asyncio.to_thread(_sampled, samples, seed)
+    return result
+
+@router.post("/api/roll/abilities/percentiles")
+async def roll_abilities_percentiles(payload: AbilityArrayInput):
+    logger.debug("roll_abilities_percentiles: scores=%s", payload.scores)
+    try:
+        return array_percentiles(payload.scores)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
 
+def _ability_map(payload: GenerateInput) -> Dict[str, int]:
     # scores -> abilities
     if len(payload.scores) != 6 or len(payload.assignment) != 6:
         raise HTTPException(400, "scores and assignment must each have length 6")
@@ -28,14 +54,46 @@ async def generate_character(payload: GenerateInput):
         ability_map[abil] = score
     for k in ["STR","DEX","CON","INT","WIS","CHA"]:
         if k not in ability_map: raise HTTPException(400, f"missing ability in assignment: {k}")
+    return ability_map
+
+def _rules_urls(payload: GenerateInput, level: int) -> List[str]:
+    """class, race, background, starting equipment, class level"""
+    base = f"{RULES_BASE}/{RULES_API_PREFIX}"
+    return [
+        f"{base}/classes/{payload.class_index}",
+        f"{base}/races/{payload.race_index}",
+        f"{base}/backgrounds/{payload.background_index}",
+        f"{base}/starting-equipment/{payload.class_index}",
+        f"{base}/classes/{payload.class_index}/levels/{level}",
+    ]
+
+async def _gather_rules(lookups: List[Awaitable[Any]]):
+    cls, race, bg, cls_eq, lvl_data = await asyncio.gather(*lookups, return_exceptions=True)
+    # starting equipment is optional; every other lookup is required
+    for res in (cls, race, bg, lvl_data):
+        if isinstance(res, BaseException):
+            raise res
+    if isinstance(cls_eq, BaseException):
+        logger.debug("generate_character: starting equipment lookup failed: %s", cls_eq)
+        cls_eq = None
+    return cls, race, bg, cls_eq, lvl_data
+
+@router.post("/api/generate", response_model=CharacterDraft)
+async def generate_character(payload: GenerateInput):
+    logger.debug("generate_character: class=%s race=%s background=%s level=%s", payload.class_index, payload.race_index, payload.background_index, payload.level)
+    ability_map = _ability_map(payload)
+    level = max(1, min(payload.level, 20))
+    # fetch class / race / background / starting equipment / class level concurrently
+    rules = await _gather_rules([fetch_json(url) for url in _rules_urls(payload, level)])
+    return build_draft(payload, ability_map, level, *rules)
 
+def build_draft(payload: GenerateInput, ability_map: Dict[str, int], level: int, cls, race, bg, cls_eq, lvl_data) -> CharacterDraft:
     ab = AbilityBlock(
         STR=ability_map["STR"], DEX=ability_map["DEX"], CON=ability_map["CON"],
         INT=ability_map["INT"], WIS=ability_map["WIS"], CHA=ability_map["CHA"],
         STR_mod=(ability_map["STR"]-10)//2, DEX_mod=(ability_map["DEX"]-10)//2, CON_mod=(ability_map["CON"]-10)//2,
         INT_mod=(ability_map["INT"]-10)//2, WIS_mod=(ability_map["WIS"]-10)//2, CHA_mod=(ability_map["CHA"]-10)//2,
     )
-    level = max(1, min(payload.level, 20))
     hit_die = int(cls.get("hit_die", 8))
     saves = [st["name"] for st in cls.get("saving_throws", [])]
 
@@ -55,8 +113,7 @@ async def generate_character(payload: GenerateInput):
     # equipment: class starting_equipment + background starting_equipment
     equip: List[str] = []
     try:
-        cls_eq = await fetch_json(f"{RULES_BASE}/{RULES_API_PREFIX}/starting-equipment/{payload.class_index}")
-        for item in cls_eq.get("starting_equipment", []):
+        for item in (cls_eq or {}).get("starting_equipment", []):
             equip.append(f"{item.get('quantity','1')}x {item['equipment']['name']}")
     except Exception:
         pass
@@ -64,7 +121,6 @@ async def generate_character(payload: GenerateInput):
         equip.append(f"{item.get('quantity','1')}x {item['equipment']['name']}")
 
     # NEW: class features & spell slots at this level (compute BEFORE constructing draft)
-    lvl_data = await fetch_json(f"{RULES_BASE}/{RULES_API_PREFIX}/classes/{payload.class_index}/levels/{level}")
     feat_names = [f["name"] for f in lvl_data.get("features", [])]
 
     slots: dict[str, int] | None = None
@@ -98,3 +154,97 @@ async def generate_character(payload: GenerateInput):
         spell_slots=slots,
     )
     return draft
+
+# ---------- Batch generation ----------
+SRD_RACES = ["dragonborn", "dwarf", "elf", "gnome", "half-elf", "half-orc", "halfling", "human", "tiefling"]
+SRD_BACKGROUNDS = ["acolyte"]
+# score priority per class: rolled scores (high to low) are assigned in this order
+CLASS_PRIORITIES: Dict[str, List[str]] = {
+    "barbarian": ["STR", "CON", "DEX", "WIS", "CHA", "INT"],
+    "bard": ["CHA", "DEX", "CON", "WIS", "INT", "STR"],
+    "cleric": ["WIS", "CON", "STR", "DEX", "CHA", "INT"],
+    "druid": ["WIS", "CON", "DEX", "INT", "CHA", "STR"],
+    "fighter": ["STR", "CON", "DEX", "WIS", "CHA", "INT"],
+    "monk": ["DEX", "WIS", "CON", "STR", "INT", "CHA"],
+    "paladin": ["STR", "CHA", "CON", "WIS", "DEX", "INT"],
+    "ranger": ["DEX", "WIS", "CON", "STR", "INT", "CHA"],
+    "rogue": ["DEX", "CON", "CHA", "INT", "WIS", "STR"],
+    "sorcerer": ["CHA", "CON", "DEX", "WIS", "INT", "STR"],
+    "warlock": ["CHA", "CON", "DEX", "WIS", "INT", "STR"],
+    "wizard": ["INT", "CON", "DEX", "WIS", "CHA", "STR"],
+}
+
+def random_inputs(spec: RandomBatchSpec) -> List[GenerateInput]:
+    """Roll up `spec.count` characters: 4d6-drop-lowest scores assigned by class priority."""
+    if spec.level_min > spec.level_max:
+        raise HTTPException(400, "level_min must be <= level_max")
+    rng = random.Random(spec.seed)
+    classes = spec.classes or list(CLASS_PRIORITIES)
+    races = spec.races or SRD_RACES
+    backgrounds = spec.backgrounds or SRD_BACKGROUNDS
+    rolled = roll_ability_sets(spec.count, rng.getrandbits(32))
+    out: List[GenerateInput] = []
+    for scores in rolled.tolist():
+        class_index = rng.choice(classes)
+        priority = CLASS_PRIORITIES.get(class_index)
+        if priority is None:
+            priority = ["STR", "DEX", "CON", "INT", "WIS", "CHA"]
+            rng.shuffle(priority)
+        out.append(GenerateInput(
+            class_index=class_index,
+            race_index=rng.choice(races),
+            background_index=rng.choice(backgrounds),
+            level=rng.randint(spec.level_min, spec.level_max),
+            scores=scores,
+            assignment=priority,
+        ))
+    return out
+
+def _error_detail(e: BaseException) -> str:
+    return str(e.detail) if isinstance(e, HTTPException) else (str(e) or type(e).__name__)
+
+@router.post("/api/generate/batch")
+async def generate_batch(payload: BatchGenerateInput, stream: bool = Query(default=False, description="NDJSON, one line per character as it completes")):
+    """Generate many characters at once. Each distinct rules URL in the batch is
+    fetched once and shared by every character that needs it. Results carry the
+    input used (so random batches can be replayed through /api/generate) and
+    either a draft or an error."""
+    if (payload.characters is None) == (payload.random is None):
+        raise HTTPException(400, "provide exactly one of 'characters' or 'random'")
+    inputs = payload.characters if payload.characters is not None else random_inputs(payload.random)
+    if len(inputs) > BATCH_GENERATE_MAX:
+        raise HTTPException(400, f"at most {BATCH_GENERATE_MAX} characters per batch")
+    logger.debug("generate_batch: %d characters stream=%s", len(inputs), stream)
+
+    lookups: Dict[str, asyncio.Task] = {}
+
+    def lookup(url: str) -> asyncio.Task:
+        if url not in lookups:
+            lookups[url] = asyncio.ensure_future(fetch_json(url))
+        return lookups[url]
+
+    async def one(index: int, item: GenerateInput) -> Dict[str, Any]:
+        result: Dict[str, Any] = {"index": index, "input": item.model_dump()}
+        try:
+            ability_map = _ability_map(item)
+            level = max(1, min(item.level, 20))
+            rules = await _gather_rules([lookup(url) for url in _rules_urls(item, level)])
+            result["draft"] = build_draft(item, ability_map, level, *rules).model_dump()
+        except Exception as e:
+            result["error"] = _error_detail(e)
+        return result
+
+    if stream:
+        async def lines():
+            jobs = [asyncio.ensure_future(one(i, item)) for i, item in enumerate(inputs)]
+            try:
+                for done in asyncio.as_completed(jobs):
+                    yield json.dumps(await done) + "\n"
+            finally:
+                # client went away (or we finished): drop whatever is still in flight
+                for task in (*jobs, *lookups.values()):
+                    task.cancel()
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+    results = await asyncio.gather(*(one(i, item) for i, item in enumerate(inputs)))
+    logger.info("generate_batch: %d characters from %d rules lookups", len(results), len(lookups))
+    return {"results": results, "rules_lookups": len(lookups)}
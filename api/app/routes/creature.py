@@ -1,8 +1,11 @@
-from fastapi import APIRouter, HTTPException, Query
-from fastapi.responses import Response
+from fastapi import APIRouter, HTTPException, Query, Request
 from ..schemas import CreatureInput, Creature, CreatureExport, AbilityBlock
-from ..ai_inference import use_local_inference, local_text_generate, google_text_generate, local_image_generate, google_image_generate
-from ..database import create_item, get_item, list_items, delete_item, get_db_connection
+from ..ai_inference import use_local_inference, local_text_generate, google_text_generate, cached_image_generate, text_stream
+from ..database import create_item, get_item, delete_item, run_db, portrait_hash, blob_digest
+from ..thumbnails import thumbnail_worker, thumbnail, nearest_size
+from ..helpers import portrait_response, list_page, blob_response
+from ..streaming import sse_generation, sse_response
+from ..cr_audit import audit_library, estimate_one
 from ..config import logger
 import json
 import base64
@@ -17,11 +20,8 @@ CREATURE_GUIDE = (
     "and traits. Avoid copyrighted setting names."
 )
 
-@router.post("/api/creatures/generate", response_model=Creature)
-async def creatures_generate(payload: CreatureInput, engine: str | None = Query(default=None)):
-    logger.debug("creatures: generate request name=%s size=%s type=%s cr=%s", 
-                 payload.name, payload.size, payload.creature_type, payload.challenge_rating)
-    
+def _creature_prompt(payload: CreatureInput) -> tuple[str, dict]:
+    """Build the generation prompt; also returns the defaults used to normalize the reply."""
     name = payload.name or "Unnamed Creature"
     size = payload.size or "Medium"
     creature_type = payload.creature_type or "Humanoid"
@@ -48,7 +48,67 @@ async def creatures_generate(payload: CreatureInput, engine: str | None = Query(
         "Include appropriate senses (darkvision, blindsight, etc.). Add interesting traits and actions. "
         + (payload.prompt or "")
     )
+    return long_prompt, {"name": name, "size": size, "creature_type": creature_type, "challenge_rating": cr}
+
+def _creature_from_data(data: dict, defaults: dict) -> Creature:
+    name, size, creature_type, cr = defaults["name"], defaults["size"], defaults["creature_type"], defaults["challenge_rating"]
+    # Normalize ability scores
+    ab_data = data.get("ability_scores", {})
+    if not isinstance(ab_data, dict):
+        ab_data = {}
+    # Ensure all abilities are present
+    for ab in ["STR", "DEX", "CON", "INT", "WIS", "CHA"]:
+        if ab not in ab_data:
+            ab_data[ab] = 10
+        # Calculate modifiers if not present
+        mod_key = f"{ab}_mod"
+        if mod_key not in ab_data:
+            ab_data[mod_key] = (ab_data[ab] - 10) // 2
+    
+    ab_scores = AbilityBlock(
+        STR=ab_data.get("STR", 10), DEX=ab_data.get("DEX", 10), CON=ab_data.get("CON", 10),
+        INT=ab_data.get("INT", 10), WIS=ab_data.get("WIS", 10), CHA=ab_data.get("CHA", 10),
+        STR_mod=ab_data.get("STR_mod", 0), DEX_mod=ab_data.get("DEX_mod", 0), CON_mod=ab_data.get("CON_mod", 0),
+        INT_mod=ab_data.get("INT_mod", 0), WIS_mod=ab_data.get("WIS_mod", 0), CHA_mod=ab_data.get("CHA_mod", 0),
+    )
     
+    # Normalize lists
+    def to_list(v):
+        if isinstance(v, list):
+            return [str(x) for x in v if x]
+        if isinstance(v, str):
+            return [x.strip() for x in v.split(",") if x.strip()]
+        return []
+    
+    creature = Creature(
+        name=str(data.get("name", name)),
+        size=str(data.get("size", size)),
+        creature_type=str(data.get("creature_type", creature_type)),
+        challenge_rating=str(data.get("challenge_rating", cr)),
+        armor_class=int(data.get("armor_class", 10)),
+        hit_points=int(data.get("hit_points", 10)),
+        hit_dice=str(data.get("hit_dice", "1d8")),
+        speed=str(data.get("speed", "30 ft.")),
+        ability_scores=ab_scores,
+        saving_throws=to_list(data.get("saving_throws", [])),
+        skills=to_list(data.get("skills", [])),
+        damage_resistances=to_list(data.get("damage_resistances", [])),
+        damage_immunities=to_list(data.get("damage_immunities", [])),
+        condition_immunities=to_list(data.get("condition_immunities", [])),
+        senses=str(data.get("senses", "passive Perception 10")),
+        languages=to_list(data.get("languages", [])),
+        traits=to_list(data.get("traits", [])),
+        actions=to_list(data.get("actions", [])),
+        spells=to_list(data.get("spells", [])),
+        description=str(data.get("description", "")),
+    )
+    return creature
+
+@router.post("/api/creatures/generate", response_model=Creature)
+async def creatures_generate(payload: CreatureInput, engine: str | None = Query(default=None)):
+    logger.debug("creatures: generate request name=%s size=%s type=%s cr=%s", 
+                 payload.name, payload.size, payload.creature_type, payload.challenge_rating)
+    long_prompt, defaults = _creature_prompt(payload)
     try:
         if use_local_inference(engine):
             text = await local_text_generate(long_prompt)
@@ -59,64 +119,22 @@ async def creatures_generate(payload: CreatureInput, engine: str | None = Query(
             text = text.strip("`").replace("json\n", "").replace("\njson", "")
         
         data = json.loads(text)
-        
-        # Normalize ability scores
-        ab_data = data.get("ability_scores", {})
-        if not isinstance(ab_data, dict):
-            ab_data = {}
-        # Ensure all abilities are present
-        for ab in ["STR", "DEX", "CON", "INT", "WIS", "CHA"]:
-            if ab not in ab_data:
-                ab_data[ab] = 10
-            # Calculate modifiers if not present
-            mod_key = f"{ab}_mod"
-            if mod_key not in ab_data:
-                ab_data[mod_key] = (ab_data[ab] - 10) // 2
-        
-        ab_scores = AbilityBlock(
-            STR=ab_data.get("STR", 10), DEX=ab_data.get("DEX", 10), CON=ab_data.get("CON", 10),
-            INT=ab_data.get("INT", 10), WIS=ab_data.get("WIS", 10), CHA=ab_data.get("CHA", 10),
-            STR_mod=ab_data.get("STR_mod", 0), DEX_mod=ab_data.get("DEX_mod", 0), CON_mod=ab_data.get("CON_mod", 0),
-            INT_mod=ab_data.get("INT_mod", 0), WIS_mod=ab_data.get("WIS_mod", 0), CHA_mod=ab_data.get("CHA_mod", 0),
-        )
-        
-        # Normalize lists
-        def to_list(v):
-            if isinstance(v, list):
-                return [str(x) for x in v if x]
-            if isinstance(v, str):
-                return [x.strip() for x in v.split(",") if x.strip()]
-            return []
-        
-        creature = Creature(
-            name=str(data.get("name", name)),
-            size=str(data.get("size", size)),
-            creature_type=str(data.get("creature_type", creature_type)),
-            challenge_rating=str(data.get("challenge_rating", cr)),
-            armor_class=int(data.get("armor_class", 10)),
-            hit_points=int(data.get("hit_points", 10)),
-            hit_dice=str(data.get("hit_dice", "1d8")),
-            speed=str(data.get("speed", "30 ft.")),
-            ability_scores=ab_scores,
-            saving_throws=to_list(data.get("saving_throws", [])),
-            skills=to_list(data.get("skills", [])),
-            damage_resistances=to_list(data.get("damage_resistances", [])),
-            damage_immunities=to_list(data.get("damage_immunities", [])),
-            condition_immunities=to_list(data.get("condition_immunities", [])),
-            senses=str(data.get("senses", "passive Perception 10")),
-            languages=to_list(data.get("languages", [])),
-            traits=to_list(data.get("traits", [])),
-            actions=to_list(data.get("actions", [])),
-            spells=to_list(data.get("spells", [])),
-            description=str(data.get("description", "")),
-        )
-        return creature
+        return _creature_from_data(data, defaults)
     except Exception as e:
         logger.exception("creatures: generation failed")
         raise HTTPException(502, f"creature generation failed: {e}")
 
+@router.post("/api/creatures/generate/stream")
+async def creatures_generate_stream(payload: CreatureInput, engine: str | None = Query(default=None)):
+    """SSE variant of /api/creatures/generate: token, field, then result (or error) events."""
+    logger.debug("creatures: stream request name=%s size=%s type=%s cr=%s",
+                 payload.name, payload.size, payload.creature_type, payload.challenge_rating)
+    long_prompt, defaults = _creature_prompt(payload)
+    tokens = text_stream(long_prompt, CREATURE_GUIDE, engine)
+    return sse_response(sse_generation(tokens, lambda data: _creature_from_data(data, defaults)))
+
 @router.post("/api/creatures/portrait")
-async def creatures_portrait(payload: CreatureExport, engine: str | None = Query(default=None)):
+async def creatures_portrait(payload: CreatureExport, request: Request, engine: str | None = Query(default=None)):
     logger.info("Generating creature portrait image...")
     try:
         logger.info("Constructing creature portrait prompt...")
@@ -134,12 +152,7 @@ async def creatures_portrait(payload: CreatureExport, engine: str | None = Query
     except Exception as e:
         raise HTTPException(400, f"creature portrait prompt construction failed: {e}")
     try:
-        if use_local_inference(engine):
-            logger.info("Using local image generation...")
-            image_bytes = await local_image_generate(prompt)
-        else:
-            logger.info("Using Gemini image generation...")
-            image_bytes = await google_image_generate(prompt)
+        image_bytes, etag = await cached_image_generate(prompt, engine)
     except Exception as e:
         logger.exception("Image generation failed")
         raise HTTPException(502, f"image generation failed: {e}")
@@ -149,15 +162,7 @@ async def creatures_portrait(payload: CreatureExport, engine: str | None = Query
     except Exception:
         pass
     filename = f"{(name or c.creature_type).replace(' ','_')}_portrait.png"
-    return Response(
-        content=image_bytes,
-        media_type="image/png",
-        headers={
-            "Content-Disposition": f'inline; filename="{filename}"',
-            "Content-Length": str(len(image_bytes)),
-            "Cache-Control": "no-store",
-        },
-    )
+    return portrait_response(request, image_bytes, etag, filename)
 
 @router.post("/api/creatures/save")
 async def creatures_save(payload: CreatureExport):
@@ -174,55 +179,64 @@ async def creatures_save(payload: CreatureExport):
         "prompt": payload.prompt if hasattr(payload, "prompt") else None,
         "portrait_png": portrait_blob
     }
-    result = create_item("creature_library", creature_data)
+    result = await run_db(create_item, "creature_library", creature_data)
+    if portrait_blob:
+        thumbnail_worker.enqueue(blob_digest(portrait_blob))
     return result
 
 @router.get("/api/creatures/list")
-async def creatures_list(limit: int = 10, page: int = 1, search: str | None = None, sort: str = "created_desc"):
+async def creatures_list(limit: int = 10, page: int = 1, search: str | None = None, sort: str = "created_desc",
+                         cursor: str | None = None, include_total: bool = True):
     logger.debug("creatures: list limit=%s page=%s search=%s sort=%s", limit, page, search, sort)
-    result = list_items("creature_library", limit, page, search, sort)
-    # Enrich items with size, type, and CR from creature_json
-    con = get_db_connection()
+    result = await list_page("creature_library", limit, page, search, sort, cursor, include_total)
     for item in result["items"]:
-        row = con.execute("SELECT creature_json FROM creature_library WHERE id = ?", (item["id"],)).fetchone()
-        if row:
-            try:
-                creature_data = json.loads(row["creature_json"])
-                item["size"] = creature_data.get("size", "")
-                item["creature_type"] = creature_data.get("creature_type", "")
-                item["challenge_rating"] = creature_data.get("challenge_rating", "")
-            except Exception:
-                item["size"] = ""
-                item["creature_type"] = ""
-                item["challenge_rating"] = ""
-    con.close()
+        item["thumb_url"] = f"/api/creatures/{item['id']}/thumb" if item.pop("portrait_hash") else None
     return result
 
+@router.post("/api/creatures/cr")
+async def creatures_cr(payload: Creature):
+    """DMG defensive/offensive CR estimate for a stat block, next to its stated CR."""
+    return estimate_one(payload.model_dump())
+
+@router.get("/api/creatures/audit")
+async def creatures_audit(threshold: int = Query(default=2, ge=1), limit: int = Query(default=100, ge=0, le=1000)):
+    """Saved creatures whose stated CR is `threshold`+ rows off the estimate, worst first."""
+    logger.debug("creatures: audit threshold=%s limit=%s", threshold, limit)
+    return await run_db(audit_library, threshold, limit)
+
 @router.get("/api/creatures/get/{creature_id}")
 async def creatures_get(creature_id: int):
     logger.debug("creatures: get id=%s", creature_id)
-    row = get_item("creature_library", creature_id)
+    row = await run_db(get_item, "creature_library", creature_id)
     if not row:
         raise HTTPException(404, "Not found")
     creature = json.loads(row["creature_json"])
-    portrait_b64 = None
-    if "portrait_png" in row.keys() and row["portrait_png"] is not None:
-        try:
-            portrait_b64 = base64.b64encode(row["portrait_png"]).decode("ascii")
-        except Exception:
-            portrait_b64 = None
+    portrait_url = f"/api/creatures/{row['id']}/portrait" if row["portrait_hash"] else None
     return {
         "id": row["id"],
         "name": row["name"],
         "created_at": row["created_at"],
         "creature": creature,
-        "portrait_base64": portrait_b64
+        "portrait_url": portrait_url
     }
 
+@router.get("/api/creatures/{creature_id}/portrait")
+async def creatures_stored_portrait(creature_id: int, request: Request):
+    digest = await run_db(portrait_hash, "creature_library", creature_id)
+    return await blob_response(request, digest, f"creature_{creature_id}_portrait.png")
+
+@router.get("/api/creatures/{creature_id}/thumb")
+async def creatures_thumb(creature_id: int, request: Request, size: int = 128):
+    digest = await run_db(portrait_hash, "creature_library", creature_id)
+    row = await thumbnail(digest, nearest_size(size)) if digest else None
+    if row is None:
+        raise HTTPException(404, "No portrait")
+    return portrait_response(request, row["data"], f'"{digest}-{row["size"]}"', f"creature_{creature_id}_thumb.webp", row["mime"])
+
 @router.delete("/api/creatures/delete/{creature_id}")
 async def creatures_delete(creature_id: int):
     logger.debug("creatures: delete id=%s", creature_id)
-    ok = delete_item("creature_library", creature_id)
+    ok = await run_db(delete_item, "creature_library", creature_id)
     if not ok:
         raise HTTPException(404, "Not found")
     return {"ok": True}
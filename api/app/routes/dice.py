@@ -0,0 +1,49 @@
+import asyncio
+import numpy as np
+from fastapi import APIRouter, HTTPException
+from ..schemas import DiceStatsInput, DiceRollInput
+from ..dice import DiceError, compile_dice
+from ..config import logger
+
+router = APIRouter()
+
+MAX_EXPRESSIONS = 100
+
+def _stats(payload: DiceStatsInput) -> list[dict]:
+    rng = np.random.default_rng(payload.seed)
+    results = []
+    for text in payload.expressions:
+        try:
+            expr = compile_dice(text)
+        except DiceError as e:
+            results.append({"input": text, "error": str(e)})
+            continue
+        entry = {"input": text, **expr.stats(payload.percentiles)}
+        if payload.include_pmf:
+            entry["pmf"] = {str(expr.min + i): float(p) for i, p in enumerate(expr.pmf) if p > 0}
+        if payload.samples:
+            rolls = expr.sample(payload.samples, rng)
+            entry["sampled"] = {"samples": payload.samples, "mean": float(rolls.mean()), "sd": float(rolls.std())}
+        results.append(entry)
+    return results
+
+@router.post("/api/dice/stats")
+async def dice_stats(payload: DiceStatsInput):
+    """Exact min/max/mean/variance/percentiles (and optionally the full PMF) for each expression.
+    Invalid expressions get an `error` entry instead of failing the request."""
+    logger.debug("dice: stats for %d expressions", len(payload.expressions))
+    if len(payload.expressions) > MAX_EXPRESSIONS:
+        raise HTTPException(400, f"at most {MAX_EXPRESSIONS} expressions per request")
+    if any(not 0 <= q <= 100 for q in payload.percentiles):
+        raise HTTPException(400, "percentiles must be between 0 and 100")
+    return {"results": await asyncio.to_thread(_stats, payload)}
+
+@router.post("/api/dice/roll")
+async def dice_roll(payload: DiceRollInput):
+    logger.debug("dice: roll %s x%d seed=%s", payload.expression, payload.count, payload.seed)
+    try:
+        expr = compile_dice(payload.expression)
+    except DiceError as e:
+        raise HTTPException(400, str(e))
+    rolls = expr.sample(payload.count, np.random.default_rng(payload.seed))
+    return {"expression": str(expr), "seed": payload.seed, "rolls": rolls.tolist()}
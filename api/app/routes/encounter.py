@@ -0,0 +1,33 @@
+import asyncio
+import json
+from fastapi import APIRouter, HTTPException
+from ..schemas import EncounterSimInput
+from ..database import get_item, run_db
+from ..encounter import character_combatant, creature_combatant, simulate
+from ..config import logger, SIM_MAX_TRIALS, SIM_TIME_BUDGET
+
+router = APIRouter()
+
+async def _saved(table: str, column: str, item_id: int) -> dict:
+    row = await run_db(get_item, table, item_id)
+    if not row or not row.get(column):
+        raise HTTPException(404, f"{table} {item_id} not found")
+    return json.loads(row[column])
+
+@router.post("/api/encounters/simulate")
+async def encounters_simulate(payload: EncounterSimInput):
+    """Monte Carlo win rate / rounds (with 95% CIs) for a party against a group of creatures."""
+    if payload.trials > SIM_MAX_TRIALS:
+        raise HTTPException(400, f"at most {SIM_MAX_TRIALS} trials per request")
+    drafts = [d.model_dump() for d in payload.party] + [await _saved("library", "draft_json", i) for i in payload.party_ids]
+    foes = [c.model_dump() for c in payload.creatures] + [await _saved("creature_library", "creature_json", i) for i in payload.creature_ids]
+    if not drafts or not foes:
+        raise HTTPException(400, "need at least one character and one creature")
+    party = [character_combatant(d) for d in drafts]
+    creatures = [creature_combatant(c) for c in foes]
+    budget = min(payload.time_budget or SIM_TIME_BUDGET, SIM_TIME_BUDGET)
+    logger.debug("encounters: simulate %d vs %d, %d trials, budget %.1fs", len(party), len(creatures), payload.trials, budget)
+    try:
+        return await asyncio.to_thread(simulate, party, creatures, payload.trials, budget, payload.seed, payload.max_rounds)
+    except TimeoutError as e:
+        raise HTTPException(503, str(e))
@@ -1,11 +1,11 @@
-import asyncio
 import base64
-from fastapi import APIRouter, HTTPException, Response, Query
-from fastapi.responses import StreamingResponse, JSONResponse, PlainTextResponse
+import httpx
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import JSONResponse, PlainTextResponse
 from ..schemas import ExportInput, ExportPDFInput
-from ..ai_inference import use_local_inference, local_image_generate, google_image_generate
-from ..helpers import markdown_from_draft, rules_cache
-from ..pdf_export import export_character_pdf_content
+from ..ai_inference import cached_image_generate
+from ..helpers import markdown_from_draft, fetch_json, portrait_response
+from ..pdf_export import export_character_pdf_content, pdf_response
 from ..config import RULES_BASE, logger
 
 router = APIRouter()
@@ -16,18 +16,14 @@ async def rules_proxy(path: str):
     # Proxies dnd5eapi with caching + minimal normalization
     url = f"{RULES_BASE}/{path.lstrip('/')}"
     try:
-        # CachedSession is sync; run in thread
-        def _get():
-            return rules_cache.get(url, timeout=20)
-        resp = await asyncio.to_thread(_get)
-        if resp.status_code >= 400:
-            raise HTTPException(resp.status_code, f"dnd5eapi error: {resp.text[:200]}")
-        return resp.json()
+        return await fetch_json(url)
+    except httpx.HTTPStatusError as e:
+        raise HTTPException(e.response.status_code, f"dnd5eapi error: {e.response.text[:200]}")
     except Exception as e:
         raise HTTPException(502, f"rules proxy failed: {e}")
 
 @router.post("/api/portrait")
-async def generate_portrait(payload: ExportInput, engine: str | None = Query(default=None)):
+async def generate_portrait(payload: ExportInput, request: Request, engine: str | None = Query(default=None)):
     logger.info("Generating portrait image...")
     d = payload.draft  # Define d early so it's available for filename generation
     try:
@@ -48,12 +44,7 @@ async def generate_portrait(payload: ExportInput, engine: str | None = Query(def
     except Exception as e:
         raise HTTPException(400, f"portrait prompt construction failed: {e}")
     try:
-        if use_local_inference(engine):
-            logger.info("Using local image generation...")
-            image_bytes = await local_image_generate(prompt)
-        else:
-            logger.info("Using Gemini image generation...")
-            image_bytes = await google_image_generate(prompt)
+        image_bytes, etag = await cached_image_generate(prompt, engine)
     except Exception as e:
         logger.exception("Image generation failed")
         raise HTTPException(502, f"image generation failed: {e}")
@@ -63,15 +54,7 @@ async def generate_portrait(payload: ExportInput, engine: str | None = Query(def
     except Exception:
         pass
     filename = f"{(d.name or d.race + ' ' + d.cls).replace(' ','_')}_portrait.png"
-    return Response(
-        content=image_bytes,
-        media_type="image/png",
-        headers={
-            "Content-Disposition": f'inline; filename="{filename}"',
-            "Content-Length": str(len(image_bytes)),
-            "Cache-Control": "no-store",
-        },
-    )
+    return portrait_response(request, image_bytes, etag, filename)
 
 @router.post("/api/export/json")
 async def export_json(payload: ExportInput):
@@ -136,4 +119,4 @@ async def export_pdf(payload: ExportPDFInput):
     logger.debug("export_pdf: name=%s class=%s race=%s portrait=%s", payload.draft.name, payload.draft.cls, payload.draft.race, bool(payload.portrait_base64))
     buffer = await export_character_pdf_content(payload.draft, payload.backstory, getattr(payload, 'progression', None), payload.portrait_base64)
     filename = f"{(payload.draft.name or payload.draft.race + ' ' + payload.draft.cls).replace(' ','_')}_Sheet.pdf"
-    return StreamingResponse(buffer, media_type="application/pdf", headers={"Content-Disposition": f'attachment; filename="{filename}"'})
+    return pdf_response(buffer, filename)
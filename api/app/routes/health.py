@@ -1,5 +1,6 @@
 from fastapi import APIRouter
 from ..ai_inference import get_model_health
+from ..helpers import rules_cache
 
 router = APIRouter()
 
@@ -10,3 +11,7 @@ async def health():
 @router.get("/health/model")
 async def health_model():
     return await get_model_health()
+
+@router.get("/health/rules-cache")
+async def health_rules_cache():
+    return await rules_cache.stats()
@@ -1,9 +1,10 @@
 from fastapi import APIRouter, HTTPException, Query
-from fastapi.responses import StreamingResponse
 from ..schemas import MagicItemInput, MagicItem, MagicItemExport
-from ..ai_inference import use_local_inference, local_text_generate, google_text_generate
-from ..database import create_item, get_item, list_items, delete_item, get_db_connection
-from ..pdf_export import export_magic_item_pdf_content
+from ..ai_inference import use_local_inference, local_text_generate, google_text_generate, text_stream
+from ..streaming import sse_generation, sse_response
+from ..database import create_item, get_item, delete_item, run_db
+from ..helpers import list_page
+from ..pdf_export import export_magic_item_pdf_content, pdf_response
 from ..config import logger
 import json
 
@@ -14,20 +15,23 @@ MI_GUIDE = (
     "Follow DMG-style format. Avoid copyrighted setting names."
 )
 
-@router.post("/api/items/generate", response_model=MagicItem)
-async def items_generate(payload: MagicItemInput, engine: str | None = Query(default=None)):
-    logger.debug("items: generate request name=%s rarity=%s type=%s", payload.name, payload.rarity, payload.item_type)
+def _item_prompt(payload: MagicItemInput) -> str:
     rarity = (payload.rarity or "Uncommon").title()
     name = payload.name or "Unnamed Relic"
     itype = payload.item_type or "Wondrous item"
     attune = "requires Attunement" if payload.requires_attunement else "does not require Attunement"
-    long_prompt = (
+    return (
         "Using the following inputs, design a single magic item and return JSON ONLY with keys: "
         "name, item_type, rarity, requires_attunement, description, properties (array of strings), charges (optional int), bonus (optional int), damage (optional string).\n"
         f"Inputs: name={name}; type={itype}; rarity={rarity}; attunement={attune}.\n"
         "Guidelines: Keep power consistent with rarity. If properties grant spells, align with 'Magic Item Power by Rarity'.\n"
         + (payload.prompt or "")
     )
+
+@router.post("/api/items/generate", response_model=MagicItem)
+async def items_generate(payload: MagicItemInput, engine: str | None = Query(default=None)):
+    logger.debug("items: generate request name=%s rarity=%s type=%s", payload.name, payload.rarity, payload.item_type)
+    long_prompt = _item_prompt(payload)
     try:
         if use_local_inference(engine):
             text = await local_text_generate(long_prompt)
@@ -41,36 +45,31 @@ async def items_generate(payload: MagicItemInput, engine: str | None = Query(def
     except Exception as e:
         raise HTTPException(502, f"item generation failed: {e}")
 
+@router.post("/api/items/generate/stream")
+async def items_generate_stream(payload: MagicItemInput, engine: str | None = Query(default=None)):
+    """SSE variant of /api/items/generate: token, field, then result (or error) events."""
+    logger.debug("items: stream request name=%s rarity=%s type=%s", payload.name, payload.rarity, payload.item_type)
+    tokens = text_stream(_item_prompt(payload), MI_GUIDE, engine)
+    return sse_response(sse_generation(tokens, lambda data: MagicItem(**data)))
+
 @router.post("/api/items/save")
 async def items_save(payload: MagicItemExport):
     logger.debug("items: save %s", payload.item.name)
     item_data = {"name": payload.item.name, "item_json": payload.item.model_dump_json(), "prompt": payload.prompt}
-    result = create_item("item_library", item_data)
+    result = await run_db(create_item, "item_library", item_data)
     return result
 
 @router.get("/api/items/list")
-async def items_list(limit: int = 10, page: int = 1, search: str | None = None, sort: str = "created_desc"):
+async def items_list(limit: int = 10, page: int = 1, search: str | None = None, sort: str = "created_desc",
+                     cursor: str | None = None, include_total: bool = True):
     logger.debug("items: list limit=%s page=%s search=%s sort=%s", limit, page, search, sort)
-    result = list_items("item_library", limit, page, search, sort)
-    # Enrich items with item_type and rarity from item_json
-    con = get_db_connection()
-    for item in result["items"]:
-        row = con.execute("SELECT item_json FROM item_library WHERE id = ?", (item["id"],)).fetchone()
-        if row:
-            try:
-                item_data = json.loads(row["item_json"])
-                item["item_type"] = item_data.get("item_type", "")
-                item["rarity"] = item_data.get("rarity", "")
-            except Exception:
-                item["item_type"] = ""
-                item["rarity"] = ""
-    con.close()
+    result = await list_page("item_library", limit, page, search, sort, cursor, include_total)
     return result
 
 @router.get("/api/items/get/{item_id}")
 async def items_get(item_id: int):
     logger.debug("items: get id=%s", item_id)
-    row = get_item("item_library", item_id)
+    row = await run_db(get_item, "item_library", item_id)
     if not row: raise HTTPException(404, "Not found")
     item = json.loads(row["item_json"])
     return {"id": row["id"], "name": row["name"], "created_at": row["created_at"], "item": item}
@@ -78,7 +77,7 @@ async def items_get(item_id: int):
 @router.delete("/api/items/delete/{item_id}")
 async def items_delete(item_id: int):
     logger.debug("items: delete id=%s", item_id)
-    ok = delete_item("item_library", item_id)
+    ok = await run_db(delete_item, "item_library", item_id)
     if not ok: raise HTTPException(404, "Not found")
     return {"ok": True}
 
@@ -87,4 +86,4 @@ async def items_export_pdf(payload: MagicItemExport):
     logger.debug("items: export PDF name=%s", payload.item.name)
     buffer = await export_magic_item_pdf_content(payload.item)
     filename = f"{payload.item.name.replace(' ', '_')}_Item.pdf"
-    return StreamingResponse(buffer, media_type="application/pdf", headers={"Content-Disposition": f'attachment; filename="{filename}"'})
+    return pdf_response(buffer, filename)
@@ -1,6 +1,8 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
+from ..thumbnails import thumbnail_worker, thumbnail, nearest_size
 from ..schemas import SaveInput
-from ..database import create_item, get_item, list_items, delete_item, get_db_connection
+from ..database import create_item, get_item, delete_item, run_db, portrait_hash, blob_digest
+from ..helpers import list_page, blob_response, portrait_response
 from ..config import logger
 import json
 import base64
@@ -30,49 +32,49 @@ async def library_save(payload: SaveInput):
         "portrait_png": portrait_blob,
         "progression_json": progression_json
     }
-    result = create_item("library", item_data)
+    result = await run_db(create_item, "library", item_data)
+    if portrait_blob:
+        thumbnail_worker.enqueue(blob_digest(portrait_blob))
     return {"id": result["id"], "name": name, "created_at": result["created_at"]}
 
 @router.get("/api/library/list")
-async def library_list(limit: int = 10, page: int = 1, search: str | None = None, sort: str = "created_desc"):
+async def library_list(limit: int = 10, page: int = 1, search: str | None = None, sort: str = "created_desc",
+                       cursor: str | None = None, include_total: bool = True):
     logger.debug("library: list limit=%s page=%s search=%s sort=%s", limit, page, search, sort)
-    result = list_items("library", limit, page, search, sort)
-    # Enrich items with class and race from draft_json
-    con = get_db_connection()
+    result = await list_page("library", limit, page, search, sort, cursor, include_total)
     for item in result["items"]:
-        row = con.execute("SELECT draft_json FROM library WHERE id = ?", (item["id"],)).fetchone()
-        if row:
-            try:
-                draft_data = json.loads(row["draft_json"])
-                item["cls"] = draft_data.get("cls", "")
-                item["race"] = draft_data.get("race", "")
-            except Exception:
-                item["cls"] = ""
-                item["race"] = ""
-    con.close()
+        item["thumb_url"] = f"/api/library/{item['id']}/thumb" if item.pop("portrait_hash") else None
     return result
 
 @router.get("/api/library/get/{item_id}")
 async def library_get(item_id: int):
     logger.debug("library: get id=%s", item_id)
-    row = get_item("library", item_id)
+    row = await run_db(get_item, "library", item_id)
     if not row:
         raise HTTPException(404, "Not found")
     draft = json.loads(row["draft_json"])
     backstory = json.loads(row["backstory_json"]) if row["backstory_json"] else None
     progression = json.loads(row["progression_json"]) if row["progression_json"] else None
-    portrait_b64 = None
-    if row["portrait_png"] is not None:
-        try:
-            portrait_b64 = base64.b64encode(row["portrait_png"]).decode("ascii")
-        except Exception:
-            portrait_b64 = None
-    return {"id": row["id"], "name": row["name"], "created_at": row["created_at"], "draft": draft, "backstory": backstory, "progression": progression, "portrait_base64": portrait_b64}
+    portrait_url = f"/api/library/{row['id']}/portrait" if row["portrait_hash"] else None
+    return {"id": row["id"], "name": row["name"], "created_at": row["created_at"], "draft": draft, "backstory": backstory, "progression": progression, "portrait_url": portrait_url}
+
+@router.get("/api/library/{item_id}/portrait")
+async def library_portrait(item_id: int, request: Request):
+    digest = await run_db(portrait_hash, "library", item_id)
+    return await blob_response(request, digest, f"character_{item_id}_portrait.png")
+
+@router.get("/api/library/{item_id}/thumb")
+async def library_thumb(item_id: int, request: Request, size: int = 128):
+    digest = await run_db(portrait_hash, "library", item_id)
+    row = await thumbnail(digest, nearest_size(size)) if digest else None
+    if row is None:
+        raise HTTPException(404, "No portrait")
+    return portrait_response(request, row["data"], f'"{digest}-{row["size"]}"', f"character_{item_id}_thumb.webp", row["mime"])
 
 @router.delete("/api/library/delete/{item_id}")
 async def library_delete(item_id: int):
     logger.debug("library: delete id=%s", item_id)
-    deleted = delete_item("library", item_id)
+    deleted = await run_db(delete_item, "library", item_id)
     if not deleted:
         raise HTTPException(404, "Not found")
     return {"ok": True}
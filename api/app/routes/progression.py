@@ -1,11 +1,14 @@
 from fastapi import APIRouter, HTTPException
-from fastapi.responses import StreamingResponse, PlainTextResponse
+from fastapi.responses import PlainTextResponse
 from ..schemas import ProgressionInput, ProgressionPlan, ProgressionExport, LevelPick
-from ..helpers import fetch_json, markdown_from_progression
-from ..database import create_item, get_item, list_items, delete_item
-from ..pdf_export import export_progression_pdf_content
-from ..config import RULES_BASE, RULES_API_PREFIX, logger
+from ..helpers import fetch_json, markdown_from_progression, list_page, rules_cache
+from ..database import create_item, get_item, delete_item, run_db
+from ..pdf_export import export_progression_pdf_content, pdf_response
+from ..config import RULES_BASE, RULES_API_PREFIX, RULES_CACHE_TTL, logger
+import asyncio
 import json
+import time
+import httpx
 
 router = APIRouter()
 
@@ -23,6 +26,65 @@ ASI_LEVELS_OVERRIDES: dict[str, list[int]] = {
     "rogue": [4, 8, 10, 12, 16, 19],
 }
 
+# Parsed SRD data per class: class index -> (expires at, rules cache generation,
+# subclass names, {level: feature names}). Filled on first plan for a class; later
+# plans for it are pure in-memory work until RULES_CACHE_TTL passes or the rules
+# cache is cleared. Unknown classes are remembered as empty too.
+_CLASS_TABLES: dict[str, tuple[float, int, list[str], dict[int, list[str]]]] = {}
+
+def _not_found(e: Exception) -> bool:
+    return isinstance(e, httpx.HTTPStatusError) and e.response.status_code == 404
+
+def _parse_level_table(levels: list) -> dict[int, list[str]]:
+    table: dict[int, list[str]] = {}
+    for entry in levels or []:
+        # the bulk listing also carries subclass-specific rows; keep base class levels only
+        if not isinstance(entry, dict) or entry.get("subclass"):
+            continue
+        try:
+            lvl = int(entry.get("level"))
+        except Exception:
+            continue
+        table[lvl] = [f.get("name") for f in entry.get("features", []) or []]
+    return table
+
+async def _load_level_table(ci: str) -> tuple[dict[int, list[str]], bool]:
+    """Load a class's whole level table. Returns (table, complete)."""
+    base = f"{RULES_BASE}/{RULES_API_PREFIX}/classes/{ci}/levels"
+    try:
+        table = _parse_level_table(await fetch_json(base))
+        if table:
+            return table, True
+    except Exception as e:
+        if _not_found(e):
+            # no such class upstream; per-level lookups would all 404 as well
+            return {}, True
+        logger.debug("progression: bulk level fetch failed for %s: %s", ci, e)
+    # fall back to per-level lookups, issued concurrently
+    results = await asyncio.gather(*[fetch_json(f"{base}/{lvl}") for lvl in range(1, 21)], return_exceptions=True)
+    table = _parse_level_table([r for r in results if not isinstance(r, BaseException)])
+    return table, len(table) == 20
+
+async def _load_subclasses(ci: str) -> list[str] | None:
+    try:
+        cls_data = await fetch_json(f"{RULES_BASE}/{RULES_API_PREFIX}/classes/{ci}")
+        return [x.get("name") for x in cls_data.get("subclasses", []) or []]
+    except Exception as e:
+        return [] if _not_found(e) else None
+
+async def _class_tables(ci: str) -> tuple[list[str], dict[int, list[str]]]:
+    cached = _CLASS_TABLES.get(ci)
+    if cached is not None and cached[0] > time.monotonic() and cached[1] == rules_cache.generation:
+        return cached[2], cached[3]
+    generation = rules_cache.generation
+    subclasses, (table, complete) = await asyncio.gather(_load_subclasses(ci), _load_level_table(ci))
+    # only memoize fully loaded (or definitely missing) classes so transient upstream errors are retried
+    if subclasses is not None and complete:
+        _CLASS_TABLES[ci] = (time.monotonic() + RULES_CACHE_TTL, generation, subclasses, table)
+    else:
+        _CLASS_TABLES.pop(ci, None)
+    return subclasses or [], table
+
 @router.post("/api/progression/generate", response_model=ProgressionPlan)
 async def progression_generate(payload: ProgressionInput):
     ci = payload.class_index.lower().strip()
@@ -34,22 +96,14 @@ async def progression_generate(payload: ProgressionInput):
     avg_hp = (d.hit_die // 2) + 1
     picks: list[LevelPick] = []
 
-    try:
-        cls_data = await fetch_json(f"{RULES_BASE}/{RULES_API_PREFIX}/classes/{ci}")
-        subclasses = [x.get("name") for x in cls_data.get("subclasses", []) or []]
-    except Exception:
-        subclasses = []
+    subclasses, level_table = await _class_tables(ci)
     chosen_subclass = subclasses[0] if subclasses else None
     subclass_level = SUBCLASS_LEVELS.get(ci, 3)
 
     asi_levels = ASI_LEVELS_OVERRIDES.get(ci, ASI_LEVELS_DEFAULT)
 
     for lvl in range(1, target + 1):
-        try:
-            lvl_data = await fetch_json(f"{RULES_BASE}/{RULES_API_PREFIX}/classes/{ci}/levels/{lvl}")
-            feat_names = [f.get("name") for f in lvl_data.get("features", []) or []]
-        except Exception:
-            feat_names = []
+        feat_names = list(level_table.get(lvl, []))
 
         if lvl == 1:
             hp_gain = d.hit_die + d.abilities.CON_mod
@@ -91,28 +145,29 @@ async def progression_export_pdf(payload: ProgressionExport):
     logger.debug("progression: export PDF name=%s", payload.plan.name)
     buffer = await export_progression_pdf_content(payload.plan)
     filename = (payload.plan.name or "progression").replace(' ','_') + ".pdf"
-    return StreamingResponse(buffer, media_type="application/pdf", headers={"Content-Disposition": f'attachment; filename="{filename}"'})
+    return pdf_response(buffer, filename)
 
 @router.post("/api/progression/save")
 async def progression_save(payload: ProgressionExport):
     name = payload.plan.name or "Progression Plan"
     progression_data = {"name": name, "plan_json": payload.plan.model_dump_json(), "prompt": payload.prompt}
-    result = create_item("progression_library", progression_data)
+    result = await run_db(create_item, "progression_library", progression_data)
     return result
 
 @router.get("/api/progression/list")
-async def progression_list(limit: int = 10, page: int = 1, search: str | None = None, sort: str = "created_desc"):
-    return list_items("progression_library", limit, page, search, sort)
+async def progression_list(limit: int = 10, page: int = 1, search: str | None = None, sort: str = "created_desc",
+                           cursor: str | None = None, include_total: bool = True):
+    return await list_page("progression_library", limit, page, search, sort, cursor, include_total)
 
 @router.get("/api/progression/get/{plan_id}")
 async def progression_get(plan_id: int):
-    row = get_item("progression_library", plan_id)
+    row = await run_db(get_item, "progression_library", plan_id)
     if not row: raise HTTPException(404, "Not found")
     plan = json.loads(row["plan_json"])
     return {"id": row["id"], "name": row["name"], "created_at": row["created_at"], "plan": plan}
 
 @router.delete("/api/progression/delete/{plan_id}")
 async def progression_delete(plan_id: int):
-    ok = delete_item("progression_library", plan_id)
+    ok = await run_db(delete_item, "progression_library", plan_id)
     if not ok: raise HTTPException(404, "Not found")
     return {"ok": True}
@@ -0,0 +1,19 @@
+from fastapi import APIRouter, HTTPException, Query
+from ..database import SEARCH_TYPES, run_db
+from ..search import search
+from ..config import logger
+
+router = APIRouter()
+
+@router.get("/api/search")
+async def library_search(q: str, types: str | None = Query(default=None, description="comma-separated: " + ",".join(SEARCH_TYPES)),
+                         limit: int = 20, offset: int = 0):
+    logger.debug("search: q=%s types=%s limit=%s offset=%s", q, types, limit, offset)
+    wanted = [t.strip() for t in types.split(",") if t.strip()] if types else None
+    unknown = [t for t in wanted or [] if t not in SEARCH_TYPES]
+    if unknown:
+        raise HTTPException(400, f"unknown search type(s): {', '.join(unknown)}")
+    if limit < 1 or offset < 0:
+        raise HTTPException(400, "limit must be >= 1 and offset >= 0")
+    results = await run_db(search, q, wanted, limit, offset)
+    return {"query": q, "results": results, "next_offset": offset + limit if len(results) == limit else None}
@@ -0,0 +1,162 @@
+import asyncio
+import copy
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Awaitable, Callable
+from .config import logger
+
+class RulesCache:
+    """Two-tier cache for rules API JSON.
+    An in-memory LRU sits in front of a SQLite store on disk. Both tiers honor
+    the same TTL; the disk store is capped at `max_entries` (least recently used
+    rows are pruned). Concurrent misses for the same URL share one upstream call.
+    Callers get their own copy of the JSON and may mutate it freely.
+    """
+
+    def __init__(self, path: Path, ttl: float, memory_entries: int, max_entries: int):
+        self.path = path
+        self.ttl = ttl
+        self.memory_entries = max(1, memory_entries)
+        self.max_entries = max(1, max_entries)
+        self._mem: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._inflight: dict[str, asyncio.Task] = {}
+        # bumped by clear() so memos derived from cached JSON can tell they are stale
+        self.generation = 0
+        self._lock = threading.Lock()
+        self._con = sqlite3.connect(str(path), check_same_thread=False)
+        self._con.execute("""
+        CREATE TABLE IF NOT EXISTS rules_json (
+          url TEXT PRIMARY KEY,
+          body TEXT NOT NULL,
+          stored_at REAL NOT NULL,
+          accessed_at REAL NOT NULL
+        )
+        """)
+        self._con.execute("CREATE INDEX IF NOT EXISTS idx_rules_json_accessed ON rules_json(accessed_at)")
+        purged = self._con.execute("DELETE FROM rules_json WHERE stored_at < ?", (time.time() - ttl,)).rowcount
+        self._con.commit()
+        if purged:
+            logger.info("Rules cache: purged %d expired entries", purged)
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "coalesced": 0, "evictions": 0}
+
+    # --- disk tier (runs in a worker thread) ---
+
+    def _disk_get(self, url: str) -> tuple[float, str] | None:
+        now = time.time()
+        with self._lock:
+            row = self._con.execute("SELECT body, stored_at FROM rules_json WHERE url = ?", (url,)).fetchone()
+            if row is None:
+                return None
+            if row[1] < now - self.ttl:
+                self._con.execute("DELETE FROM rules_json WHERE url = ?", (url,))
+                self._con.commit()
+                return None
+            self._con.execute("UPDATE rules_json SET accessed_at = ? WHERE url = ?", (now, url))
+            self._con.commit()
+        return row[1], row[0]
+
+    def _disk_put(self, url: str, body: str, stored_at: float) -> None:
+        with self._lock:
+            self._con.execute(
+                "INSERT OR REPLACE INTO rules_json (url, body, stored_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (url, body, stored_at, stored_at),
+            )
+            evicted = self._con.execute(
+                "DELETE FROM rules_json WHERE url IN ("
+                " SELECT url FROM rules_json ORDER BY accessed_at ASC"
+                " LIMIT max(0, (SELECT COUNT(*) FROM rules_json) - ?))",
+                (self.max_entries,),
+            ).rowcount
+            self._con.commit()
+        if evicted:
+            self._stats["evictions"] += evicted
+
+    # --- memory tier ---
+
+    def _mem_get(self, url: str) -> Any | None:
+        hit = self._mem.get(url)
+        if hit is None:
+            return None
+        stored_at, data = hit
+        if stored_at < time.time() - self.ttl:
+            del self._mem[url]
+            return None
+        self._mem.move_to_end(url)
+        return data
+
+    def _mem_put(self, url: str, stored_at: float, data: Any) -> None:
+        self._mem[url] = (stored_at, data)
+        self._mem.move_to_end(url)
+        while len(self._mem) > self.memory_entries:
+            self._mem.popitem(last=False)
+
+    # --- public API ---
+
+    async def get_json(self, url: str, fetch: Callable[[str], Awaitable[Any]]) -> Any:
+        """Return cached JSON for `url`, calling `fetch(url)` on a miss.
+        Upstream errors propagate and are never cached.
+        """
+        data = self._mem_get(url)
+        if data is not None:
+            self._stats["memory_hits"] += 1
+            return copy.deepcopy(data)
+        task = self._inflight.get(url)
+        if task is not None:
+            self._stats["coalesced"] += 1
+        else:
+            # detached from any one caller: a cancelled waiter never cancels the load for the rest
+            task = asyncio.ensure_future(self._load(url, fetch))
+            task.add_done_callback(_retrieve)
+            self._inflight[url] = task
+        return copy.deepcopy(await asyncio.shield(task))
+
+    async def _load(self, url: str, fetch: Callable[[str], Awaitable[Any]]) -> Any:
+        try:
+            hit = await asyncio.to_thread(self._disk_get, url)
+            if hit is not None:
+                self._stats["disk_hits"] += 1
+                stored_at, body = hit
+                data = json.loads(body)
+            else:
+                self._stats["misses"] += 1
+                data = await fetch(url)
+                stored_at = time.time()
+                await asyncio.to_thread(self._disk_put, url, json.dumps(data, separators=(",", ":")), stored_at)
+            self._mem_put(url, stored_at, data)
+            return data
+        finally:
+            self._inflight.pop(url, None)
+
+    def _stats_sync(self) -> dict[str, Any]:
+        with self._lock:
+            disk_entries = self._con.execute("SELECT COUNT(*) FROM rules_json").fetchone()[0]
+        hits = self._stats["memory_hits"] + self._stats["disk_hits"] + self._stats["coalesced"]
+        lookups = hits + self._stats["misses"]
+        return {
+            **self._stats,
+            "hit_ratio": round(hits / lookups, 4) if lookups else None,
+            "memory_entries": len(self._mem),
+            "memory_capacity": self.memory_entries,
+            "disk_entries": disk_entries,
+            "disk_capacity": self.max_entries,
+            "ttl_seconds": self.ttl,
+        }
+
+    async def stats(self) -> dict[str, Any]:
+        return await asyncio.to_thread(self._stats_sync)
+
+    def clear(self) -> None:
+        self.generation += 1
+        self._mem.clear()
+        with self._lock:
+            self._con.execute("DELETE FROM rules_json")
+            self._con.commit()
+
+def _retrieve(task: asyncio.Task) -> None:
+    # Mark a failed load retrieved so one nobody awaited doesn't log "exception never retrieved"
+    if not task.cancelled():
+        task.exception()
@@ -1,5 +1,6 @@
 from typing import List, Literal, Optional
 from pydantic import BaseModel, Field
+from .config import BATCH_GENERATE_MAX
 
 # ---------- Rolls ----------
 class AbilityRoll(BaseModel):
@@ -13,6 +14,22 @@ class AbilitySet(BaseModel):
     rolls: List[AbilityRoll]
     scores: List[int]  # six totals, typically sorted desc
 
+class AbilityArrayInput(BaseModel):
+    scores: List[int] = Field(..., description="six ability scores, any order")
+
+# ---------- Dice ----------
+class DiceStatsInput(BaseModel):
+    expressions: List[str] = Field(..., description='e.g. ["3d10+5", "2d6 slashing + 1d4 fire"]')
+    percentiles: List[float] = [5, 25, 50, 75, 95]
+    include_pmf: bool = False
+    samples: int = Field(0, ge=0, le=1_000_000, description="also roll this many and report the sampled mean/sd")
+    seed: int | None = None
+
+class DiceRollInput(BaseModel):
+    expression: str
+    count: int = Field(1, ge=1, le=10_000)
+    seed: int | None = None
+
 # ---------- Character ----------
 Ability = Literal["STR", "DEX", "CON", "INT", "WIS", "CHA"]
 
@@ -24,6 +41,20 @@ class GenerateInput(BaseModel):
     scores: List[int]           # six numbers
     assignment: List[Ability]   # mapping for scores -> abilities
 
+class RandomBatchSpec(BaseModel):
+    count: int = Field(..., ge=1, le=BATCH_GENERATE_MAX, description="number of characters to roll up")
+    level_min: int = Field(1, ge=1, le=20)
+    level_max: int = Field(1, ge=1, le=20)
+    classes: Optional[List[str]] = None      # class indexes to pick from (default: all SRD classes)
+    races: Optional[List[str]] = None        # race indexes (default: all SRD races)
+    backgrounds: Optional[List[str]] = None  # background indexes (default: SRD backgrounds)
+    seed: int | None = None
+
+class BatchGenerateInput(BaseModel):
+    # exactly one of: explicit inputs, or a spec for random characters
+    characters: Optional[List[GenerateInput]] = None
+    random: Optional[RandomBatchSpec] = None
+
 class AbilityBlock(BaseModel):
     STR: int; DEX: int; CON: int; INT: int; WIS: int; CHA: int
     STR_mod: int; DEX_mod: int; CON_mod: int; INT_mod: int; WIS_mod: int; CHA_mod: int
@@ -204,3 +235,14 @@ class CreatureExport(BaseModel):
     creature: Creature
     prompt: Optional[str] = None
     portrait_base64: Optional[str] = None  # PNG base64 (no data URL prefix)
+
+# ---------- Encounters ----------
+class EncounterSimInput(BaseModel):
+    party_ids: List[int] = []       # saved characters (library ids)
+    party: List[CharacterDraft] = []
+    creature_ids: List[int] = []    # creature_library ids; repeat an id to field several
+    creatures: List[Creature] = []
+    trials: int = Field(10_000, ge=1)
+    time_budget: float | None = Field(None, gt=0, description="seconds; report the trials finished by then")
+    max_rounds: int = Field(50, ge=1, le=500, description="fights still running after this many rounds are draws")
+    seed: int | None = None
@@ -0,0 +1,71 @@
+"""Full-text search over the libraries (SQLite FTS5).
+
+The index itself is maintained by database.create_item/delete_item; this module
+queries it and provides a rebuild command for databases that predate it or
+were edited outside the API:
+
+    python -m api.app.search rebuild
+"""
+import argparse
+import re
+import time
+from typing import Any
+from .database import SEARCH_TYPES, connection, rebuild_search_index
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+def match_expression(text: str) -> str | None:
+    """Turn free text into an FTS5 query: every word must match, the last one
+    as a prefix (so results update while typing). Operators in the input are
+    treated as plain words."""
+    words = _TOKEN.findall(text)
+    if not words:
+        return None
+    terms = [f'"{w}"' for w in words]
+    terms[-1] += "*"
+    return " ".join(terms)
+
+def search(text: str, types: list[str] | None = None, limit: int = 20, offset: int = 0) -> list[dict[str, Any]]:
+    """Ranked hits (best first) with a highlighted snippet of the matching text.
+    Names weigh 10x the body in the bm25 ranking."""
+    expr = match_expression(text)
+    if expr is None:
+        return []
+    sql = (
+        "SELECT kind, ref_id, name, "
+        "snippet(search_index, 3, '<mark>', '</mark>', '…', 16) AS snippet, "
+        "bm25(search_index, 0.0, 0.0, 10.0, 1.0) AS score "
+        "FROM search_index WHERE search_index MATCH ?"
+    )
+    params: list[object] = [expr]
+    if types:
+        sql += f" AND kind IN ({', '.join('?' * len(types))})"
+        params.extend(types)
+    sql += " ORDER BY score LIMIT ? OFFSET ?"
+    params += [limit, offset]
+    rows = connection().execute(sql, params).fetchall()
+    return [
+        {"type": r["kind"], "id": r["ref_id"], "name": r["name"], "snippet": r["snippet"], "score": round(-r["score"], 6)}
+        for r in rows
+    ]
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Library full-text search index")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("rebuild", help="re-index every saved character, item, spell, creature and plan")
+    p_query = sub.add_parser("query", help="run a search from the command line")
+    p_query.add_argument("text")
+    p_query.add_argument("--type", action="append", choices=sorted(SEARCH_TYPES))
+    p_query.add_argument("--limit", type=int, default=10)
+    args = ap.parse_args()
+    if args.cmd == "rebuild":
+        t0 = time.perf_counter()
+        counts = rebuild_search_index()
+        print(f"indexed {sum(counts.values())} rows in {time.perf_counter() - t0:.2f}s: "
+              + ", ".join(f"{k}={v}" for k, v in counts.items()))
+    else:
+        for hit in search(args.text, args.type, args.limit):
+            print(f"{hit['score']:8.3f}  {hit['type']:<11} #{hit['id']:<6} {hit['name']}  {' '.join(hit['snippet'].split())}")
+
+if __name__ == "__main__":
+    main()
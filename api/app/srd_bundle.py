@@ -0,0 +1,145 @@
+"""Offline SRD snapshot bundle.
+
+`prefetch` crawls the rules API into a single gzip-compressed JSON bundle keyed
+by request path. Point RULES_BUNDLE at the file to serve fetch_json and the
+/api/rules proxy entirely from memory, with no network access.
+
+    python -m api.app.srd_bundle prefetch --out .cache/srd_bundle.json.gz
+    python -m api.app.srd_bundle info .cache/srd_bundle.json.gz
+"""
+import argparse
+import asyncio
+import gzip
+import json
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+import httpx
+from .config import RULES_BASE, RULES_API_PREFIX, logger
+
+BUNDLE_FORMAT = 1
+
+# Top-level listings crawled in full (every entry is fetched)
+RESOURCES = ["classes", "races", "backgrounds", "spells", "equipment"]
+
+class RulesBundle:
+    """Read-only, in-memory view of a prefetched bundle."""
+
+    def __init__(self, entries: dict[str, Any], meta: dict[str, Any]):
+        self.entries = entries
+        self.meta = meta
+
+    def path_for(self, url: str) -> str:
+        path = url[len(RULES_BASE):] if url.startswith(RULES_BASE) else url
+        return path.split("?", 1)[0].strip("/")
+
+    def lookup(self, path: str) -> Any | None:
+        data = self.entries.get(path)
+        if data is None and path.startswith("api/") and not path.startswith(RULES_API_PREFIX + "/"):
+            # unversioned paths (e.g. "api/classes") resolve to the bundled prefix
+            data = self.entries.get(f"{RULES_API_PREFIX}/{path[len('api/'):]}")
+        return data
+
+    async def get_json(self, url: str) -> Any:
+        data = self.lookup(self.path_for(url))
+        if data is None:
+            # mirror an upstream 404 so callers handle misses exactly as online
+            request = httpx.Request("GET", url)
+            httpx.Response(404, request=request, text="not in SRD bundle").raise_for_status()
+        return data
+
+def load_bundle(path: str | Path) -> RulesBundle:
+    t0 = time.perf_counter()
+    with gzip.open(path, "rb") as fh:
+        doc = json.loads(fh.read())
+    if doc.get("format") != BUNDLE_FORMAT:
+        raise ValueError(f"unsupported SRD bundle format {doc.get('format')!r} (expected {BUNDLE_FORMAT})")
+    entries = doc.pop("entries")
+    logger.info("Loaded SRD bundle %s: %d entries from %s in %.0f ms",
+                path, len(entries), doc.get("source"), (time.perf_counter() - t0) * 1000)
+    return RulesBundle(entries, doc)
+
+def write_bundle(path: str | Path, entries: dict[str, Any]) -> dict[str, Any]:
+    meta = {
+        "format": BUNDLE_FORMAT,
+        "source": f"{RULES_BASE}/{RULES_API_PREFIX}",
+        "created_at": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+        "count": len(entries),
+    }
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    with gzip.open(tmp, "wb", compresslevel=9) as fh:
+        fh.write(json.dumps({**meta, "entries": entries}, separators=(",", ":")).encode("utf-8"))
+    tmp.replace(path)
+    return meta
+
+async def crawl(concurrency: int = 8) -> dict[str, Any]:
+    """Fetch every bundled resource. Returns {path: json}."""
+    from .http_clients import get_client, close_http_clients
+
+    client = get_client("rules")
+    sem = asyncio.Semaphore(concurrency)
+    entries: dict[str, Any] = {}
+
+    async def get(path: str, required: bool = True) -> Any | None:
+        path = path.strip("/")
+        if path in entries:
+            return entries[path]
+        async with sem:
+            r = await client.get(f"{RULES_BASE}/{path}")
+        if r.status_code == 404 and not required:
+            return None
+        r.raise_for_status()
+        entries[path] = r.json()
+        return entries[path]
+
+    try:
+        listings = await asyncio.gather(*[get(f"{RULES_API_PREFIX}/{res}") for res in RESOURCES])
+        refs = [ref for listing in listings for ref in listing.get("results", [])]
+        await asyncio.gather(*[get(ref["url"]) for ref in refs])
+        logger.info("SRD crawl: %d resources fetched", len(refs))
+
+        class_indexes = [ref["index"] for ref in listings[RESOURCES.index("classes")].get("results", [])]
+
+        async def class_extras(ci: str):
+            levels = await get(f"{RULES_API_PREFIX}/classes/{ci}/levels")
+            # the bulk listing carries full level documents; index each under its own URL
+            for entry in levels or []:
+                if isinstance(entry, dict) and entry.get("url"):
+                    entries.setdefault(entry["url"].strip("/"), entry)
+            await get(f"{RULES_API_PREFIX}/starting-equipment/{ci}", required=False)
+
+        await asyncio.gather(*[class_extras(ci) for ci in class_indexes])
+    finally:
+        await close_http_clients()
+    return entries
+
+def _prefetch(out: str, concurrency: int) -> None:
+    t0 = time.perf_counter()
+    entries = asyncio.run(crawl(concurrency))
+    meta = write_bundle(out, entries)
+    size_kb = Path(out).stat().st_size / 1024
+    print(f"wrote {out}: {meta['count']} entries, {size_kb:.0f} KiB, {time.perf_counter() - t0:.1f}s")
+
+def _info(path: str) -> None:
+    bundle = load_bundle(path)
+    print(json.dumps(bundle.meta, indent=2))
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Offline SRD snapshot bundle")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    p_fetch = sub.add_parser("prefetch", help="crawl the rules API into a bundle")
+    p_fetch.add_argument("--out", default=".cache/srd_bundle.json.gz")
+    p_fetch.add_argument("--concurrency", type=int, default=8)
+    p_info = sub.add_parser("info", help="show bundle metadata")
+    p_info.add_argument("path")
+    args = ap.parse_args()
+    if args.cmd == "prefetch":
+        _prefetch(args.out, args.concurrency)
+    else:
+        _info(args.path)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+import json
+from typing import Any, AsyncIterator, Callable
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from .config import logger
+
+class JSONFieldStream:
+    """Incremental scanner for a JSON object arriving in chunks.
+    `feed()` returns each top-level member as soon as its value is complete,
+    so callers can surface e.g. `prose_markdown` before the object closes.
+    Leading chatter such as ```json fences is skipped.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self._pos = 0
+        self._start: int | None = None  # index of the opening brace
+        self._member_start = 0
+        self._depth = 0
+        self._in_str = False
+        self._esc = False
+        self._end: int | None = None
+
+    @property
+    def done(self) -> bool:
+        return self._end is not None
+
+    def document(self) -> str:
+        """The complete object text (or everything from the opening brace so far)."""
+        if self._start is None:
+            return self.text
+        return self.text[self._start:(self._end + 1) if self._end is not None else None]
+
+    def feed(self, chunk: str) -> list[tuple[str, Any]]:
+        self.text += chunk
+        out: list[tuple[str, Any]] = []
+        t = self.text
+        i = self._pos
+        while i < len(t) and self._end is None:
+            ch = t[i]
+            if self._start is None:
+                if ch == "{":
+                    self._start, self._depth, self._member_start = i, 1, i + 1
+            elif self._in_str:
+                if self._esc:
+                    self._esc = False
+                elif ch == "\\":
+                    self._esc = True
+                elif ch == '"':
+                    self._in_str = False
+            elif ch == '"':
+                self._in_str = True
+            elif ch in "{[":
+                self._depth += 1
+            elif ch in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    self._emit(t[self._member_start:i], out)
+                    self._end = i
+            elif ch == "," and self._depth == 1:
+                self._emit(t[self._member_start:i], out)
+                self._member_start = i + 1
+            i += 1
+        self._pos = i
+        return out
+
+    @staticmethod
+    def _emit(member: str, out: list[tuple[str, Any]]) -> None:
+        if not member.strip():
+            return
+        try:
+            out.extend(json.loads("{" + member + "}").items())
+        except ValueError:
+            pass
+
+def sse(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+async def sse_generation(tokens: AsyncIterator[str], finalize: Callable[[dict], BaseModel]) -> AsyncIterator[str]:
+    """Relay an LLM token stream as Server-Sent Events.
+    Events: `token` (raw text as it arrives), `field` (each top-level JSON
+    member once complete), then `result` (the validated model) or `error`.
+    """
+    parser = JSONFieldStream()
+    try:
+        async for tok in tokens:
+            if not tok:
+                continue
+            yield sse("token", {"text": tok})
+            for key, value in parser.feed(tok):
+                yield sse("field", {"key": key, "value": value})
+        try:
+            data = json.loads(parser.document())
+        except Exception as e:
+            raise HTTPException(502, f"LLM returned non-JSON: {e}")
+        yield sse("result", finalize(data).model_dump())
+    except HTTPException as e:
+        yield sse("error", {"status": e.status_code, "detail": e.detail})
+    except Exception as e:
+        logger.exception("streaming generation failed")
+        yield sse("error", {"status": 502, "detail": f"generation failed: {e}"})
+
+def sse_response(events: AsyncIterator[str]) -> StreamingResponse:
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
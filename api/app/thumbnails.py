@@ -0,0 +1,109 @@
+"""WebP thumbnails for saved portraits.
+
+Saves enqueue the portrait hash on `thumbnail_worker`, which renders every
+size in THUMBNAIL_SIZES off the request path; the thumb endpoints render on
+demand if a request gets there first. Existing libraries are backfilled with:
+
+    python -m api.app.thumbnails backfill
+"""
+import argparse
+import asyncio
+import io
+import time
+from PIL import Image
+from .config import logger, THUMBNAIL_SIZES, THUMBNAIL_QUALITY
+from .database import run_db, close_db, blob_bytes, put_thumbnails, get_thumbnail, portraits_missing_thumbnails
+
+def make_thumbnails(png: bytes, sizes: tuple[int, ...] = THUMBNAIL_SIZES, quality: int = THUMBNAIL_QUALITY) -> dict[int, bytes]:
+    """Downscale once per size (largest first, each from the previous) and encode WebP."""
+    out: dict[int, bytes] = {}
+    with Image.open(io.BytesIO(png)) as src:
+        # palette / LA images and tRNS transparency keep their alpha too
+        alpha = "A" in src.getbands() or src.mode in ("P", "LA", "PA") or "transparency" in src.info
+        img = src.convert("RGBA" if alpha else "RGB")
+    for size in sorted(sizes, reverse=True):
+        img.thumbnail((size, size), Image.LANCZOS)
+        buf = io.BytesIO()
+        img.save(buf, format="WEBP", quality=quality, method=4)
+        out[size] = buf.getvalue()
+    return out
+
+def _has_thumbnails(digest: str) -> bool:
+    return all(get_thumbnail(digest, size) is not None for size in THUMBNAIL_SIZES)
+
+async def render_thumbnails(digest: str) -> bool:
+    """Render and store all sizes for one portrait. False if it is gone.
+    Reads and writes go through the DB pool; only the resize/encode runs on a worker thread."""
+    if await run_db(_has_thumbnails, digest):
+        return True
+    png = await run_db(blob_bytes, digest)
+    if png is None:
+        return False
+    thumbs = await asyncio.to_thread(make_thumbnails, png)
+    await run_db(put_thumbnails, digest, thumbs)
+    return True
+
+class ThumbnailWorker:
+    """Background renderer fed by library/creature saves. Duplicate hashes that
+    are already queued are skipped; failures are logged and dropped."""
+
+    def __init__(self):
+        self._queue: asyncio.Queue[str] | None = None
+        self._queued: set[str] = set()
+
+    def enqueue(self, digest: str | None) -> None:
+        if not digest or digest in self._queued:
+            return
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+        self._queued.add(digest)
+        self._queue.put_nowait(digest)
+
+    async def run(self) -> None:
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+        while True:
+            digest = await self._queue.get()
+            try:
+                await render_thumbnails(digest)
+            except Exception:
+                logger.exception("thumbnail rendering failed for %s", digest[:12])
+            finally:
+                self._queued.discard(digest)
+
+thumbnail_worker = ThumbnailWorker()
+
+def nearest_size(size: int) -> int:
+    """Smallest configured size that covers `size` (or the largest one)."""
+    return next((s for s in THUMBNAIL_SIZES if s >= size), THUMBNAIL_SIZES[-1])
+
+async def thumbnail(digest: str, size: int):
+    """Stored thumbnail row for a portrait, rendering it now if the worker hasn't."""
+    row = await run_db(get_thumbnail, digest, size)
+    if row is None and await render_thumbnails(digest):
+        row = await run_db(get_thumbnail, digest, size)
+    return row
+
+async def backfill() -> None:
+    try:
+        missing = await run_db(portraits_missing_thumbnails, THUMBNAIL_SIZES)
+        t0 = time.perf_counter()
+        for n, digest in enumerate(missing, 1):
+            await render_thumbnails(digest)
+            if n % 50 == 0:
+                print(f"{n}/{len(missing)}")
+        print(f"rendered thumbnails for {len(missing)} portraits in {time.perf_counter() - t0:.1f}s "
+              f"(sizes {', '.join(map(str, THUMBNAIL_SIZES))})")
+    finally:
+        close_db()
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Portrait thumbnails")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("backfill", help="render missing thumbnails for every saved portrait")
+    args = ap.parse_args()
+    if args.cmd == "backfill":
+        asyncio.run(backfill())
+
+if __name__ == "__main__":
+    main()
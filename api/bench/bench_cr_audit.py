@@ -0,0 +1,72 @@
+"""Benchmark the creature library CR audit.
+
+Fills a temporary database with synthetic stat blocks (attacks with dice,
+Multiattack, save-DC actions, resistances, stated CRs that are sometimes far
+off), then times audit_library: text parsing per creature plus the single
+vectorized estimate pass.
+
+    python -m api.bench.bench_cr_audit --rows 100000
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+
+_DAMAGE = ["slashing", "piercing", "bludgeoning", "fire", "cold", "poison", "necrotic"]
+
+def _creature(rng: random.Random, i: int) -> dict:
+    from ..app.cr_audit import CR_TABLE
+    row = rng.randrange(len(CR_TABLE))
+    cr, prof, ac, max_hp, atk, max_dmg, dc = CR_TABLE[row]
+    stated = CR_TABLE[min(len(CR_TABLE) - 1, max(0, row + rng.choice([0, 0, 0, 1, -1, 4, -4])))][0]
+    attacks = rng.randint(1, 3)
+    per_attack = max(1, max_dmg // attacks)
+    sides = rng.choice([4, 6, 8, 10, 12])
+    dice = max(1, int(per_attack / ((sides + 1) / 2 + 1)))
+    bonus = max(0, per_attack - int(dice * (sides + 1) / 2))
+    avg = int(dice * (sides + 1) / 2) + bonus
+    actions = [f"Multiattack. The creature makes {['one', 'two', 'three'][attacks - 1]} attacks."] if attacks > 1 else []
+    actions.append(f"Strike. Melee Weapon Attack: +{atk + rng.randint(-1, 1)} to hit, reach 5 ft., one target. "
+                   f"Hit: {avg} ({dice}d{sides} + {bonus}) {rng.choice(_DAMAGE)} damage.")
+    if rng.random() < 0.3:
+        actions.append(f"Breath (Recharge 5-6). Each creature in a 30-foot cone must make a DC {dc} Dexterity saving throw, "
+                       f"taking {max_dmg} ({max(1, max_dmg * 2 // 7)}d6) {rng.choice(_DAMAGE)} damage on a failed save.")
+    data = {
+        "name": f"Creature {i}", "size": "Medium", "creature_type": "Monstrosity", "challenge_rating": stated,
+        "armor_class": ac + rng.randint(-2, 2), "hit_points": rng.randint(max_hp - 14, max_hp), "hit_dice": "10d10",
+        "speed": "30 ft.", "saving_throws": ["DEX +5", "CON +6", "WIS +3"][: rng.randint(0, 3)],
+        "damage_resistances": [rng.choice(_DAMAGE)] * (rng.random() < 0.2), "damage_immunities": [],
+        "actions": actions, "description": "A synthetic creature.",
+    }
+    return {"name": data["name"], "creature_json": json.dumps(data)}
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--rows", type=int, default=100_000)
+    ap.add_argument("--seed", type=int, default=7)
+    args = ap.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="forge-bench-")
+    os.chdir(workdir)  # keep .cache and the database out of the repo
+    os.environ["DB_PATH"] = os.path.join(workdir, "creatures.db")
+    from ..app import database as db
+    from ..app.cr_audit import audit_library
+
+    db.DB_PATH = os.environ["DB_PATH"]
+    db.init_db()
+    rng = random.Random(args.seed)
+    for start in range(0, args.rows, 1000):
+        db.insert_rows("creature_library", [_creature(rng, i) for i in range(start, min(args.rows, start + 1000))])
+
+    t0 = time.perf_counter()
+    result = audit_library(threshold=2, limit=10)
+    total = time.perf_counter() - t0
+    print(f"audited {result['audited']} creatures in {total:.2f}s "
+          f"(parse {result['seconds']['parse']:.2f}s, estimate {result['seconds']['estimate']:.3f}s): "
+          f"{result['flagged']} flagged, {result['no_damage_parsed']} without parsed damage")
+    db.close_db()
+
+if __name__ == "__main__":
+    main()
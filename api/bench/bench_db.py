@@ -0,0 +1,120 @@
+"""Benchmark mixed library reads and writes under concurrency.
+
+Runs the same workload (paged lists, detail fetches and saves of characters
+with a portrait BLOB) two ways, each against its own fresh database:
+
+  inline  the old shape: queries run directly inside the async handlers on a
+          new rollback-journal connection per call
+  pooled  database.run_db: a dedicated thread pool, one reused WAL connection
+          per worker with tuned pragmas and cached statements
+
+Besides throughput and per-operation latency it reports event-loop lag, which
+is what every other in-flight request (e.g. an LLM call) experiences.
+
+    python -m api.bench.bench_db --clients 32 --ops 2000 --write-ratio 0.2 --blob-kb 256
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sqlite3
+import tempfile
+import time
+
+from .timing import pct, summarize
+
+def _portrait(blob: bytes, i: int) -> bytes:
+    # distinct bytes per save so the content-addressed blob store can't dedupe them
+    return blob[:-8] + i.to_bytes(8, "big")
+
+def _draft(i: int) -> str:
+    return json.dumps({"name": f"Hero {i}", "cls": random.choice(["Wizard", "Fighter", "Cleric"]),
+                       "race": random.choice(["Elf", "Dwarf", "Human"]), "level": 1 + i % 20})
+
+async def _loop_lag(stop: asyncio.Event, samples: list[float], tick: float = 0.005) -> None:
+    while not stop.is_set():
+        t0 = time.perf_counter()
+        await asyncio.sleep(tick)
+        samples.append((time.perf_counter() - t0 - tick) * 1000)
+
+async def _workload(db, mode: str, clients: int, ops: int, write_ratio: float, blob: bytes, seeded: int) -> None:
+    if mode == "inline":
+        async def call(fn, *args):
+            return fn(*args)
+    else:
+        call = db.run_db
+    reads: list[float] = []
+    writes: list[float] = []
+    per_client = max(1, ops // clients)
+
+    async def client(seed: int) -> None:
+        rng = random.Random(seed)
+        for n in range(per_client):
+            t0 = time.perf_counter()
+            if rng.random() < write_ratio:
+                i = seeded + seed * per_client + n
+                await call(db.create_item, "library", {"name": f"Hero {i}", "draft_json": _draft(i), "portrait_png": _portrait(blob, i)})
+                writes.append((time.perf_counter() - t0) * 1000)
+            elif rng.random() < 0.5:
+                await call(db.list_items, "library", 20, rng.randint(1, 20), None, "created_desc")
+                reads.append((time.perf_counter() - t0) * 1000)
+            else:
+                await call(db.get_item, "library", rng.randint(1, seeded))
+                reads.append((time.perf_counter() - t0) * 1000)
+
+    lag: list[float] = []
+    stop = asyncio.Event()
+    ticker = asyncio.create_task(_loop_lag(stop, lag))
+    t0 = time.perf_counter()
+    await asyncio.gather(*[client(c) for c in range(clients)])
+    elapsed = time.perf_counter() - t0
+    stop.set()
+    await ticker
+    total = len(reads) + len(writes)
+    print(f"{mode:>6}: {total / elapsed:8.1f} ops/s")
+    print(f"        reads  {summarize(reads)}  (n={len(reads)})")
+    if writes:
+        print(f"        writes {summarize(writes)}  (n={len(writes)})")
+    if lag:
+        print(f"        loop lag p95={pct(lag, 0.95):8.2f} ms  max={max(lag):8.2f} ms")
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--clients", type=int, default=32)
+    ap.add_argument("--ops", type=int, default=2000)
+    ap.add_argument("--write-ratio", type=float, default=0.2)
+    ap.add_argument("--blob-kb", type=int, default=256, help="portrait size stored with each write")
+    ap.add_argument("--seed-rows", type=int, default=200)
+    args = ap.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="forge-bench-")
+    os.chdir(workdir)  # keep .cache and the databases out of the repo
+    os.environ["DB_PATH"] = os.path.join(workdir, "bootstrap.db")
+    from ..app import database as db
+
+    blob = os.urandom(args.blob_kb * 1024)
+    pooled_connection = db.connection
+
+    def plain_connection() -> sqlite3.Connection:
+        con = sqlite3.connect(db.DB_PATH)
+        con.row_factory = sqlite3.Row
+        return con
+
+    for mode in ("inline", "pooled"):
+        db.DB_PATH = os.path.join(workdir, f"{mode}.db")
+        db.init_db()
+        for i in range(args.seed_rows):
+            db.create_item("library", {"name": f"Hero {i}", "draft_json": _draft(i), "portrait_png": _portrait(blob, i)})
+        db.close_db()
+        if mode == "inline":
+            sqlite3.connect(db.DB_PATH).execute("PRAGMA journal_mode = DELETE").fetchall()
+            db.connection = plain_connection
+        else:
+            db.connection = pooled_connection
+        asyncio.run(_workload(db, mode, args.clients, args.ops, args.write_ratio, blob, args.seed_rows))
+        db.close_db()
+    db.connection = pooled_connection
+
+if __name__ == "__main__":
+    main()
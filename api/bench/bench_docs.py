@@ -0,0 +1,106 @@
+"""Benchmark compressed vs plain JSON document storage.
+
+Builds the same synthetic character library (draft, backstory with prose and
+a level-by-level progression plan per row) twice, once with plain JSON TEXT
+documents and once with DB_COMPRESS_DOCUMENTS, then reports database size
+after VACUUM and get_item latency (fetch + decode + json.loads, as
+/api/library/get does) for random ids.
+
+    python -m api.bench.bench_docs --rows 100000 --reads 5000
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+
+from .timing import summarize
+
+_WORDS = (
+    "the of and to a in that with his her their was for as from on by had who when which after before "
+    "village temple guild family father mother brother sister mentor friend rival enemy oath debt "
+    "magic arcane divine ancient secret shadow blood dragon sword shield city kingdom war storm "
+    "forest mountain river ruins tower library scroll relic curse prophecy heir exile pilgrim thief "
+    "learned swore vanished returned betrayed protected discovered forgotten burned hunted sought"
+).split()
+_CLASSES = ["Wizard", "Fighter", "Cleric", "Rogue", "Ranger", "Bard", "Paladin", "Warlock"]
+_RACES = ["Elf", "Dwarf", "Human", "Halfling", "Tiefling", "Gnome", "Half-Orc", "Dragonborn"]
+
+def _prose(rng: random.Random, words: int) -> str:
+    out = []
+    for _ in range(max(1, words // 12)):
+        sentence = rng.choices(_WORDS, k=12)
+        out.append(sentence[0].capitalize() + " " + " ".join(sentence[1:]) + ".")
+    return " ".join(out)
+
+def _row(rng: random.Random, i: int) -> dict:
+    cls, race = rng.choice(_CLASSES), rng.choice(_RACES)
+    scores = {k: rng.randint(8, 18) for k in ("STR", "DEX", "CON", "INT", "WIS", "CHA")}
+    scores.update({f"{k}_mod": (v - 10) // 2 for k, v in list(scores.items())})
+    level = rng.randint(1, 20)
+    draft = {
+        "name": f"Hero {i}", "level": level, "cls": cls, "race": race, "background": "Acolyte", "hit_die": 8,
+        "proficiency_bonus": 2 + (level - 1) // 4, "abilities": scores, "speed": 30, "saving_throws": ["STR", "CON"],
+        "languages": ["Common", "Elvish"], "proficiencies": [{"type": "skill", "name": f"Skill: {w.title()}", "source": "class"} for w in rng.sample(_WORDS, 4)],
+        "equipment": ["Backpack", "Bedroll", "Rations (10 days)", "Waterskin"], "armor_class_basic": 10 + scores["DEX_mod"],
+        "features": ["Second Wind", "Fighting Style", "Darkvision"], "spell_slots": None,
+    }
+    backstory = {
+        "summary": _prose(rng, 40), "traits": [_prose(rng, 12), _prose(rng, 12)], "ideals": [_prose(rng, 12)],
+        "bonds": [_prose(rng, 12)], "flaws": [_prose(rng, 12)], "hooks": [_prose(rng, 24) for _ in range(3)],
+        "prose_markdown": "## Backstory\n\n" + "\n\n".join(_prose(rng, 90) for _ in range(4)),
+    }
+    plan = {
+        "name": f"Hero {i} plan", "class_index": cls.lower(), "target_level": 20, "notes_markdown": _prose(rng, 60),
+        "picks": [{"level": lvl, "hp_gain": rng.randint(1, 10), "features": [f"{rng.choice(_WORDS).title()} Feature"], "subclass": None,
+                   "asi": "+2 STR" if lvl % 4 == 0 else None, "spells_known": [], "prepared": [], "notes": _prose(rng, 12)}
+                  for lvl in range(1, 21)],
+    }
+    return {"name": draft["name"], "draft_json": json.dumps(draft), "backstory_json": json.dumps(backstory),
+            "progression_json": json.dumps(plan)}
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--rows", type=int, default=100_000)
+    ap.add_argument("--reads", type=int, default=5000)
+    ap.add_argument("--seed", type=int, default=7)
+    args = ap.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="forge-bench-")
+    os.chdir(workdir)  # keep .cache and the databases out of the repo
+    os.environ["DB_PATH"] = os.path.join(workdir, "bootstrap.db")
+    from ..app import database as db, documents
+
+    for mode in ("plain", "compressed"):
+        documents.DB_COMPRESS_DOCUMENTS = mode == "compressed"
+        db.DB_PATH = os.path.join(workdir, f"{mode}.db")
+        db.init_db()
+        rng = random.Random(args.seed)
+        t0 = time.perf_counter()
+        for start in range(0, args.rows, 1000):
+            db.insert_rows("library", [_row(rng, i) for i in range(start, min(args.rows, start + 1000))])
+        build = time.perf_counter() - t0
+        db.close_db()
+        con = db.get_db_connection()
+        con.execute("VACUUM")
+        docs = con.execute(
+            "SELECT SUM(length(CAST(draft_json AS BLOB)) + length(CAST(backstory_json AS BLOB)) "
+            "+ length(CAST(progression_json AS BLOB))) FROM library"
+        ).fetchone()[0]
+        con.close()
+        size = os.path.getsize(db.DB_PATH)
+
+        rng = random.Random(args.seed)
+        reads: list[float] = []
+        for _ in range(args.reads):
+            t0 = time.perf_counter()
+            row = db.get_item("library", rng.randint(1, args.rows))
+            json.loads(row["draft_json"]), json.loads(row["backstory_json"]), json.loads(row["progression_json"])
+            reads.append((time.perf_counter() - t0) * 1000)
+        db.close_db()
+        print(f"{mode:>10}: db {size / 2**20:8.1f} MB  documents {docs / 2**20:8.1f} MB  "
+              f"insert {args.rows / build:8.0f} rows/s  get_item {summarize(reads)}")
+
+if __name__ == "__main__":
+    main()
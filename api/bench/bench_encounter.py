@@ -0,0 +1,76 @@
+"""Benchmark the Monte Carlo encounter simulator.
+
+A level-N party of four (fighter, wizard, cleric, rogue) against an ogre, two
+goblins and a fire-breathing drake. Reports trials/s for one chunk run
+in-process, then for the process pool at 1, 2, 4, ... workers up to the core
+count (pool start-up excluded), with trials/s per core.
+
+    python -m api.bench.bench_encounter --trials 200000 --level 3
+"""
+import argparse
+import os
+import time
+
+from ..app import encounter
+from ..app.encounter import character_combatant, creature_combatant, simulate, simulate_chunk
+
+_KEYS = ["STR", "DEX", "CON", "INT", "WIS", "CHA"]
+
+def _draft(cls: str, level: int, scores: list[int], equipment: list[str], hit_die: int, saves: list[str]) -> dict:
+    ab = dict(zip(_KEYS, scores))
+    ab.update({f"{k}_mod": (v - 10) // 2 for k, v in zip(_KEYS, scores)})
+    return {"name": f"{cls} {level}", "level": level, "cls": cls, "race": "Human", "background": "Acolyte", "hit_die": hit_die,
+            "proficiency_bonus": 2 + (level - 1) // 4, "abilities": ab, "speed": 30, "saving_throws": saves,
+            "languages": ["Common"], "equipment": equipment, "armor_class_basic": 10 + ab["DEX_mod"]}
+
+def party(level: int) -> list:
+    return [character_combatant(d) for d in (
+        _draft("Fighter", level, [16, 12, 14, 10, 12, 8], ["1x Chain Mail", "1x Shield", "1x Longsword"], 10, ["Strength", "Constitution"]),
+        _draft("Wizard", level, [8, 14, 14, 16, 12, 10], ["1x Quarterstaff"], 6, ["Intelligence", "Wisdom"]),
+        _draft("Cleric", level, [14, 10, 14, 10, 16, 12], ["1x Scale Mail", "1x Shield"], 8, ["Wisdom", "Charisma"]),
+        _draft("Rogue", level, [10, 16, 12, 14, 10, 12], ["1x Leather Armor"], 8, ["Dexterity", "Intelligence"]),
+    )]
+
+def creatures() -> list:
+    ogre = {"name": "Ogre", "hit_points": 59, "armor_class": 11, "ability_scores": {"DEX": 8},
+            "actions": ["Greatclub. Melee Weapon Attack: +6 to hit, reach 5 ft., one target. Hit: 13 (2d8 + 4) bludgeoning damage."]}
+    goblin = {"name": "Goblin", "hit_points": 7, "armor_class": 15, "ability_scores": {"DEX": 14},
+              "actions": ["Scimitar. Melee Weapon Attack: +4 to hit, reach 5 ft., one target. Hit: 5 (1d6 + 2) slashing damage."]}
+    drake = {"name": "Drake", "hit_points": 60, "armor_class": 15, "ability_scores": {"DEX": 12}, "saving_throws": ["DEX +3"],
+             "actions": ["Multiattack. The drake makes two attacks.",
+                         "Bite. Melee Weapon Attack: +5 to hit, reach 5 ft., one target. Hit: 8 (1d10 + 3) piercing damage.",
+                         "Fire Breath (Recharge 5-6). The drake exhales fire in a 15-foot cone. Each creature in that area must make "
+                         "a DC 13 Dexterity saving throw, taking 22 (4d10) fire damage on a failed save, or half as much on a success."]}
+    return [creature_combatant(c) for c in (ogre, goblin, goblin, drake)]
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--trials", type=int, default=200_000)
+    ap.add_argument("--level", type=int, default=3)
+    ap.add_argument("--seed", type=int, default=1)
+    args = ap.parse_args()
+    heroes, foes = party(args.level), creatures()
+
+    t0 = time.perf_counter()
+    simulate_chunk(heroes, foes, encounter.SIM_CHUNK_TRIALS, args.seed, 50)
+    single = encounter.SIM_CHUNK_TRIALS / (time.perf_counter() - t0)
+    print(f"in-process chunk: {single:10,.0f} trials/s")
+
+    cores = os.cpu_count() or 1
+    workers, counts = 1, []
+    while workers < cores:
+        counts.append(workers)
+        workers *= 2
+    counts.append(cores)
+    for n in counts:
+        encounter.SIM_WORKERS = n
+        encounter.close_sim_pool()
+        simulate(heroes, foes, trials=2 * n * encounter.SIM_CHUNK_TRIALS, seed=0)  # start the workers
+        result = simulate(heroes, foes, trials=args.trials, seed=args.seed)
+        rate = result["trials"] / result["seconds"]
+        print(f"{n:3d} workers: {rate:10,.0f} trials/s  {rate / n:10,.0f} per core  "
+              f"(win rate {result['party_win_rate']:.4f} {result['party_win_rate_ci95']}, rounds {result['rounds']['mean']})")
+    encounter.close_sim_pool()
+
+if __name__ == "__main__":
+    main()
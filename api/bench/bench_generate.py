@@ -0,0 +1,67 @@
+"""Benchmark /api/generate latency against a stand-in rules server.
+
+Compares the old one-after-another lookups with the concurrent fan-out in
+routes/character.generate_character. The rules cache is cleared before every
+iteration so each run pays the upstream round trips.
+
+    python -m api.bench.bench_generate --delay-ms 80 --iterations 20
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from .stub_rules import StubRulesServer, PREFIX
+from .timing import summarize
+
+async def _run(iterations: int, delay_ms: float) -> None:
+    from ..app.routes.character import generate_character
+    from ..app.helpers import fetch_json, rules_cache
+    from ..app.http_clients import open_http_clients, close_http_clients
+    from ..app.schemas import GenerateInput
+    from ..app.config import RULES_BASE
+
+    payload = GenerateInput(
+        class_index="wizard", race_index="elf", background_index="acolyte", level=5,
+        scores=[15, 14, 13, 12, 10, 8], assignment=["INT", "DEX", "CON", "WIS", "CHA", "STR"],
+    )
+    base = f"{RULES_BASE}/{PREFIX}"
+
+    async def sequential():
+        # the pre-fan-out request shape: five awaited lookups in a row
+        await fetch_json(f"{base}/classes/wizard")
+        await fetch_json(f"{base}/races/elf")
+        await fetch_json(f"{base}/backgrounds/acolyte")
+        await fetch_json(f"{base}/starting-equipment/wizard")
+        await fetch_json(f"{base}/classes/wizard/levels/5")
+
+    async def concurrent():
+        await generate_character(payload)
+
+    await open_http_clients()
+    try:
+        await concurrent()  # warm the connection pool
+        for label, fn in (("sequential", sequential), ("concurrent", concurrent)):
+            samples: list[float] = []
+            for _ in range(iterations):
+                rules_cache.clear()
+                t0 = time.perf_counter()
+                await fn()
+                samples.append((time.perf_counter() - t0) * 1000)
+            print(f"{label:>10}: {summarize(samples)}  (upstream delay {delay_ms:.0f} ms x 5 lookups)")
+    finally:
+        await close_http_clients()
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--delay-ms", type=float, default=80.0, help="injected upstream latency per request")
+    ap.add_argument("--iterations", type=int, default=20)
+    args = ap.parse_args()
+    with StubRulesServer(args.delay_ms) as server:
+        os.environ["RULES_BASE_URL"] = server.base_url
+        os.chdir(tempfile.mkdtemp(prefix="forge-bench-"))  # keep .cache out of the repo
+        asyncio.run(_run(args.iterations, args.delay_ms))
+
+if __name__ == "__main__":
+    main()
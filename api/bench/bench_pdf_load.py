@@ -0,0 +1,129 @@
+"""Load test: character PDF exports mixed with library reads.
+
+Drives the ASGI app in-process with concurrent clients for a fixed time per
+mode: some clients export a large character sheet (portrait, 700-word
+backstory, 20-level progression) via /api/export/pdf, the rest page and
+fetch /api/library. Modes:
+
+  inline  PDF_WORKERS=0: reportlab and image decoding on the event loop (old shape)
+  pool    the bounded process pool (PDF_WORKERS workers, PDF_QUEUE_MAX queue)
+
+Reports PDF and read throughput/latency, 503s from the queue limit and
+event-loop lag.
+
+    python -m api.bench.bench_pdf_load --seconds 10 --pdf-clients 4 --read-clients 16 --workers 2
+"""
+import argparse
+import asyncio
+import base64
+import io
+import json
+import os
+import random
+import tempfile
+import time
+
+import httpx
+
+from .bench_db import _draft, _loop_lag
+from .bench_pdf_wrap import corpus
+from .timing import pct, summarize
+
+def _portrait_b64(px: int) -> str:
+    from PIL import Image
+    img = Image.frombytes("RGB", (px, px), os.urandom(px * px * 3))  # noise: no compression shortcuts
+    buf = io.BytesIO()
+    img.save(buf, format="PNG")
+    return base64.b64encode(buf.getvalue()).decode()
+
+def _export_body(portrait: str) -> dict:
+    backstory, plan, _ = corpus(3)
+    ab = {"STR": 16, "DEX": 12, "CON": 14, "INT": 10, "WIS": 12, "CHA": 8,
+          "STR_mod": 3, "DEX_mod": 1, "CON_mod": 2, "INT_mod": 0, "WIS_mod": 1, "CHA_mod": -1}
+    draft = {"name": "Load Test", "level": 20, "cls": "Barbarian", "race": "Half-Orc", "background": "Acolyte", "hit_die": 12,
+             "proficiency_bonus": 6, "abilities": ab, "speed": 30, "saving_throws": ["STR", "CON"], "languages": ["Common", "Orc"],
+             "armor_class_basic": 11, "features": [p.features[0] for p in plan.picks],
+             "equipment": ["1x Greataxe", "2x Handaxe", "1x Explorer's Pack"]}
+    return {"draft": draft, "backstory": backstory.model_dump(), "progression": plan.model_dump(), "portrait_base64": portrait}
+
+async def _run(app, mode: str, seconds: float, pdf_clients: int, read_clients: int, rows: int, body: dict) -> None:
+    pdfs: list[float] = []
+    reads: list[float] = []
+    busy = 0
+    deadline = time.perf_counter() + seconds
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+        async def exporter() -> None:
+            nonlocal busy
+            while time.perf_counter() < deadline:
+                t0 = time.perf_counter()
+                r = await client.post("/api/export/pdf", json=body)
+                if r.status_code == 503:
+                    busy += 1
+                    await asyncio.sleep(0.05)
+                    continue
+                assert r.status_code == 200 and r.content.startswith(b"%PDF"), r.status_code
+                pdfs.append((time.perf_counter() - t0) * 1000)
+
+        async def reader(seed: int) -> None:
+            rng = random.Random(seed)
+            while time.perf_counter() < deadline:
+                t0 = time.perf_counter()
+                if rng.random() < 0.5:
+                    r = await client.get(f"/api/library/list?limit=20&page={rng.randint(1, 10)}")
+                else:
+                    r = await client.get(f"/api/library/get/{rng.randint(1, rows)}")
+                assert r.status_code == 200, r.status_code
+                reads.append((time.perf_counter() - t0) * 1000)
+
+        lag: list[float] = []
+        stop = asyncio.Event()
+        ticker = asyncio.create_task(_loop_lag(stop, lag))
+        t0 = time.perf_counter()
+        await asyncio.gather(*[exporter() for _ in range(pdf_clients)], *[reader(i) for i in range(read_clients)])
+        elapsed = time.perf_counter() - t0
+        stop.set()
+        await ticker
+    print(f"{mode:>6}: {len(pdfs) / elapsed:7.1f} PDFs/s  {len(reads) / elapsed:8.1f} reads/s  503s={busy}")
+    if pdfs:
+        print(f"        pdf   {summarize(pdfs)}  (n={len(pdfs)})")
+    print(f"        reads {summarize(reads)}  (n={len(reads)})")
+    print(f"        loop lag p95={pct(lag, 0.95):8.2f} ms  max={max(lag):8.2f} ms")
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--seconds", type=float, default=10)
+    ap.add_argument("--pdf-clients", type=int, default=4)
+    ap.add_argument("--read-clients", type=int, default=16)
+    ap.add_argument("--workers", type=int, default=2)
+    ap.add_argument("--queue-max", type=int, default=16)
+    ap.add_argument("--portrait-px", type=int, default=768)
+    ap.add_argument("--rows", type=int, default=500)
+    args = ap.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="forge-bench-")
+    os.chdir(workdir)  # keep .cache and the database out of the repo
+    os.environ["DB_PATH"] = os.path.join(workdir, "library.db")
+    from ..app import database as db
+    from ..app.main import app
+    from ..app.pdf_export import pdf_pool
+
+    db.DB_PATH = os.environ["DB_PATH"]
+    db.init_db()
+    db.insert_rows("library", [{"name": f"Hero {i}", "draft_json": _draft(i)} for i in range(args.rows)])
+    body = _export_body(_portrait_b64(args.portrait_px))
+    print(f"export body {len(json.dumps(body)) / 1024:.0f} KB")
+
+    for mode, workers in (("inline", 0), ("pool", args.workers)):
+        pdf_pool.close()
+        pdf_pool.workers, pdf_pool.queue_max = workers, args.queue_max
+        if workers:
+            async def warm() -> None:  # start the worker processes outside the timed run
+                await asyncio.gather(*[pdf_pool.render("character", {"draft": body["draft"]}) for _ in range(workers)])
+            asyncio.run(warm())
+        asyncio.run(_run(app, mode, args.seconds, args.pdf_clients, args.read_clients, args.rows, body))
+        db.close_db()
+    pdf_pool.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""Benchmark PDF text wrapping: re-measuring stringWidth vs cached glyph widths.
+
+Wraps a 700-word "long" backstory (with an unbreakable URL) at page width and
+a 20-level progression table at its column widths, using the previous wrapper
+(stringWidth on the whole growing line, per character for overflowing words)
+and pdf_export.wrap_text cold and warm. Both must produce identical lines.
+Then times a full character PDF (draft + backstory + progression) cold/warm.
+
+    python -m api.bench.bench_pdf_wrap --repeat 20
+"""
+import argparse
+import random
+import time
+
+from reportlab.lib.units import inch
+from reportlab.pdfgen import canvas
+
+from ..app import pdf_export
+from ..app.pdf_export import wrap_text
+from ..app.schemas import AbilityBlock, BackstoryResult, CharacterDraft, LevelPick, ProgressionPlan
+from .bench_docs import _WORDS
+
+def _wrap_measured(canvas_obj: canvas.Canvas, text: str, max_width: float, font: str = "Helvetica", size: int = 10) -> list[str]:
+    """The wrapper pdf_export used before glyph-width caching."""
+    words = text.split()
+    lines: list[str] = []
+    line = ""
+    for w in words:
+        test = (line + (" " if line else "") + w)
+        if canvas_obj.stringWidth(test, font, size) <= max_width:
+            line = test
+        else:
+            if line:
+                lines.append(line)
+            if canvas_obj.stringWidth(w, font, size) > max_width:
+                accum = ""
+                for ch in w:
+                    if canvas_obj.stringWidth(accum + ch, font, size) <= max_width:
+                        accum += ch
+                    else:
+                        lines.append(accum)
+                        accum = ch
+                line = accum
+            else:
+                line = w
+    if line:
+        lines.append(line)
+    return lines
+
+def _sentence(rng: random.Random, words: int) -> str:
+    picked = rng.choices(_WORDS, k=words)
+    return picked[0].capitalize() + " " + " ".join(picked[1:]) + "."
+
+def corpus(seed: int) -> tuple[BackstoryResult, ProgressionPlan, list[tuple[str, float, str, int]]]:
+    rng = random.Random(seed)
+    paragraphs = [" ".join(_sentence(rng, 14) for _ in range(10)) for _ in range(5)]  # 5 x 140 = 700 words
+    paragraphs[2] += " See https://example.org/" + "lore/" * 40 + "chronicle for the full account."
+    backstory = BackstoryResult(summary=_sentence(rng, 30), traits=[], ideals=[], bonds=[], flaws=[], hooks=[],
+                                prose_markdown="\n\n".join(paragraphs))
+    picks = [LevelPick(level=lvl, hp_gain=rng.randint(1, 10), features=[f"{rng.choice(_WORDS).title()} {rng.choice(_WORDS).title()}" for _ in range(rng.randint(1, 4))],
+                       subclass="Path of the Totem Warrior" if lvl == 3 else None, asi="+2 STR" if lvl % 4 == 0 else None,
+                       notes=_sentence(rng, 25)) for lvl in range(1, 21)]
+    plan = ProgressionPlan(name="Bench plan", class_index="barbarian", target_level=20, picks=picks, notes_markdown=_sentence(rng, 120))
+    page = 8.5 * inch - 2 * 0.75 * inch
+    jobs = [(p, page, "Helvetica", 11) for p in paragraphs]
+    cols = (0.9 * inch, 3.3 * inch, 1.4 * inch, 1.2 * inch, 0.7 * inch)
+    for p in picks:
+        values = (str(p.level), ", ".join(p.features), p.subclass or "—", p.asi or "—", str(p.hp_gain))
+        jobs += [(v, w, "Helvetica", 10) for v, w in zip(values, cols)]
+        jobs.append((p.notes, page, "Helvetica", 10))
+    return backstory, plan, jobs
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--repeat", type=int, default=20)
+    ap.add_argument("--seed", type=int, default=3)
+    args = ap.parse_args()
+    backstory, plan, jobs = corpus(args.seed)
+    c = canvas.Canvas(None)
+
+    assert all(_wrap_measured(c, *job) == list(wrap_text(*job)) for job in jobs), "wrappers disagree"
+    print(f"{len(jobs)} strings, {sum(len(wrap_text(*j)) for j in jobs)} lines: identical output")
+
+    def timed(fn, clear: bool) -> float:
+        best = float("inf")
+        for _ in range(args.repeat):
+            if clear:
+                wrap_text.cache_clear()
+                pdf_export._glyph_widths.cache_clear()
+            t0 = time.perf_counter()
+            for job in jobs:
+                fn(*job)
+            best = min(best, time.perf_counter() - t0)
+        return best * 1000
+
+    old = timed(lambda *job: _wrap_measured(c, *job), clear=False)
+    cold = timed(wrap_text, clear=True)
+    warm = timed(wrap_text, clear=False)
+    print(f"wrap, stringWidth:          {old:8.2f} ms")
+    print(f"wrap, glyph widths (cold):  {cold:8.2f} ms  ({old / cold:.1f}x)")
+    print(f"wrap, cached (warm):        {warm:8.3f} ms  ({old / warm:.0f}x)")
+
+    ab = AbilityBlock(STR=16, DEX=12, CON=14, INT=10, WIS=12, CHA=8, STR_mod=3, DEX_mod=1, CON_mod=2, INT_mod=0, WIS_mod=1, CHA_mod=-1)
+    draft = CharacterDraft(name="Bench", level=20, cls="Barbarian", race="Half-Orc", background="Acolyte", hit_die=12, proficiency_bonus=6,
+                           abilities=ab, speed=30, saving_throws=["STR", "CON"], languages=["Common", "Orc"], armor_class_basic=11,
+                           features=[p.features[0] for p in plan.picks], equipment=["1x Greataxe", "2x Handaxe", "1x Explorer's Pack"])
+    measured = lambda text, width, font="Helvetica", size=10: tuple(_wrap_measured(c, text, width, font, size))
+    for label, wrapper, clear in (("stringWidth", measured, False), ("cold", wrap_text, True), ("warm", wrap_text, False)):
+        pdf_export.wrap_text = wrapper
+        best = float("inf")
+        for _ in range(args.repeat):
+            if clear:
+                wrap_text.cache_clear()
+                pdf_export._glyph_widths.cache_clear()
+            t0 = time.perf_counter()
+            pdf_export._character_pdf(draft, backstory, plan, None)
+            best = min(best, time.perf_counter() - t0)
+        print(f"character PDF, {label + ':':13s}{best * 1000:8.2f} ms")
+    pdf_export.wrap_text = wrap_text
+
+if __name__ == "__main__":
+    main()
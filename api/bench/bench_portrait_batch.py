@@ -0,0 +1,54 @@
+"""Benchmark portrait throughput with and without micro-batching.
+
+Fires `--requests` concurrent portrait requests through PortraitScheduler.
+By default the pipeline is simulated: each call costs a fixed overhead plus a
+per-image cost, which is how batched diffusion amortizes on a GPU. Pass --real
+to drive the resident Diffusers pipeline instead (slow; downloads weights).
+
+    python -m api.bench.bench_portrait_batch --requests 16 --max-batch 4
+"""
+import argparse
+import asyncio
+import time
+
+from ..app.portrait_scheduler import PortraitScheduler
+
+def simulated_runner(call_ms: float, image_ms: float):
+    async def run_batch(prompts: list[str], seeds: list[int]) -> list[bytes]:
+        await asyncio.sleep((call_ms + image_ms * len(prompts)) / 1000.0)
+        return [f"{p}:{s}".encode() for p, s in zip(prompts, seeds)]
+    return run_batch
+
+async def _throughput(run_batch, n: int, max_batch: int, window_ms: float) -> tuple[float, dict]:
+    sched = PortraitScheduler(run_batch, max_batch, window_ms)
+    t0 = time.perf_counter()
+    out = await asyncio.gather(*[sched.submit(f"portrait {i}", i) for i in range(n)])
+    elapsed = time.perf_counter() - t0
+    assert len(out) == n
+    return n / elapsed, sched.stats()
+
+async def _run(args) -> None:
+    if args.real:
+        from ..app.image_pipeline import pipeline_holder
+        run_batch = pipeline_holder.generate_png_batch
+        await pipeline_holder.preload()
+    else:
+        run_batch = simulated_runner(args.call_ms, args.image_ms)
+    base, _ = await _throughput(run_batch, args.requests, 1, 0)
+    print(f"unbatched      : {base:6.2f} images/s")
+    batched, stats = await _throughput(run_batch, args.requests, args.max_batch, args.window_ms)
+    print(f"batched (<= {args.max_batch:>2}): {batched:6.2f} images/s  avg batch {stats['avg_batch']}  "
+          f"-> {batched / base:.2f}x")
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--requests", type=int, default=16)
+    ap.add_argument("--max-batch", type=int, default=4)
+    ap.add_argument("--window-ms", type=float, default=75.0)
+    ap.add_argument("--call-ms", type=float, default=600.0, help="simulated fixed cost per pipeline call")
+    ap.add_argument("--image-ms", type=float, default=250.0, help="simulated marginal cost per image")
+    ap.add_argument("--real", action="store_true", help="use the resident Diffusers pipeline")
+    asyncio.run(_run(ap.parse_args()))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""Benchmark /api/progression/generate for a level-20 plan.
+
+Cold runs clear both the rules cache and the planner's parsed class tables;
+warm runs reuse them and should be pure in-memory work.
+
+    python -m api.bench.bench_progression --delay-ms 80 --iterations 20
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from .stub_rules import StubRulesServer
+from .timing import summarize
+
+async def _run(iterations: int, delay_ms: float) -> None:
+    from ..app.routes import progression
+    from ..app.helpers import rules_cache
+    from ..app.http_clients import open_http_clients, close_http_clients
+    from ..app.schemas import ProgressionInput, CharacterDraft, AbilityBlock
+
+    draft = CharacterDraft(
+        level=1, cls="Wizard", race="Elf", background="Acolyte", hit_die=6, proficiency_bonus=2,
+        abilities=AbilityBlock(STR=8, DEX=14, CON=13, INT=15, WIS=12, CHA=10,
+                               STR_mod=-1, DEX_mod=2, CON_mod=1, INT_mod=2, WIS_mod=1, CHA_mod=0),
+        speed=30, saving_throws=["INT", "WIS"], languages=["Common"], armor_class_basic=12,
+    )
+    payload = ProgressionInput(class_index="wizard", target_level=20, draft=draft)
+
+    await open_http_clients()
+    try:
+        for label, reset in (("cold", True), ("warm", False)):
+            samples: list[float] = []
+            for _ in range(iterations):
+                if reset:
+                    rules_cache.clear()
+                    progression._CLASS_TABLES.clear()
+                t0 = time.perf_counter()
+                plan = await progression.progression_generate(payload)
+                samples.append((time.perf_counter() - t0) * 1000)
+            assert len(plan.picks) == 20
+            print(f"{label:>5}: {summarize(samples)}  (level 20, upstream delay {delay_ms:.0f} ms)")
+    finally:
+        await close_http_clients()
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--delay-ms", type=float, default=80.0, help="injected upstream latency per request")
+    ap.add_argument("--iterations", type=int, default=20)
+    args = ap.parse_args()
+    with StubRulesServer(args.delay_ms) as server:
+        os.environ["RULES_BASE_URL"] = server.base_url
+        os.chdir(tempfile.mkdtemp(prefix="forge-bench-"))  # keep .cache and app.db out of the repo
+        asyncio.run(_run(args.iterations, args.delay_ms))
+
+if __name__ == "__main__":
+    main()
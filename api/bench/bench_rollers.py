@@ -0,0 +1,39 @@
+"""Benchmark the NumPy batch ability roller against the per-die Python loop.
+
+Both roll the same seeded stream (the batch roller reproduces random.Random),
+so the first --check sets are compared for equality before timing.
+
+    python -m api.bench.bench_rollers --sets 1000000
+"""
+import argparse
+import random
+import time
+
+from ..app.rollers import roll_4d6_drop_lowest, roll_ability_sets
+
+def _python_sets(count: int, seed: int) -> list[list[int]]:
+    rng = random.Random(seed)
+    return [sorted((roll_4d6_drop_lowest(rng)[2] for _ in range(6)), reverse=True) for _ in range(count)]
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--sets", type=int, default=1_000_000)
+    ap.add_argument("--python-sets", type=int, default=100_000, help="the Python loop is timed on fewer sets")
+    ap.add_argument("--check", type=int, default=10_000)
+    ap.add_argument("--seed", type=int, default=1)
+    args = ap.parse_args()
+
+    assert roll_ability_sets(args.check, args.seed).tolist() == _python_sets(args.check, args.seed), "streams differ"
+    print(f"first {args.check} sets identical for seed {args.seed}")
+
+    t0 = time.perf_counter()
+    _python_sets(args.python_sets, args.seed)
+    py_rate = args.python_sets / (time.perf_counter() - t0)
+    t0 = time.perf_counter()
+    roll_ability_sets(args.sets, args.seed)
+    np_rate = args.sets / (time.perf_counter() - t0)
+    print(f"python loop: {py_rate:12,.0f} sets/s")
+    print(f"numpy batch: {np_rate:12,.0f} sets/s  ({np_rate / py_rate:.0f}x)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""Local stand-in for dnd5eapi used by the benchmarks.
+
+Serves small, deterministic SRD-shaped JSON for the endpoints the API uses,
+with an injected per-request delay to model network latency.
+"""
+import asyncio
+import socket
+import threading
+import time
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+PREFIX = "api/2014"
+CLASSES = ["barbarian", "bard", "cleric", "druid", "fighter", "monk", "paladin", "ranger", "rogue", "sorcerer", "warlock", "wizard"]
+RACES = ["dragonborn", "dwarf", "elf", "gnome", "half-elf", "half-orc", "halfling", "human", "tiefling"]
+BACKGROUNDS = ["acolyte"]
+SPELLS = ["fire-bolt", "magic-missile", "shield"]
+EQUIPMENT = ["dagger", "holy-symbol", "quarterstaff"]
+
+def _ref(kind: str, index: str) -> dict:
+    return {"index": index, "name": index.replace("-", " ").title(), "url": f"/{PREFIX}/{kind}/{index}"}
+
+def _level(ci: str, lvl: int) -> dict:
+    data = {
+        "level": lvl,
+        "features": [{"index": f"{ci}-feature-{lvl}", "name": f"{ci.title()} Feature {lvl}"}],
+        "class": _ref("classes", ci),
+        "url": f"/{PREFIX}/classes/{ci}/levels/{lvl}",
+    }
+    if ci in ("bard", "cleric", "druid", "sorcerer", "warlock", "wizard"):
+        data["spellcasting"] = {f"spell_slots_level_{n}": (2 if n <= (lvl + 1) // 2 else 0) for n in range(1, 10)}
+    return data
+
+def payload_for(path: str):
+    parts = path.strip("/").split("/")[2:]  # drop api/2014
+    if not parts:
+        return None
+    kind = parts[0]
+    if kind == "classes":
+        if len(parts) == 1:
+            return {"count": len(CLASSES), "results": [_ref("classes", c) for c in CLASSES]}
+        ci = parts[1]
+        if len(parts) == 2:
+            return {
+                "index": ci, "name": ci.title(), "hit_die": 8,
+                "saving_throws": [{"index": "con", "name": "CON"}, {"index": "str", "name": "STR"}],
+                "proficiencies": [{"index": "light-armor", "name": "Light Armor"}],
+                "subclasses": [_ref("subclasses", f"{ci}-path")],
+                "class_levels": f"/{PREFIX}/classes/{ci}/levels",
+            }
+        if parts[2] == "levels":
+            if len(parts) == 3:
+                return [_level(ci, n) for n in range(1, 21)]
+            return _level(ci, int(parts[3]))
+    if kind == "races":
+        if len(parts) == 1:
+            return {"count": len(RACES), "results": [_ref("races", r) for r in RACES]}
+        return {"index": parts[1], "name": parts[1].title(), "speed": 30,
+                "languages": [{"index": "common", "name": "Common"}],
+                "starting_proficiencies": []}
+    if kind == "backgrounds":
+        if len(parts) == 1:
+            return {"count": len(BACKGROUNDS), "results": [_ref("backgrounds", b) for b in BACKGROUNDS]}
+        return {"index": parts[1], "name": parts[1].title(),
+                "starting_proficiencies": [{"index": "skill-insight", "name": "Skill: Insight"}],
+                "starting_equipment": [{"quantity": 1, "equipment": {"index": "holy-symbol", "name": "Holy Symbol"}}]}
+    if kind in ("spells", "equipment"):
+        names = SPELLS if kind == "spells" else EQUIPMENT
+        if len(parts) == 1:
+            return {"count": len(names), "results": [_ref(kind, n) for n in names]}
+        return {"index": parts[1], "name": parts[1].replace("-", " ").title(), "url": f"/{PREFIX}/{kind}/{parts[1]}"}
+    if kind == "starting-equipment":
+        return {"starting_equipment": [{"quantity": 1, "equipment": {"index": "dagger", "name": "Dagger"}}]}
+    return None
+
+class StubRulesServer:
+    """Run the stand-in rules API on a background thread."""
+
+    def __init__(self, delay_ms: float = 50.0):
+        self.delay = delay_ms / 1000.0
+        self.requests = 0
+        sock = socket.socket(); sock.bind(("127.0.0.1", 0))
+        self.port = sock.getsockname()[1]; sock.close()
+        self.base_url = f"http://127.0.0.1:{self.port}"
+        app = Starlette(routes=[Route("/{path:path}", self._handle)])
+        self._server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=self.port, log_level="warning"))
+        self._thread = threading.Thread(target=self._server.run, daemon=True)
+
+    async def _handle(self, request: Request):
+        self.requests += 1
+        await asyncio.sleep(self.delay)
+        data = payload_for(request.url.path)
+        if data is None:
+            return JSONResponse({"error": "Not found"}, status_code=404)
+        return JSONResponse(data)
+
+    def __enter__(self):
+        self._thread.start()
+        while not self._server.started:
+            time.sleep(0.01)
+        return self
+
+    def __exit__(self, *exc):
+        self._server.should_exit = True
+        self._thread.join(timeout=5)
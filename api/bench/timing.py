@@ -0,0 +1,9 @@
+"""Small timing helpers shared by the benchmarks."""
+import statistics
+
+def pct(samples: list[float], q: float) -> float:
+    s = sorted(samples)
+    return s[min(len(s) - 1, int(round(q * (len(s) - 1))))]
+
+def summarize(samples_ms: list[float]) -> str:
+    return f"p50={statistics.median(samples_ms):8.2f} ms  p95={pct(samples_ms, 0.95):8.2f} ms"
@@ -7,7 +7,7 @@ import {
   generateBackstory, type BackstoryResult,
   type Tone, type LengthOpt,
   downloadJSON, downloadMarkdown,
-  saveToLibrary, listLibrary, getLibraryItem, deleteLibraryItem
+  saveToLibrary, listLibrary, getLibraryItem, deleteLibraryItem, fetchPortrait
 } from "./api";
 import type { APIRef } from "./types";
 import GlassCard from "./components/GlassCard";
@@ -191,10 +191,10 @@ export default function App() {
     setBackstory(res.backstory);
     setProgPlan((res as any).progression ?? null);
     setCharName(loadedDraft.name ?? "");
-    if (res.portrait_base64) {
-      setPortraitBase64(res.portrait_base64);
+    if (res.portrait_url) {
+      const { blob, base64 } = await fetchPortrait(res.portrait_url);
+      setPortraitBase64(base64);
       try { if (portraitUrl) URL.revokeObjectURL(portraitUrl); } catch {}
-      const blob = await (async()=>{ const b = atob(res.portrait_base64!); const arr = new Uint8Array(b.length); for(let i=0;i<b.length;i++)arr[i]=b.charCodeAt(i); return new Blob([arr], {type:"image/png"}); })();
       setPortraitUrl(URL.createObjectURL(blob));
     } else { setPortraitBase64(null); if (portraitUrl) { URL.revokeObjectURL(portraitUrl); setPortraitUrl(null);} }
 
@@ -303,10 +303,10 @@ export default function App() {
   async function doLoadCreature(id:number){ 
     const res = await getCreature(id); 
     setCreature(res.creature);
-    if (res.portrait_base64) {
-      setCreaturePortraitBase64(res.portrait_base64);
+    if (res.portrait_url) {
+      const { blob, base64 } = await fetchPortrait(res.portrait_url);
+      setCreaturePortraitBase64(base64);
       try { if (creaturePortraitUrl) URL.revokeObjectURL(creaturePortraitUrl); } catch {}
-      const blob = await (async()=>{ const b = atob(res.portrait_base64!); const arr = new Uint8Array(b.length); for(let i=0;i<b.length;i++)arr[i]=b.charCodeAt(i); return new Blob([arr], {type:"image/png"}); })();
       setCreaturePortraitUrl(URL.createObjectURL(blob));
     } else { 
       setCreaturePortraitBase64(null); 
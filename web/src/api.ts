@@ -156,13 +156,27 @@ export async function listLibrary(limit = 10, page = 1, search: string = "", sor
   if (search) q.set('search', search);
   const res = await fetch(`http://localhost:${import.meta.env.VITE_API_PORT ?? 8000}/api/library/list?${q.toString()}`);
   if (!res.ok) throw new Error(`list failed: ${res.status}`);
-  return res.json() as Promise<{ items: {id:number; name:string; created_at:string; cls?:string; race?:string}[]; total:number }>;
+  return res.json() as Promise<{ items: {id:number; name:string; created_at:string; cls?:string; race?:string; thumb_url?:string|null}[]; total:number; next_cursor?:string|null }>;
 }
 
 export async function getLibraryItem(id: number) {
   const res = await fetch(`http://localhost:${import.meta.env.VITE_API_PORT ?? 8000}/api/library/get/${id}`);
   if (!res.ok) throw new Error(`get failed: ${res.status}`);
-  return res.json() as Promise<{ id:number; name:string; created_at:string; draft: CharacterDraft; backstory: BackstoryResult | null; progression?: ProgressionPlan | null; portrait_base64?: string | null }>;
+  return res.json() as Promise<{ id:number; name:string; created_at:string; draft: CharacterDraft; backstory: BackstoryResult | null; progression?: ProgressionPlan | null; portrait_url?: string | null }>;
+}
+
+// Fetch a stored portrait by its API path; returns the PNG and its base64 (used when re-saving / exporting)
+export async function fetchPortrait(path: string) {
+  const res = await fetch(`${API}${path}`);
+  if (!res.ok) throw new Error(`portrait fetch failed: ${res.status}`);
+  const blob = await res.blob();
+  const base64 = await new Promise<string>((resolve, reject) => {
+    const reader = new FileReader();
+    reader.onload = () => resolve(String(reader.result).split(",")[1] ?? "");
+    reader.onerror = () => reject(reader.error);
+    reader.readAsDataURL(blob);
+  });
+  return { blob, base64 };
 }
 
 export async function deleteLibraryItem(id: number) {
@@ -215,7 +229,7 @@ export async function listMagicItems(limit = 10, page = 1, search: string = "",
   if (search) q.set('search', search);
   const res = await fetch(`http://localhost:${import.meta.env.VITE_API_PORT ?? 8000}/api/items/list?${q.toString()}`);
   if (!res.ok) throw new Error(`item list failed: ${res.status}`);
-  return res.json() as Promise<{ items: {id:number; name:string; created_at:string; item_type?:string; rarity?:string}[]; total:number }>;
+  return res.json() as Promise<{ items: {id:number; name:string; created_at:string; item_type?:string; rarity?:string}[]; total:number; next_cursor?:string|null }>;
 }
 
 export async function getMagicItem(id: number) {
@@ -301,7 +315,7 @@ export async function listSpells(limit=10, page=1, search='', sort='created_desc
   const q = new URLSearchParams({ limit:String(limit), page:String(page), sort}); if (search) q.set('search', search);
   const res = await fetch(`http://localhost:${import.meta.env.VITE_API_PORT ?? 8000}/api/spells/list?${q.toString()}`);
   if (!res.ok) throw new Error(`spells list failed: ${res.status}`);
-  return res.json() as Promise<{ items:{id:number; name:string; created_at:string; level?:number; school?:string}[], total:number }>;
+  return res.json() as Promise<{ items:{id:number; name:string; created_at:string; level?:number; school?:string}[], total:number; next_cursor?:string|null }>;
 }
 
 export async function getSpell(id:number) {
@@ -414,7 +428,7 @@ export async function listProgressions(limit=10, page=1, search='', sort='create
   const q = new URLSearchParams({ limit:String(limit), page:String(page), sort }); if (search) q.set('search', search);
   const res = await fetch(`${API}/api/progression/list?${q.toString()}`);
   if (!res.ok) throw new Error(`progression list failed: ${res.status}`);
-  return res.json() as Promise<{ items:{id:number; name:string; created_at:string}[], total:number }>;
+  return res.json() as Promise<{ items:{id:number; name:string; created_at:string}[], total:number; next_cursor?:string|null }>;
 }
 
 export async function getProgression(id:number) {
@@ -492,13 +506,13 @@ export async function listCreatures(limit=10, page=1, search='', sort='created_d
   const q = new URLSearchParams({ limit:String(limit), page:String(page), sort }); if (search) q.set('search', search);
   const res = await fetch(`http://localhost:${import.meta.env.VITE_API_PORT ?? 8000}/api/creatures/list?${q.toString()}`);
   if (!res.ok) throw new Error(`creatures list failed: ${res.status}`);
-  return res.json() as Promise<{ items:{id:number; name:string; created_at:string; size?:string; creature_type?:string; challenge_rating?:string}[], total:number }>;
+  return res.json() as Promise<{ items:{id:number; name:string; created_at:string; size?:string; creature_type?:string; challenge_rating?:string; thumb_url?:string|null}[], total:number; next_cursor?:string|null }>;
 }
 
 export async function getCreature(id:number) {
   const res = await fetch(`http://localhost:${import.meta.env.VITE_API_PORT ?? 8000}/api/creatures/get/${id}`);
   if (!res.ok) throw new Error(`creature get failed: ${res.status}`);
-  return res.json() as Promise<{ id:number; name:string; created_at:string; creature: Creature; portrait_base64?: string | null }>;
+  return res.json() as Promise<{ id:number; name:string; created_at:string; creature: Creature; portrait_url?: string | null }>;
 }
 
 export async function deleteCreature(id:number) {